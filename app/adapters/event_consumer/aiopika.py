@@ -1,21 +1,48 @@
 from app.ports.event_consumer import IEventConsumerPort
-from typing import Callable, Awaitable
+from typing import Awaitable, Callable, Hashable
+from app.codec import JsonCodec, StdlibJsonCodec
+from app.executor import KeyedTaskPool
+from functools import partial
 import aio_pika
 import asyncio
-import json
 
 
 class AioPikaEventConsumerAdapter(IEventConsumerPort):
+    """
+    Потребитель событий: брокер присылает не более `prefetch_count`
+    неподтвержденных сообщений, обработчики выполняются параллельно, не
+    более `max_concurrency` одновременно. Если задан ordering_key, события
+    с одинаковым ключом (например, об одном пользователе) обрабатываются
+    строго в порядке получения.
+
+    Сообщения, которые не удалось разобрать или обработать, отклоняются
+    без возврата в очередь и через dead letter exchange попадают в
+    очередь `<exchange_name>.dead-letter` для разбора.
+    """
+
     def __init__(
         self,
         connection_url: str,
         exchange_name: str = "events",
         queue_name: str = "",
+        exclusive: bool = False,
+        *,
+        prefetch_count: int = 64,
+        max_concurrency: int = 16,
+        codec: JsonCodec | None = None,
     ):
         self.connection_url = connection_url
         self.exchange_name = exchange_name
         self.queue_name = queue_name
+        self.exclusive = exclusive
+        self.prefetch_count = prefetch_count
+        self.codec = codec or StdlibJsonCodec()
+        self.dead_letter_name = f"{exchange_name}.dead-letter"
+
+        self.processed = 0
+        self.dead_lettered = 0
 
+        self._pool = KeyedTaskPool(max_concurrency)
         self._connection = None
         self._channel = None
         self._exchange = None
@@ -24,19 +51,31 @@ class AioPikaEventConsumerAdapter(IEventConsumerPort):
     async def connect(self):
         self._connection = await aio_pika.connect_robust(self.connection_url)
         self._channel = await self._connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch_count)
         self._exchange = await self._channel.declare_exchange(
             self.exchange_name, aio_pika.ExchangeType.TOPIC
         )
 
+        dead_letter_exchange = await self._channel.declare_exchange(
+            self.dead_letter_name, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        dead_letter_queue = await self._channel.declare_queue(
+            self.dead_letter_name, durable=True
+        )
+        await dead_letter_queue.bind(dead_letter_exchange)
+
         self._queue = await self._channel.declare_queue(
             self.queue_name or "",
-            durable=True,
+            durable=not self.exclusive,
+            exclusive=self.exclusive,
+            arguments={"x-dead-letter-exchange": self.dead_letter_name},
         )
 
     async def create_consuming_loop(
         self,
         routing_keys: list[str],
         handler: Callable[[dict], Awaitable[None]],
+        ordering_key: Callable[[dict], Hashable] | None = None,
     ) -> asyncio.Task:
         for key in routing_keys:
             await self._queue.bind(self._exchange, routing_key=key)
@@ -44,11 +83,42 @@ class AioPikaEventConsumerAdapter(IEventConsumerPort):
         async def consume():
             async with self._queue.iterator() as queue_iter:
                 async for message in queue_iter:
-                    async with message.process():
-                        try:
-                            payload = json.loads(message.body)
-                            await handler(payload)
-                        except Exception as e:
-                            print("Error during processing message: ", e)
+                    try:
+                        payload = self.codec.decode(message.body)
+                        key = ordering_key(payload) if ordering_key else None
+                    except Exception:
+                        await self._dead_letter(message)
+                        continue
+
+                    await self._pool.submit(
+                        key, partial(self._handle, message, payload, handler)
+                    )
 
         return asyncio.create_task(consume())
+
+    async def _handle(
+        self,
+        message: aio_pika.abc.AbstractIncomingMessage,
+        payload: dict,
+        handler: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        try:
+            await handler(payload)
+        except Exception:
+            await self._dead_letter(message)
+        else:
+            await message.ack()
+            self.processed += 1
+
+    async def _dead_letter(
+        self, message: aio_pika.abc.AbstractIncomingMessage
+    ) -> None:
+        await message.reject(requeue=False)
+        self.dead_lettered += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "processed": self.processed,
+            "dead_lettered": self.dead_lettered,
+            "in_flight": self._pool.in_flight,
+        }
@@ -1,39 +1,78 @@
 from app.ports.event_publisher import IEventPublisherPort
+from app.codec import JsonCodec, StdlibJsonCodec
+from typing import Sequence
 from pydantic import BaseModel
-from uuid import uuid4
+from uuid import UUID, uuid4
 import aio_pika
+import aiormq
+import asyncio
 
 from app.ports.event_publisher.dto import EventPayload
 from app.ports.event_publisher.exceptions import (
     EventPublisherNotConnectedException,
+    EventNotConfirmedException,
 )
 
 
 class AioPikaEventPublisherAdapter(IEventPublisherPort):
-    def __init__(self, connection_url: str, exchange_name: str = "events"):
+    def __init__(
+        self,
+        connection_url: str,
+        exchange_name: str = "events",
+        publish_timeout: float | None = None,
+        codec: JsonCodec | None = None,
+    ):
         self.connection_url = connection_url
         self.exchange_name = exchange_name
+        self.publish_timeout = publish_timeout
+        self.codec = codec or StdlibJsonCodec()
         self._exchange = None
         self._channel = None
 
     async def connect(self):
         connection = await aio_pika.connect_robust(self.connection_url)
-        self._channel = await connection.channel()
+        # с подтверждениями publish завершается только после того,
+        # как брокер принял сообщение
+        self._channel = await connection.channel(publisher_confirms=True)
         self._exchange = await self._channel.declare_exchange(
             self.exchange_name, aio_pika.ExchangeType.TOPIC
         )
 
     async def publish(self, event_name: str, data: BaseModel) -> None:
-        if not self._exchange:
-            raise EventPublisherNotConnectedException()
-
         payload = EventPayload(
             event_id=uuid4(), event_name=event_name, data=data.model_dump()
         )
 
-        message = aio_pika.Message(
-            body=payload.model_dump_json().encode(),
-            content_type="application/json",
+        if await self.publish_batch([payload]):
+            raise EventNotConfirmedException()
+
+    async def publish_batch(self, events: Sequence[EventPayload]) -> list[UUID]:
+        """
+        Отправляет все события в канал сразу и ждет подтверждения на каждое,
+        так что пачка обходится примерно в один round-trip до брокера.
+        Возвращает идентификаторы событий, которые брокер не подтвердил.
+        """
+        if not self._exchange:
+            raise EventPublisherNotConnectedException()
+
+        results = await asyncio.gather(
+            *(
+                self._exchange.publish(
+                    aio_pika.Message(
+                        body=self.codec.encode_event(event),
+                        content_type="application/json",
+                        message_id=str(event.event_id),
+                    ),
+                    routing_key=event.event_name,
+                    timeout=self.publish_timeout,
+                )
+                for event in events
+            ),
+            return_exceptions=True,
         )
 
-        await self._exchange.publish(message, routing_key=event_name)
+        return [
+            event.event_id
+            for event, result in zip(events, results)
+            if isinstance(result, (BaseException, aiormq.spec.Basic.Nack))
+        ]
@@ -1,54 +1,228 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, BinaryIO, Callable, TypeVar
+from app.ports.storage.exceptions import InvalidRangeException
 from app.ports.storage import IStoragePort
 from botocore.client import Config
 from app.config import Settings
+import threading
+import asyncio
 import boto3
 import io
 
+T = TypeVar("T")
+
+# ограничение S3 на число ключей в одном запросе DeleteObjects
+DELETE_OBJECTS_BATCH = 1000
+
 
 class S3StorageAdapter(IStoragePort):
-    def __init__(self):
-        self.__client = boto3.client(
+    """
+    boto3 синхронный, поэтому все вызовы выполняются в отдельном пуле
+    потоков, размер которого совпадает с пулом HTTP-соединений клиента:
+    одновременно к S3 идет не более `max_concurrency` запросов, остальные
+    ждут в очереди, не блокируя event loop.
+
+    Загрузка читает переданный файл напрямую, без промежуточных копий:
+    небольшие объекты уходят одним PutObject, крупные — multipart-загрузкой,
+    в которой одновременно в памяти не больше `multipart_concurrency`
+    частей по `multipart_part_size` байт.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        *,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_part_size: int = 8 * 1024 * 1024,
+        multipart_concurrency: int = 4,
+    ):
+        self.multipart_threshold = multipart_threshold
+        self.multipart_part_size = multipart_part_size
+        self.multipart_concurrency = multipart_concurrency
+
+        self.__client = self._create_client(
+            Settings.S3_ENDPOINT,
+            Config(
+                signature_version="s3v4",
+                max_pool_connections=max_concurrency,
+                tcp_keepalive=True,
+            ),
+        )
+        # подписанные ссылки отдаются клиентам, поэтому должны указывать
+        # на публичный адрес S3, который может отличаться от внутреннего
+        self.__presign_client = self.__client
+        if Settings.S3_PUBLIC_ENDPOINT:
+            self.__presign_client = self._create_client(
+                Settings.S3_PUBLIC_ENDPOINT, Config(signature_version="s3v4")
+            )
+        self.__executor = ThreadPoolExecutor(
+            max_concurrency, thread_name_prefix="s3"
+        )
+
+    def _create_client(self, endpoint_url: str, config: Config):
+        return boto3.client(
             "s3",
-            endpoint_url=Settings.S3_ENDPOINT,
+            endpoint_url=endpoint_url,
             aws_access_key_id=Settings.S3_ACCESS_KEY,
             aws_secret_access_key=Settings.S3_SECRET_KEY,
-            config=Config(signature_version="s3v4"),
+            config=config,
             region_name="us-east-1",
         )
 
-    def upload_jpeg(self, buf: io.BytesIO, bucket: str, key: str) -> None:
-        self.__client.upload_fileobj(
-            buf,
-            bucket,
-            key,
-            ExtraArgs={"ContentType": "image/jpeg"},
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__executor, lambda: func(*args, **kwargs)
         )
 
-    def upload_file(
-        self, buf: io.BytesIO, bucket: str, key: str, content_type: str
+    async def upload_jpeg(self, buf: io.BytesIO, bucket: str, key: str) -> None:
+        await self.upload_file(buf, bucket, key, "image/jpeg")
+
+    async def upload_file(
+        self, buf: BinaryIO, bucket: str, key: str, content_type: str
     ) -> None:
-        self.__client.upload_fileobj(
-            buf,
-            bucket,
-            key,
-            ExtraArgs={"ContentType": content_type},
+        size = buf.seek(0, io.SEEK_END)
+        buf.seek(0)
+        if size <= self.multipart_threshold:
+            # boto3 upload_fileobj читает объект целиком в собственный
+            # буфер; PutObject отправляет тело прямо из переданного файла
+            await self._run(
+                self.__client.put_object,
+                Bucket=bucket,
+                Key=key,
+                Body=buf,
+                ContentType=content_type,
+            )
+            return
+
+        await self._upload_multipart(buf, size, bucket, key, content_type)
+
+    async def _upload_multipart(
+        self,
+        buf: BinaryIO,
+        size: int,
+        bucket: str,
+        key: str,
+        content_type: str,
+    ) -> None:
+        upload = await self._run(
+            self.__client.create_multipart_upload,
+            Bucket=bucket,
+            Key=key,
+            ContentType=content_type,
         )
+        upload_id = upload["UploadId"]
+        semaphore = asyncio.Semaphore(self.multipart_concurrency)
+        lock = threading.Lock()
+
+        def send_part(number: int, offset: int) -> dict:
+            # в памяти находится только отправляемая часть
+            with lock:
+                buf.seek(offset)
+                body = buf.read(self.multipart_part_size)
+            response = self.__client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+            return {"PartNumber": number, "ETag": response["ETag"]}
 
-    def delete_object(self, bucket: str, key: str) -> None:
-        self.__client.delete_object(Bucket=bucket, Key=key)
+        async def upload_part(number: int, offset: int) -> dict:
+            async with semaphore:
+                return await self._run(send_part, number, offset)
 
-    def object_exists(self, bucket: str, key: str) -> bool:
         try:
-            self.__client.head_object(Bucket=bucket, Key=key)
+            parts = await asyncio.gather(
+                *[
+                    upload_part(number, offset)
+                    for number, offset in enumerate(
+                        range(0, size, self.multipart_part_size), start=1
+                    )
+                ]
+            )
+            await self._run(
+                self.__client.complete_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            await self._run(
+                self.__client.abort_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+            )
+            raise
+
+    async def delete_object(self, bucket: str, key: str) -> None:
+        await self._run(self.__client.delete_object, Bucket=bucket, Key=key)
+
+    async def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        failed: list[str] = []
+        for start in range(0, len(keys), DELETE_OBJECTS_BATCH):
+            response = await self._run(
+                self.__client.delete_objects,
+                Bucket=bucket,
+                Delete={
+                    "Objects": [
+                        {"Key": key}
+                        for key in keys[start : start + DELETE_OBJECTS_BATCH]
+                    ],
+                    "Quiet": True,
+                },
+            )
+            failed += [error["Key"] for error in response.get("Errors", [])]
+
+        return failed
+
+    async def list_objects(self, bucket: str) -> AsyncIterator[dict]:
+        params = {"Bucket": bucket}
+        while True:
+            page = await self._run(self.__client.list_objects_v2, **params)
+            for obj in page.get("Contents", []):
+                yield obj
+
+            if not page.get("IsTruncated"):
+                return
+            params["ContinuationToken"] = page["NextContinuationToken"]
+
+    async def object_exists(self, bucket: str, key: str) -> bool:
+        try:
+            await self._run(self.__client.head_object, Bucket=bucket, Key=key)
             return True
         except self.__client.exceptions.ClientError:
             return False
 
-    def get_object(self, bucket: str, key: str) -> dict:
-        return self.__client.get_object(Bucket=bucket, Key=key)
+    async def get_object(
+        self, bucket: str, key: str, range: str | None = None
+    ) -> dict:
+        params = {"Bucket": bucket, "Key": key}
+        if range:
+            params["Range"] = range
 
-    def ensure_bucket(self, bucket: str) -> None:
-        if self.__client.bucket_exists(bucket):
-            return
+        try:
+            return await self._run(self.__client.get_object, **params)
+        except self.__client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                raise InvalidRangeException()
+            raise
+
+    async def ensure_bucket(self, bucket: str) -> None:
+        try:
+            await self._run(self.__client.head_bucket, Bucket=bucket)
+        except self.__client.exceptions.ClientError:
+            raise RuntimeError(f"Необходимо определить бакет {bucket}!")
 
-        raise RuntimeError(f"Необходимо определить бакет {bucket}!")
+    async def generate_presigned_url(
+        self, bucket: str, key: str, expires_in: int
+    ) -> str:
+        # подпись вычисляется локально, без запросов к S3
+        return self.__presign_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=expires_in,
+        )
@@ -0,0 +1,28 @@
+from app.ports.user_cache import IUserCachePort
+from app.cache import TTLCache
+
+
+class InMemoryUserCacheAdapter(IUserCachePort):
+    """
+    Реализация общего кеша в памяти процесса: для разработки и тестов, где
+    нет внешнего хранилища. Между воркерами не разделяется.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[str, bytes] = TTLCache(maxsize, ttl)
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        result = {}
+        for key in keys:
+            value = self._cache.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        for key, value in items.items():
+            self._cache.set(key, value, ttl)
+
+    async def delete_many(self, keys: list[str]) -> None:
+        for key in keys:
+            self._cache.invalidate(key)
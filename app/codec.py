@@ -0,0 +1,64 @@
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.ports.event_publisher.dto import EventPayload
+from typing import Any, Literal, Protocol
+from functools import lru_cache
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JsonCodecName = Literal["json", "orjson"]
+
+
+class JsonCodec(Protocol):
+    """
+    Сериализация JSON для ответов API и событий в брокере. Ответы
+    рендерятся через response_class, события кодируются encode_event
+    и разбираются decode.
+    """
+
+    response_class: type[JSONResponse]
+
+    def encode_event(self, event: EventPayload) -> bytes: ...
+    def decode(self, data: bytes) -> Any: ...
+
+
+class StdlibJsonCodec(JsonCodec):
+    response_class = JSONResponse
+
+    def encode_event(self, event: EventPayload) -> bytes:
+        return event.model_dump_json().encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    response_class = ORJSONResponse
+
+    def encode_event(self, event: EventPayload) -> bytes:
+        # поля уже провалидированы при создании EventPayload, поэтому
+        # сериализуем их напрямую, минуя повторный обход модели pydantic
+        return orjson.dumps(
+            {
+                "event_id": event.event_id,
+                "event_name": event.event_name,
+                "data": event.data,
+            },
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+@lru_cache
+def get_json_codec(name: JsonCodecName) -> JsonCodec:
+    if name == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_CODEC=orjson requires orjson package")
+        return OrjsonCodec()
+
+    return StdlibJsonCodec()
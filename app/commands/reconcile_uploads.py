@@ -0,0 +1,58 @@
+"""
+Поиск объектов в бакете загрузок, на которые не ссылается ни одна запись.
+
+Такие объекты остаются, например, после удаления пользователя (записи о
+загрузках удаляются каскадно) или если процесс упал между загрузкой файла
+в S3 и фиксацией транзакции.
+
+Запуск: python -m app.commands.reconcile_uploads [--min-age 3600] [--delete]
+С --delete найденные ключи ставятся в очередь сборщика мусора.
+"""
+
+from app.models.user import UploadGarbageModel
+from app.services.uploads.gc import UploadGarbageCollector
+from app.dependencies import get_storage_adapter
+from tortoise import Tortoise
+from app.db import TORTOISE_ORM
+import argparse
+import asyncio
+
+
+async def reconcile(min_age: float, delete: bool) -> list[str]:
+    gc = UploadGarbageCollector(get_storage_adapter())
+    orphans = await gc.find_orphans(min_age)
+    if delete:
+        await UploadGarbageModel.enqueue(orphans)
+
+    return orphans
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--min-age",
+        type=float,
+        default=3600,
+        help="пропускать объекты моложе стольких секунд",
+    )
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="поставить найденные объекты в очередь на удаление",
+    )
+    args = parser.parse_args()
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        orphans = await reconcile(args.min_age, args.delete)
+    finally:
+        await Tortoise.close_connections()
+
+    for key in orphans:
+        print(key)
+    action = "поставлено в очередь на удаление" if args.delete else "найдено"
+    print(f"Объектов без записей: {len(orphans)} ({action})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal
 
 
 class UserServiceSettings(BaseSettings):
@@ -9,14 +10,72 @@ class UserServiceSettings(BaseSettings):
     DATABASE_URL: str
     RABBITMQ_URL: str
 
+    DATABASE_READ_URL: str | None = None
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_ACQUIRE_TIMEOUT: float = 10
+
     S3_ENDPOINT: str
     S3_ACCESS_KEY: str
     S3_SECRET_KEY: str
+    S3_MAX_CONCURRENCY: int = 32
+    S3_PUBLIC_ENDPOINT: str | None = None
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
 
     INTERNAL_API_KEY: str = "apikey"
     JWT_SECRET: str = "dstu"
+    JWT_ALGORITHM: Literal["HS256", "RS256", "ES256"] = "HS256"
+    JWT_KEYS_DIR: str = "keys"
+    JWT_ACTIVE_KID: str = "default"
     ROOT_PATH: str = ""
+    JSON_CODEC: Literal["json", "orjson"] = "orjson"
     PUBLIC_API_URL: str = "http://localhost/user/"
+    UPLOADS_DOWNLOAD_MODE: Literal["proxy", "redirect", "presigned"] = "proxy"
+    UPLOADS_PRESIGNED_URL_TTL: int = 3600
+    UPLOADS_PRESIGNED_URL_CACHE_SIZE: int = 10000
+    UPLOADS_DISK_CACHE_DIR: str | None = None
+    UPLOADS_DISK_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOADS_DISK_CACHE_TTL: float = 300
+    UPLOADS_AVATAR_RENDITION_SIZES: list[int] = [32, 64, 128]
+    UPLOADS_COVER_RENDITION_SIZES: list[int] = [512, 1024]
+    UPLOADS_RENDITION_FORMATS: list[Literal["jpeg", "webp"]] = ["jpeg", "webp"]
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "scrypt"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_SCRYPT_N: int = 2**14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+
+    TOKEN_REVISION_CACHE_SIZE: int = 10000
+    TOKEN_REVISION_CACHE_TTL: float = 60
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    USER_PROFILE_CACHE_SIZE: int = 10000
+    USER_PROFILE_CACHE_TTL: float = 60
+    USER_PROFILE_CACHE_BACKEND: Literal["none", "memory"] = "none"
+    USER_LOOKUP_BATCH_WINDOW: float = 0.002
+    USER_LOOKUP_BATCH_SIZE: int = 200
+
+    IMAGE_PROCESSING_EXECUTOR: Literal["thread", "process"] = "process"
+    IMAGE_PROCESSING_WORKERS: int = 2
+    IMAGE_PROCESSING_QUEUE_SIZE: int = 16
+    UPLOAD_MAX_BYTES: int = 16 * 1024 * 1024
+    UPLOAD_MAX_PIXELS: int = 4096 * 4096
+    UPLOADS_SPOOL_DIR: str | None = None
+    UPLOADS_GC_INTERVAL: float = 30
+    UPLOADS_GC_BATCH_SIZE: int = 1000
+    UPLOADS_GC_GRACE_PERIOD: float = 60
+    EVENTS_OUTBOX_BATCH_SIZE: int = 100
+    EVENTS_OUTBOX_INTERVAL: float = 5
+    EVENTS_PUBLISH_TIMEOUT: float = 10
+    EVENTS_CONSUMER_PREFETCH: int = 64
+    EVENTS_CONSUMER_CONCURRENCY: int = 16
 
 
 Settings = UserServiceSettings()
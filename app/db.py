@@ -1,11 +1,82 @@
+from tortoise.backends.base.config_generator import expand_db_url
+from tortoise.backends.asyncpg import AsyncpgDBClient
 from tortoise.contrib.fastapi import register_tortoise
+from tortoise import BaseDBAsyncClient, connections
+from asyncpg.pool import PoolAcquireContext
 from app.config import Settings
 from tortoise import Tortoise
 from fastapi import FastAPI
+import asyncpg
+
+READ_CONNECTION = "replica"
+
+
+class AcquireTimeoutPool(asyncpg.Pool):
+    """
+    Пул asyncpg с ограничением ожидания свободного соединения по умолчанию:
+    при исчерпании пула запрос падает с TimeoutError, а не висит в очереди
+    """
+
+    acquire_timeout: float | None = None
+
+    def acquire(self, *, timeout: float | None = None) -> PoolAcquireContext:
+        if timeout is None:
+            timeout = self.acquire_timeout
+        return super().acquire(timeout=timeout)
+
+
+class PooledAsyncpgClient(AsyncpgDBClient):
+    def __init__(self, *args, acquire_timeout: float | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+
+    async def create_pool(self, **kwargs) -> asyncpg.Pool:
+        # значения по умолчанию те же, что у asyncpg.create_pool
+        pool = AcquireTimeoutPool(
+            None,
+            **{
+                "max_queries": 50000,
+                "max_inactive_connection_lifetime": 300.0,
+                "record_class": asyncpg.Record,
+                **kwargs,
+            },
+        )
+        pool.acquire_timeout = self.acquire_timeout
+        return await pool
+
+
+# модуль служит движком tortoise для postgres: "engine": "app.db"
+client_class = PooledAsyncpgClient
+
+
+def _connection_config(url: str) -> dict:
+    config = expand_db_url(url)
+    if config["engine"] != "tortoise.backends.asyncpg":
+        return config
+
+    config["engine"] = __name__
+    # параметры, явно указанные в строке подключения, важнее настроек
+    credentials = config["credentials"]
+    credentials.setdefault("minsize", Settings.DATABASE_POOL_MIN_SIZE)
+    credentials.setdefault("maxsize", Settings.DATABASE_POOL_MAX_SIZE)
+    credentials.setdefault(
+        "statement_cache_size", Settings.DATABASE_STATEMENT_CACHE_SIZE
+    )
+    credentials.setdefault(
+        "acquire_timeout", Settings.DATABASE_ACQUIRE_TIMEOUT or None
+    )
+    return config
+
+
+def _connections_config() -> dict:
+    config = {"default": _connection_config(Settings.DATABASE_URL)}
+    if Settings.DATABASE_READ_URL:
+        config[READ_CONNECTION] = _connection_config(Settings.DATABASE_READ_URL)
+    return config
 
 
 TORTOISE_ORM = {
-    "connections": {"default": Settings.DATABASE_URL},
+    "connections": _connections_config(),
     "apps": {
         "models": {
             "models": ["app.models", "aerich.models"],
@@ -15,6 +86,21 @@ TORTOISE_ORM = {
 }
 
 
+def get_read_connection() -> BaseDBAsyncClient:
+    """
+    Соединение для чтений, которым допустимо отставание реплики: реплика,
+    если задан DATABASE_READ_URL, иначе основная база. Чтения, за которыми
+    следует запись, и чтения сразу после своей записи идут в основную базу.
+    """
+    if Settings.DATABASE_READ_URL:
+        return connections.get(READ_CONNECTION)
+    return get_primary_connection()
+
+
+def get_primary_connection() -> BaseDBAsyncClient:
+    return connections.get("default")
+
+
 def init_db(app: FastAPI):
     Tortoise.init_models(["app.models"], "models")
     register_tortoise(
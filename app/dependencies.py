@@ -1,12 +1,26 @@
 from app.adapters.event_publisher.aiopika import AioPikaEventPublisherAdapter
+from app.adapters.event_consumer.aiopika import AioPikaEventConsumerAdapter
+from app.ports.event_consumer import IEventConsumerPort
 from app.ports.event_publisher import IEventPublisherPort
+from app.services.password.interface import IPasswordService
 from app.services.uploads.interface import IUserUploadService
 from app.services.uploads.service import UserUploadService
+from app.services.uploads.disk_cache import UploadDiskCache
+from app.services.uploads.pipeline import ImagePipeline
+from app.services.uploads.gc import UploadGarbageCollector
+from app.services.password.service import PasswordService
+from app.services.password.hashers import BcryptHasher, ScryptHasher
 from app.services.auth import AuthService, IAuthService
+from app.services.auth.keys import get_jwt_keyring
+from app.adapters.user_cache import InMemoryUserCacheAdapter
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.uploads import UserUploadsHook
+from app.services.user.cache import UserProfileCache
 from app.services.user.interface import IUserService
 from app.adapters.storage import S3StorageAdapter
 from app.services.user.service import UserService
 from app.ports.storage import IStoragePort
+from app.codec import get_json_codec
 from app.config import Settings
 from functools import lru_cache
 from fastapi import Depends
@@ -14,30 +28,167 @@ from fastapi import Depends
 
 @lru_cache
 def get_storage_adapter() -> IStoragePort:
-    return S3StorageAdapter()
+    return S3StorageAdapter(
+        Settings.S3_MAX_CONCURRENCY,
+        multipart_threshold=Settings.S3_MULTIPART_THRESHOLD,
+        multipart_part_size=Settings.S3_MULTIPART_PART_SIZE,
+        multipart_concurrency=Settings.S3_MULTIPART_CONCURRENCY,
+    )
 
 
 @lru_cache
 def get_event_publisher() -> IEventPublisherPort:
-    return AioPikaEventPublisherAdapter(Settings.RABBITMQ_URL, "events")
+    return AioPikaEventPublisherAdapter(
+        Settings.RABBITMQ_URL,
+        "events",
+        publish_timeout=Settings.EVENTS_PUBLISH_TIMEOUT,
+        codec=get_json_codec(Settings.JSON_CODEC),
+    )
+
+
+@lru_cache
+def get_user_event_dispatcher(
+    publisher: IEventPublisherPort = Depends(get_event_publisher),
+) -> UserEventDispatcher:
+    return UserEventDispatcher(
+        publisher,
+        batch_size=Settings.EVENTS_OUTBOX_BATCH_SIZE,
+        interval=Settings.EVENTS_OUTBOX_INTERVAL,
+    )
+
+
+@lru_cache
+def get_image_pipeline() -> ImagePipeline:
+    return ImagePipeline(
+        max_workers=Settings.IMAGE_PROCESSING_WORKERS,
+        max_queue=Settings.IMAGE_PROCESSING_QUEUE_SIZE,
+        executor=Settings.IMAGE_PROCESSING_EXECUTOR,
+    )
+
+
+@lru_cache
+def get_upload_disk_cache() -> UploadDiskCache | None:
+    if not Settings.UPLOADS_DISK_CACHE_DIR:
+        return None
+
+    return UploadDiskCache(
+        Settings.UPLOADS_DISK_CACHE_DIR,
+        Settings.UPLOADS_DISK_CACHE_MAX_BYTES,
+        Settings.UPLOADS_DISK_CACHE_TTL,
+    )
+
+
+@lru_cache
+def get_user_profile_cache() -> UserProfileCache | None:
+    if Settings.USER_PROFILE_CACHE_SIZE <= 0:
+        return None
+
+    backend = None
+    if Settings.USER_PROFILE_CACHE_BACKEND == "memory":
+        backend = InMemoryUserCacheAdapter(
+            Settings.USER_PROFILE_CACHE_SIZE, Settings.USER_PROFILE_CACHE_TTL
+        )
+
+    return UserProfileCache(
+        Settings.USER_PROFILE_CACHE_SIZE,
+        Settings.USER_PROFILE_CACHE_TTL,
+        backend,
+    )
+
+
+@lru_cache
+def get_user_uploads_hook(
+    event_dispatcher: UserEventDispatcher = Depends(get_user_event_dispatcher),
+) -> UserUploadsHook:
+    return UserUploadsHook(event_dispatcher, get_user_profile_cache())
 
 
 @lru_cache
 def get_upload_service(
     storage: IStoragePort = Depends(get_storage_adapter),
+    image_pipeline: ImagePipeline = Depends(get_image_pipeline),
+    uploads_hook: UserUploadsHook = Depends(get_user_uploads_hook),
 ) -> IUserUploadService:
-    return UserUploadService(storage)
+    return UserUploadService(
+        storage,
+        image_pipeline,
+        download_mode=Settings.UPLOADS_DOWNLOAD_MODE,
+        presigned_url_ttl=Settings.UPLOADS_PRESIGNED_URL_TTL,
+        presigned_url_cache_size=Settings.UPLOADS_PRESIGNED_URL_CACHE_SIZE,
+        disk_cache=get_upload_disk_cache(),
+        avatar_rendition_sizes=Settings.UPLOADS_AVATAR_RENDITION_SIZES,
+        cover_rendition_sizes=Settings.UPLOADS_COVER_RENDITION_SIZES,
+        rendition_formats=Settings.UPLOADS_RENDITION_FORMATS,
+        spool_dir=Settings.UPLOADS_SPOOL_DIR or None,
+        on_uploads_changed=uploads_hook.on_uploads_changed,
+    )
+
+
+@lru_cache
+def get_upload_gc(
+    storage: IStoragePort = Depends(get_storage_adapter),
+) -> UploadGarbageCollector:
+    return UploadGarbageCollector(
+        storage,
+        batch_size=Settings.UPLOADS_GC_BATCH_SIZE,
+        grace_period=Settings.UPLOADS_GC_GRACE_PERIOD,
+        interval=Settings.UPLOADS_GC_INTERVAL,
+    )
+
+
+@lru_cache
+def get_event_consumer() -> IEventConsumerPort:
+    return AioPikaEventConsumerAdapter(
+        Settings.RABBITMQ_URL,
+        "events",
+        exclusive=True,
+        prefetch_count=Settings.EVENTS_CONSUMER_PREFETCH,
+        max_concurrency=Settings.EVENTS_CONSUMER_CONCURRENCY,
+        codec=get_json_codec(Settings.JSON_CODEC),
+    )
 
 
 @lru_cache
 def get_auth_service() -> IAuthService:
-    return AuthService()
+    return AuthService(
+        get_jwt_keyring(),
+        revision_cache_size=Settings.TOKEN_REVISION_CACHE_SIZE,
+        revision_cache_ttl=Settings.TOKEN_REVISION_CACHE_TTL,
+    )
+
+
+@lru_cache
+def get_password_service() -> IPasswordService:
+    if Settings.PASSWORD_HASH_SCHEME == "scrypt":
+        hasher = ScryptHasher(
+            Settings.PASSWORD_SCRYPT_N,
+            Settings.PASSWORD_SCRYPT_R,
+            Settings.PASSWORD_SCRYPT_P,
+        )
+    else:
+        hasher = BcryptHasher(Settings.PASSWORD_BCRYPT_ROUNDS)
+
+    return PasswordService(
+        hasher,
+        max_workers=Settings.PASSWORD_HASH_WORKERS,
+        max_queue=Settings.PASSWORD_HASH_QUEUE_SIZE,
+        executor=Settings.PASSWORD_HASH_EXECUTOR,
+    )
 
 
 @lru_cache
 def get_user_service(
     auth_service: IAuthService = Depends(get_auth_service),
     upload_service: IUserUploadService = Depends(get_upload_service),
-    event_publisher: IEventPublisherPort = Depends(get_event_publisher),
+    event_dispatcher: UserEventDispatcher = Depends(get_user_event_dispatcher),
+    password_service: IPasswordService = Depends(get_password_service),
 ) -> IUserService:
-    return UserService(auth_service, upload_service, event_publisher)
+    return UserService(
+        auth_service,
+        upload_service,
+        event_dispatcher,
+        password_service,
+        profile_cache=get_user_profile_cache(),
+        batch_window=Settings.USER_LOOKUP_BATCH_WINDOW,
+        batch_size=Settings.USER_LOOKUP_BATCH_SIZE,
+    )
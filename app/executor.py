@@ -0,0 +1,247 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Generic, Hashable, Literal, TypeVar
+import asyncio
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+ExecutorKind = Literal["thread", "process"]
+
+
+class ExecutorOverloadedError(RuntimeError):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Пул воркеров для CPU-нагрузки, которую нельзя выполнять в event loop.
+    Не более `max_workers` задач выполняются одновременно, еще не более
+    `max_queue` ждут своей очереди; все, что сверх этого, отклоняется с
+    ExecutorOverloadedError.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        kind: ExecutorKind = "thread",
+        name: str = "worker",
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.name = name
+
+        self._executor: Executor | None = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix=self.name
+                )
+
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self._in_flight >= self.max_workers + self.max_queue:
+            raise ExecutorOverloadedError()
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class KeyedTaskPool:
+    """
+    Выполняет корутины в event loop, не более `max_concurrency` одновременно.
+    Задачи с одинаковым ключом выполняются строго по очереди в порядке
+    добавления, задачи с разными ключами (или без ключа) - параллельно.
+
+    submit ждет свободного места в пуле, поэтому вызывающий цикл сам
+    притормаживает, когда все места заняты.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tails: dict[Hashable, asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def submit(
+        self, key: Hashable | None, job: Callable[[], Awaitable[None]]
+    ) -> None:
+        await self._semaphore.acquire()
+
+        previous = self._tails.get(key) if key is not None else None
+        task = asyncio.create_task(self._run(key, previous, job))
+        if key is not None:
+            self._tails[key] = task
+
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def join(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(
+        self,
+        key: Hashable | None,
+        previous: asyncio.Task | None,
+        job: Callable[[], Awaitable[None]],
+    ) -> None:
+        try:
+            if previous is not None:
+                # исход предыдущей задачи не важен, важен только порядок
+                await asyncio.wait([previous])
+            await job()
+        finally:
+            self._semaphore.release()
+            if (
+                key is not None
+                and self._tails.get(key) is asyncio.current_task()
+            ):
+                del self._tails[key]
+
+
+class SingleFlight(Generic[K, T]):
+    """
+    Объединяет одновременные вызовы с одинаковым ключом: первый вызов
+    запускает корутину, остальные ждут ее же результат (или исключение),
+    пока она не завершится. Результат не кешируется - следующий вызов
+    после завершения снова выполнит запрос.
+
+    Результат общий для всех ожидающих, поэтому его нельзя изменять.
+    Отмена одного из ожидающих не отменяет общий запрос.
+    """
+
+    def __init__(self):
+        self._calls: dict[K, asyncio.Task[T]] = {}
+
+        self.calls = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: K, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: K, task: asyncio.Task[T]) -> None:
+        del self._calls[key]
+        # если все ожидающие отменены, исключение некому забрать
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": self.in_flight,
+        }
+
+
+class MicroBatcher(Generic[K, T]):
+    """
+    Собирает одиночные запросы по ключу, пришедшие в течение `window`
+    секунд, и выполняет их одним вызовом `load` со списком ключей (не
+    более `max_batch` за раз). `load` возвращает словарь найденных
+    значений, для отсутствующих ключей ожидающие получают None.
+
+    Ошибка загрузки передается всем запросам пачки.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[list[K]], Awaitable[dict[K, T]]],
+        *,
+        window: float,
+        max_batch: int,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+
+        self._load = load
+        self._pending: dict[K, asyncio.Future[T | None]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.keys = 0
+
+    async def load(self, key: K) -> T | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future[T | None]]) -> None:
+        self.batches += 1
+        self.keys += len(batch)
+        try:
+            result = await self._load(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(result.get(key))
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "avg_batch_size": self.keys / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
@@ -1,10 +1,25 @@
 from fastapi.middleware.cors import CORSMiddleware
-from app.dependencies import get_event_publisher
+from app.middleware import UploadSizeLimitMiddleware
 from contextlib import asynccontextmanager
 from app.routers import main_router
+from app.codec import get_json_codec
 from app.config import Settings
 from fastapi import FastAPI
 from app.db import init_db
+import asyncio
+
+from app.dependencies import (
+    get_user_event_dispatcher,
+    get_user_profile_cache,
+    get_upload_disk_cache,
+    get_password_service,
+    get_storage_adapter,
+    get_event_publisher,
+    get_image_pipeline,
+    get_event_consumer,
+    get_auth_service,
+    get_upload_gc,
+)
 
 
 @asynccontextmanager
@@ -12,23 +27,67 @@ async def lifespan(app: FastAPI):
     publisher = get_event_publisher()
     await publisher.connect()
 
+    # у каждого воркера свои кеши ревизий токенов и профилей, поэтому
+    # сбрасываем их по событиям, опубликованным любым из воркеров
+    auth_service = get_auth_service()
+    profile_cache = get_user_profile_cache()
+
+    async def on_user_event(payload: dict) -> None:
+        await auth_service.on_user_event(payload)
+        if profile_cache is not None:
+            await profile_cache.on_user_event(payload)
+
+    consumer = get_event_consumer()
+    await consumer.connect()
+    # события об одном пользователе обрабатываются по порядку
+    consuming_task = await consumer.create_consuming_loop(
+        ["user.banned", "user.deleted", "user.updated"],
+        on_user_event,
+        ordering_key=lambda payload: payload["data"]["id"],
+    )
+
+    # ключи удаленных и замененных загрузок удаляются из S3 в фоне
+    gc_task = asyncio.create_task(
+        get_upload_gc(storage=get_storage_adapter()).run()
+    )
+
+    # события пользователей публикуются из outbox после фиксации транзакций;
+    # lru_cache различает позиционные и именованные аргументы, поэтому
+    # вызываем так же, как Depends, иначе получим второй экземпляр
+    dispatcher_task = asyncio.create_task(
+        get_user_event_dispatcher(publisher=publisher).run()
+    )
+
     yield
 
+    dispatcher_task.cancel()
+    gc_task.cancel()
+    consuming_task.cancel()
+    get_password_service().shutdown()
+    get_image_pipeline().shutdown()
+
+    disk_cache = get_upload_disk_cache()
+    if disk_cache is not None:
+        disk_cache.close()
+
 
 app = FastAPI(
     title="DSTU Diploma | UserService",
     docs_url="/swagger",
     root_path=Settings.ROOT_PATH,
     lifespan=lifespan,
+    default_response_class=get_json_codec(Settings.JSON_CODEC).response_class,
 )
 
 init_db(app)
 
+app.add_middleware(UploadSizeLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After-Id"],
 )
 
 app.include_router(main_router)
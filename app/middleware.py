@@ -0,0 +1,65 @@
+from app.services.uploads.exceptions import TooLargeFileException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.responses import JSONResponse
+from app.config import Settings
+
+# границы, заголовки частей и прочие поля формы поверх самого файла
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Ограничивает тело multipart-запросов размером UPLOAD_MAX_BYTES до того,
+    как его начнет разбирать парсер формы: иначе файл целиком принимается
+    и сохраняется во временный файл, а проверка в сервисе срабатывает уже
+    после этого.
+
+    Запрос с большим Content-Length отклоняется сразу, без чтения тела.
+    Тело без Content-Length (chunked) обрывается, как только принятые байты
+    превысят лимит: исключение поднимается из receive внутри парсера формы,
+    и ответ 413 формирует обычный обработчик HTTPException.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not _is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = Settings.UPLOAD_MAX_BYTES
+        limit = max_bytes + MULTIPART_OVERHEAD
+        content_length = _header(scope, b"content-length") or ""
+        if content_length.isdigit() and int(content_length) > limit:
+            error = TooLargeFileException(max_bytes)
+            response = JSONResponse(
+                {"detail": error.detail}, status_code=error.status_code
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise TooLargeFileException(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_multipart(scope: Scope) -> bool:
+    content_type = _header(scope, b"content-type") or ""
+    return content_type.lower().startswith("multipart/form-data")
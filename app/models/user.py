@@ -1,8 +1,11 @@
+from tortoise import BaseDBAsyncClient, fields
+from tortoise.queryset import QuerySet
+from tortoise.functions import Lower
 from app.acl.roles import UserRoles
 from tortoise.models import Model
-from tortoise import fields
+from pydantic import BaseModel
 from enum import StrEnum
-import bcrypt
+from uuid import uuid4
 
 
 class UserModel(Model):
@@ -23,8 +26,30 @@ class UserModel(Model):
 
     is_banned = fields.BooleanField(default=False)
 
-    def verify_password(self, password: str):
-        return bcrypt.checkpw(password.encode(), self.password_hash.encode())
+    @classmethod
+    def filter_by_email(cls, email: str) -> QuerySet["UserModel"]:
+        """
+        Пользователи с этим адресом без учета регистра. Условие
+        LOWER("email") = ... совпадает с выражением индекса
+        idx_users_email_lower, поэтому поиск идет по индексу.
+        """
+        return cls.annotate(email_lower=Lower("email")).filter(
+            email_lower=email.lower()
+        )
+
+    @classmethod
+    async def find_by_email(
+        cls, email: str, using_db: BaseDBAsyncClient | None = None
+    ) -> "UserModel | None":
+        # раньше адреса при регистрации сравнивались с учетом регистра,
+        # поэтому совпадений может быть несколько: точное важнее
+        users = (
+            await cls.filter_by_email(email).using_db(using_db).order_by("id")
+        )
+        for user in users:
+            if user.email == email:
+                return user
+        return users[0] if users else None
 
     class Meta:
         table: str = "users"
@@ -39,12 +64,24 @@ class UserTokensModel(Model):
         on_delete=fields.CASCADE,
     )
 
-    def verify_revision(self, rev: int):
-        return self.token_revision == rev
-
-    async def increase_revision(self):
-        self.token_revision += 1
-        await self.save(update_fields=("token_revision",))
+    @classmethod
+    async def bump_revision(
+        cls, user_id: int, using_db: BaseDBAsyncClient | None = None
+    ) -> int | None:
+        """
+        Атомарно увеличивает ревизию токенов пользователя одним запросом
+        (UPDATE ... RETURNING), без гонки между конкурентными логинами.
+        Возвращает новую ревизию или None, если записи нет.
+        """
+        db = using_db or cls._choose_db(for_write=True)
+        placeholder = "$1" if db.capabilities.dialect == "postgres" else "?"
+        rows = await db.execute_query_dict(
+            f'UPDATE "{cls._meta.db_table}" '
+            f'SET "token_revision" = "token_revision" + 1 '
+            f'WHERE "user_id" = {placeholder} RETURNING "token_revision"',
+            [user_id],
+        )
+        return rows[0]["token_revision"] if rows else None
 
     class Meta:
         table: str = "usertokens"
@@ -63,10 +100,68 @@ class UserUploadsModel(Model):
         on_delete=fields.CASCADE,
     )
     type = fields.CharEnumField(enum_type=UserUploadsType, max_length=16)
-    s3_key = fields.CharField(max_length=256)
+    s3_key = fields.CharField(max_length=256, db_index=True)
     content_type = fields.CharField(max_length=255)
+    width = fields.IntField(null=True)
+    height = fields.IntField(null=True)
+    renditions = fields.JSONField(default=list)
     uploaded_at = fields.DatetimeField(auto_now_add=True)
 
     class Meta:
         table = "uploads"
         unique_together = (("user", "type"),)
+
+
+class UploadGarbageModel(Model):
+    """
+    Очередь ключей S3, которые больше ни на что не ссылаются и должны быть
+    удалены сборщиком мусора. Ключи попадают сюда в той же транзакции, в
+    которой удаляется или заменяется запись о загрузке.
+    """
+
+    id = fields.IntField(pk=True)
+    s3_key = fields.CharField(max_length=256)
+    queued_at = fields.DatetimeField(auto_now_add=True)
+
+    @classmethod
+    async def enqueue(
+        cls, keys: list[str], using_db: BaseDBAsyncClient | None = None
+    ) -> None:
+        if keys:
+            await cls.bulk_create(
+                [cls(s3_key=key) for key in keys], using_db=using_db
+            )
+
+    class Meta:
+        table = "upload_garbage"
+
+
+class UserEventOutboxModel(Model):
+    """
+    Исходящие события о пользователях (transactional outbox). Событие
+    записывается в той же транзакции, что и изменение пользователя, и
+    публикуется в брокер фоновым диспетчером уже после ее фиксации.
+    """
+
+    id = fields.BigIntField(pk=True)
+    event_id = fields.UUIDField()
+    event_name = fields.CharField(max_length=64)
+    data = fields.JSONField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    @classmethod
+    async def enqueue(
+        cls,
+        event_name: str,
+        data: BaseModel,
+        using_db: BaseDBAsyncClient | None = None,
+    ) -> None:
+        await cls.create(
+            event_id=uuid4(),
+            event_name=event_name,
+            data=data.model_dump(mode="json"),
+            using_db=using_db,
+        )
+
+    class Meta:
+        table = "user_event_outbox"
@@ -1,4 +1,4 @@
-from typing import Awaitable, Callable, Protocol
+from typing import Awaitable, Callable, Hashable, Protocol
 import asyncio
 
 
@@ -8,4 +8,6 @@ class IEventConsumerPort(Protocol):
         self,
         routing_keys: list[str],
         handler: Callable[[dict], Awaitable[None]],
+        ordering_key: Callable[[dict], Hashable] | None = None,
     ) -> asyncio.Task: ...
+    def stats(self) -> dict[str, int]: ...
@@ -1,7 +1,12 @@
+from app.ports.event_publisher.dto import EventPayload
+from typing import Protocol, Sequence
 from pydantic import BaseModel
-from typing import Protocol
+from uuid import UUID
 
 
 class IEventPublisherPort(Protocol):
     async def connect(self) -> None: ...
     async def publish(self, event_name: str, data: BaseModel) -> None: ...
+    async def publish_batch(
+        self, events: Sequence[EventPayload]
+    ) -> list[UUID]: ...
@@ -6,3 +6,10 @@ class EventPublisherNotConnectedException(HTTPException):
         super().__init__(
             status_code=501, detail="Подключение к сервису очередей недоступно!"
         )
+
+
+class EventNotConfirmedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=503, detail="Сервис очередей не подтвердил событие!"
+        )
@@ -1,13 +1,24 @@
-from typing import Protocol
+from typing import AsyncIterator, BinaryIO, Protocol
 import io
 
 
 class IStoragePort(Protocol):
-    def upload_jpeg(self, buf: io.BytesIO, bucket: str, key: str) -> None: ...
-    def upload_file(
-        self, buf: io.BytesIO, bucket: str, key: str, content_type: str
+    async def upload_jpeg(
+        self, buf: io.BytesIO, bucket: str, key: str
     ) -> None: ...
-    def get_object(self, bucket: str, key: str) -> dict: ...
-    def delete_object(self, bucket: str, key: str) -> None: ...
-    def object_exists(self, bucket: str, key: str) -> bool: ...
-    def ensure_bucket(self, bucket: str) -> None: ...
+    async def upload_file(
+        self, buf: BinaryIO, bucket: str, key: str, content_type: str
+    ) -> None: ...
+    async def get_object(
+        self, bucket: str, key: str, range: str | None = None
+    ) -> dict: ...
+    async def delete_object(self, bucket: str, key: str) -> None: ...
+    async def delete_objects(
+        self, bucket: str, keys: list[str]
+    ) -> list[str]: ...
+    def list_objects(self, bucket: str) -> AsyncIterator[dict]: ...
+    async def object_exists(self, bucket: str, key: str) -> bool: ...
+    async def ensure_bucket(self, bucket: str) -> None: ...
+    async def generate_presigned_url(
+        self, bucket: str, key: str, expires_in: int
+    ) -> str: ...
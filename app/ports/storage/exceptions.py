@@ -0,0 +1,9 @@
+from fastapi import HTTPException
+
+
+class InvalidRangeException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=416,
+            detail="Запрошенный диапазон байтов недоступен!",
+        )
@@ -0,0 +1,12 @@
+from typing import Protocol
+
+
+class IUserCachePort(Protocol):
+    """
+    Общий для всех воркеров кеш сериализованных профилей пользователей
+    (например, Redis). Значения - непрозрачные байты, ключи - строки.
+    """
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]: ...
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None: ...
+    async def delete_many(self, keys: list[str]) -> None: ...
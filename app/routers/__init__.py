@@ -4,9 +4,11 @@ from .root import router as root_router
 from .admin import router as admin_router
 from .proxy import router as proxy_router
 from .internal import router as internal_router
+from .well_known import router as well_known_router
 
 main_router = APIRouter()
 main_router.include_router(root_router)
 main_router.include_router(admin_router)
 main_router.include_router(internal_router)
 main_router.include_router(proxy_router)
+main_router.include_router(well_known_router)
@@ -1,12 +1,13 @@
 from app.services.auth.exceptions import RestrictedPermissionException
 from .dto import OptionalAdminFullUserDataDto, SetUserBannedDto
+from app.services.user.dto import FullUserDto, UserFilterDto
 from app.acl.permissions import Permissions, perform_check
+from fastapi import APIRouter, Depends, Query, Response
 from app.services.auth.dto import AccessJWTPayloadDto
 from app.services.user.interface import IUserService
+from fastapi.responses import StreamingResponse
 from app.dependencies import get_user_service
 from app.services.auth import PermittedAction
-from app.services.user.dto import FullUserDto
-from fastapi import APIRouter, Depends
 
 from .exceptions import (
     CantChangeSelfRoleException,
@@ -17,17 +18,83 @@ from .exceptions import (
 router = APIRouter(tags=["Админка"], prefix="/admin")
 
 
+EXPORT_CHUNK_SIZE = 1000
+PAGE_SIZE = 100
+
+
 @router.get(
     "/", response_model=list[FullUserDto], summary="Список пользователей"
 )
 async def get_all(
+    response: Response,
+    filters: UserFilterDto = Depends(),
+    after_id: int | None = Query(None, ge=0),
+    limit: int | None = Query(None, gt=0, le=1000),
     _=Depends(PermittedAction(Permissions.GetUserFullInfo)),
     user_service: IUserService = Depends(get_user_service),
 ):
     """
-    Возвращает список всех зарегистрированных пользователей.
+    Возвращает страницу зарегистрированных пользователей по возрастанию id
+    (по умолчанию 100). Если страница не последняя, в заголовке
+    `X-Next-After-Id` приходит значение `after_id` для запроса следующей.
+
+    Без `after_id` и `limit` возвращает всех пользователей, как раньше;
+    для больших выборок лучше страницы или `/admin/export`.
     """
-    return await user_service.get_info_all(FullUserDto, include_uploads=True)
+    if after_id is None and limit is None:
+        return [
+            user
+            async for users in user_service.iter_info(
+                FullUserDto,
+                filters,
+                chunk_size=EXPORT_CHUNK_SIZE,
+                include_uploads=True,
+            )
+            for user in users
+        ]
+
+    limit = limit or PAGE_SIZE
+    users = await user_service.get_info_page(
+        FullUserDto,
+        filters,
+        after_id=after_id,
+        limit=limit,
+        include_uploads=True,
+    )
+    if len(users) == limit:
+        response.headers["X-Next-After-Id"] = str(users[-1].id)
+
+    return users
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Выгрузка пользователей",
+)
+async def export(
+    filters: UserFilterDto = Depends(),
+    _=Depends(PermittedAction(Permissions.GetUserFullInfo)),
+    user_service: IUserService = Depends(get_user_service),
+):
+    """
+    Выгружает всех подходящих пользователей в формате NDJSON: по одному
+    JSON-объекту на строку. Пользователи читаются из БД частями, поэтому
+    память не зависит от размера таблицы.
+    """
+
+    async def lines():
+        async for users in user_service.iter_info(
+            FullUserDto,
+            filters,
+            chunk_size=EXPORT_CHUNK_SIZE,
+            include_uploads=True,
+        ):
+            yield b"".join(
+                user.model_dump_json().encode() + b"\n" for user in users
+            )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get(
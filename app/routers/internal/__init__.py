@@ -1,15 +1,59 @@
 from app.services.user.exceptions import UserIsBannedException
+from app.services.auth import IAuthService, get_access_token_cache
+from app.services.uploads.interface import IUserUploadService
+from app.services.uploads.gc import UploadGarbageCollector
+from app.services.user.outbox import UserEventDispatcher
+from app.services.auth.dto import AccessJWTPayloadDto
+from app.ports.event_consumer import IEventConsumerPort
 from app.services.user.interface import IUserService
 from app.services.user.dto import ExternalUserDto
-from app.dependencies import get_user_service
 from .auth import get_token_from_header
 from fastapi import APIRouter, Depends
+from app.cache import TTLCache
+
+from app.dependencies import (
+    get_user_event_dispatcher,
+    get_upload_service,
+    get_event_consumer,
+    get_auth_service,
+    get_user_service,
+    get_upload_gc,
+)
 
 router = APIRouter(
     tags=["Internal"], prefix="/internal", include_in_schema=False
 )
 
 
+@router.get("/metrics")
+async def get_metrics(
+    _token: str = Depends(get_token_from_header),
+    auth_service: IAuthService = Depends(get_auth_service),
+    access_token_cache: TTLCache[str, AccessJWTPayloadDto] = Depends(
+        get_access_token_cache
+    ),
+    upload_service: IUserUploadService = Depends(get_upload_service),
+    user_service: IUserService = Depends(get_user_service),
+    upload_gc: UploadGarbageCollector = Depends(get_upload_gc),
+    event_dispatcher: UserEventDispatcher = Depends(get_user_event_dispatcher),
+    event_consumer: IEventConsumerPort = Depends(get_event_consumer),
+):
+    disk_cache = upload_service.disk_cache
+    profile_cache = user_service.profile_cache
+    loader = user_service.loader
+    return {
+        "token_revision_cache": auth_service.revision_cache.stats(),
+        "access_token_cache": access_token_cache.stats(),
+        "user_profile_cache": profile_cache.stats() if profile_cache else None,
+        "user_lookups": user_service.lookups.stats(),
+        "user_lookup_batches": loader.stats() if loader else None,
+        "uploads_disk_cache": disk_cache.stats() if disk_cache else None,
+        "upload_gc": upload_gc.stats(),
+        "user_event_outbox": await event_dispatcher.stats(),
+        "event_consumer": event_consumer.stats(),
+    }
+
+
 @router.get("/{id}")
 async def get_user_by_id(
     id: int,
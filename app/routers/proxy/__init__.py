@@ -1,27 +1,187 @@
 from app.dependencies import get_storage_adapter, get_upload_service
 from app.services.uploads.interface import IUserUploadService
-from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from email.utils import format_datetime, parsedate_to_datetime
+from app.services.uploads.dto import UserUploadDto
+from app.services.uploads.pipeline import RenditionFormat
+from fastapi import APIRouter, Depends, Query, Request
+from datetime import datetime, timezone
 from app.ports.storage import IStoragePort
-from fastapi import APIRouter, Depends
 from urllib.parse import quote
+import re
 
+from fastapi.responses import (
+    RedirectResponse,
+    StreamingResponse,
+    FileResponse,
+    Response,
+)
 
 router = APIRouter(prefix="/download", include_in_schema=False)
 
+# ключи загрузок уникальны (uuid), и по одному ключу содержимое никогда
+# не меняется, поэтому ответы можно кешировать бессрочно
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"^bytes=(\d+-\d*|-\d+)$")
+FILE_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+
+def _last_modified(upload: UserUploadDto) -> datetime:
+    uploaded_at = upload.uploaded_at
+    if uploaded_at.tzinfo is None:
+        uploaded_at = uploaded_at.replace(tzinfo=timezone.utc)
+    return uploaded_at.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _cache_headers(upload: UserUploadDto, key: str) -> dict[str, str]:
+    return {
+        "ETag": f'"{key}"',
+        "Last-Modified": format_datetime(_last_modified(upload), usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+
+def _is_not_modified(request: Request, upload: UserUploadDto, key: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+        return "*" in etags or f'"{key}"' in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _last_modified(upload) <= since
+
+    return False
+
+
+def _select_variant(
+    upload: UserUploadDto,
+    size: int | None,
+    format: RenditionFormat | None,
+    accept: str,
+) -> tuple[str, str]:
+    """
+    Выбирает версию загрузки: наименьшую из тех, что не меньше `size`
+    (или самую большую), в запрошенном формате или в лучшем из
+    поддерживаемых клиентом по `Accept`. Возвращает ключ и формат.
+    Исходный JPEG есть всегда и выбирается по своей ширине; у загрузок,
+    сохраненных до появления размеров, он считается больше любой версии.
+    """
+    variants = {(r.width, r.format): r.s3_key for r in upload.renditions}
+    original_width = upload.width
+    if original_width is None:
+        original_width = max((w for w, _ in variants), default=0) + 1
+    variants[(original_width, "jpeg")] = upload.s3_key
+
+    widths = sorted({width for width, _ in variants})
+    width = widths[-1]
+    if size is not None:
+        width = next((w for w in widths if w >= size), width)
+
+    preferred = [format] if format else []
+    if "image/webp" in accept:
+        preferred.append("webp")
+    preferred.append("jpeg")
+
+    for candidate in preferred:
+        if (width, candidate) in variants:
+            return variants[(width, candidate)], candidate
+
+    # версии нужного размера есть только в неподдерживаемых форматах
+    return upload.s3_key, "jpeg"
+
 
 @router.get("/uploads/{s3_key}")
 async def download_team_submission(
     s3_key: str,
+    request: Request,
+    size: int | None = Query(None, gt=0),
+    format: RenditionFormat | None = None,
     upload_service: IUserUploadService = Depends(get_upload_service),
     storage: IStoragePort = Depends(get_storage_adapter),
 ):
-    upload = await upload_service.get_upload_by_key(s3_key)
-    s3_obj = storage.get_object("avatars", upload.s3_key)
+    disk_cache = None
+    if upload_service.download_mode == "proxy":
+        disk_cache = upload_service.disk_cache
+
+    # записи в кеше хранят и метаданные загрузки, поэтому при попадании
+    # не нужны ни запрос в БД, ни запрос в S3
+    upload = disk_cache.get_upload(s3_key) if disk_cache else None
+    if upload is None:
+        upload = await upload_service.get_upload_by_key(s3_key)
+
+    key, key_format = _select_variant(
+        upload, size, format, request.headers.get("accept", "")
+    )
+
+    if upload_service.download_mode != "proxy":
+        return RedirectResponse(
+            await upload_service.get_download_url(key),
+            status_code=302,
+            headers={
+                "Cache-Control": f"private, max-age={upload_service.presigned_url_ttl // 5}",
+                "Vary": "Accept",
+            },
+        )
+
+    headers = _cache_headers(upload, key)
+    headers["Vary"] = "Accept"
+
+    if _is_not_modified(request, upload, key):
+        return Response(status_code=304, headers=headers)
+
+    filename = f"{upload.type}_{upload.user_id}.{FILE_EXTENSIONS[key_format]}"
+    headers["Content-Disposition"] = f'attachment; filename="{quote(filename)}"'
+
+    # Range и If-Range для файла из кеша обрабатывает сам FileResponse
+    entry = disk_cache.get(key) if disk_cache else None
+    if entry is not None:
+        return FileResponse(
+            entry.path,
+            media_type=entry.content_type,
+            headers=headers,
+            stat_result=entry.stat,
+        )
+
+    range = request.headers.get("range")
+    if range is not None and not RANGE_PATTERN.match(range.strip()):
+        range = None
+
+    s3_obj = await storage.get_object("avatars", key, range)
+
+    if disk_cache is not None and range is None:
+        data = await run_in_threadpool(s3_obj["Body"].read)
+        entry = await disk_cache.put(key, data, s3_obj["ContentType"], upload)
+        if entry is not None:
+            return FileResponse(
+                entry.path,
+                media_type=entry.content_type,
+                headers=headers,
+                stat_result=entry.stat,
+            )
+
+        return Response(data, media_type=s3_obj["ContentType"], headers=headers)
+
+    if "ContentLength" in s3_obj:
+        headers["Content-Length"] = str(s3_obj["ContentLength"])
+
+    status_code = 200
+    if s3_obj.get("ContentRange"):
+        headers["Content-Range"] = s3_obj["ContentRange"]
+        status_code = 206
 
     return StreamingResponse(
         s3_obj["Body"],
+        status_code=status_code,
         media_type=s3_obj["ContentType"],
-        headers={
-            "Content-Disposition": f'attachment; filename="{quote(f"{upload.type}_{upload.user_id}.jpg")}"'
-        },
+        headers=headers,
     )
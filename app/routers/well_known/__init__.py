@@ -0,0 +1,14 @@
+from app.services.auth.keys import JWTKeyring, get_jwt_keyring
+from fastapi import APIRouter, Depends
+
+router = APIRouter(tags=["Ключи"], prefix="/.well-known")
+
+
+@router.get("/jwks.json", summary="Публичные ключи для проверки JWT")
+async def get_jwks(keyring: JWTKeyring = Depends(get_jwt_keyring)):
+    """
+    Возвращает JWK Set с публичными ключами, которыми подписываются токены.
+    Позволяет другим сервисам проверять Access-токены самостоятельно, без запросов к этому сервису.
+    При симметричной подписи (HS256) список ключей пуст.
+    """
+    return keyring.jwks()
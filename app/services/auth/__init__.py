@@ -1,15 +1,19 @@
-from app.models.user import UserModel
-from app.services.user.exceptions import NoSuchUserException
 from .dto import AccessJWTPayloadDto, RefreshJWTPayloadDto, UserJWTDto
 from app.acl.permissions import PermissionAcl, perform_check
-from jose import ExpiredSignatureError, JWTError, jwt
+from .keys import JWTKeyring, get_jwt_keyring
+from jose import ExpiredSignatureError, JWTError
 from datetime import datetime, timedelta
 from app.models import UserTokensModel
+from app.db import get_primary_connection
+from tortoise import BaseDBAsyncClient
 from typing import Annotated, Protocol
 from app.acl.roles import UserRoles
+from app.cache import TTLCache
 from app.config import Settings
+from functools import lru_cache
 from fastapi import Depends
 from os import path
+import time
 
 from fastapi.security import (
     HTTPAuthorizationCredentials,
@@ -30,9 +34,12 @@ OAUTH2_SCHEME = OAuth2PasswordBearer(
     tokenUrl=path.join(Settings.ROOT_PATH, "login")
 )
 SECURITY_SCHEME = HTTPBearer(auto_error=False)
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=20)
 
 
 class IAuthService(Protocol):
+    revision_cache: TTLCache[int, tuple[int, UserRoles]]
+
     async def init_user(self, user_id: int, role: UserRoles) -> UserJWTDto: ...
     async def generate_key_pair(
         self, user_id: int, role: UserRoles
@@ -44,87 +51,153 @@ class IAuthService(Protocol):
     async def validate_refresh_token(
         self, token: str
     ) -> RefreshJWTPayloadDto: ...
+    def invalidate_user(self, user_id: int) -> None: ...
+    async def on_user_event(self, payload: dict) -> None: ...
 
 
 class AuthService(IAuthService):
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        keyring: JWTKeyring,
+        revision_cache_size: int = 0,
+        revision_cache_ttl: float = 0.0,
+    ):
+        self.keyring = keyring
+        # user_id -> (token_revision, role); позволяет отвечать на
+        # /access_token без обращений к БД
+        self.revision_cache: TTLCache[int, tuple[int, UserRoles]] = TTLCache(
+            revision_cache_size, revision_cache_ttl
+        )
 
     async def init_user(self, user_id: int, role: UserRoles) -> UserJWTDto:
-        await UserTokensModel.create(user_id=user_id)
-        access, refresh = await self.generate_key_pair(user_id, role)
-        return UserJWTDto(access_token=access, refresh_token=refresh)
+        tokens = await UserTokensModel.create(user_id=user_id, token_revision=1)
+        self.revision_cache.set(user_id, (tokens.token_revision, role))
+
+        return UserJWTDto(
+            access_token=self._encode_access_token(user_id, role),
+            refresh_token=self._encode_refresh_token(
+                user_id, role, tokens.token_revision
+            ),
+        )
 
     async def generate_key_pair(
         self, user_id: int, role: UserRoles
     ) -> tuple[str, str]:
+        # только что выпущенный рефреш-токен заведомо валиден, а роль уже
+        # известна вызывающему, поэтому access-токен подписывается сразу,
+        # без повторной проверки рефреш-токена
         refresh = await self.generate_refresh_token(user_id, role)
-        access = await self.generate_access_token(refresh)
+        access = self._encode_access_token(user_id, role)
 
         return access, refresh
 
     async def generate_access_token(self, refresh_token: str) -> str:
-        refresh_payload = await self.validate_refresh_token(refresh_token)
-        user = await UserModel.get_or_none(id=refresh_payload.user_id).only(
-            "role"
+        refresh_payload, role = await self._validate_refresh_token(
+            refresh_token
         )
+        return self._encode_access_token(refresh_payload.user_id, role)
 
-        if user is None:
-            raise NoSuchUserException()
+    async def generate_refresh_token(
+        self, user_id: int, role: UserRoles
+    ) -> str:
+        token_revision = await UserTokensModel.bump_revision(user_id)
+        if token_revision is None:
+            raise NoSuchTokenUserException()
 
-        payload = AccessJWTPayloadDto(
-            user_id=refresh_payload.user_id,
-            role=user.role,
-            exp=datetime.now() + timedelta(minutes=20),
-        )
+        self.revision_cache.set(user_id, (token_revision, role))
+        return self._encode_refresh_token(user_id, role, token_revision)
 
-        return jwt.encode(
-            payload.model_dump(),
-            Settings.JWT_SECRET,
+    def _encode_access_token(self, user_id: int, role: UserRoles) -> str:
+        payload = AccessJWTPayloadDto(
+            user_id=user_id,
+            role=role,
+            exp=datetime.now() + ACCESS_TOKEN_LIFETIME,
         )
+        return self.keyring.encode(payload.model_dump())
 
-    async def generate_refresh_token(
-        self, user_id: int, role: UserRoles
+    def _encode_refresh_token(
+        self, user_id: int, role: UserRoles, token_revision: int
     ) -> str:
-        user = await self._get_user_by_id(user_id)
-        await user.increase_revision()
-
         payload = RefreshJWTPayloadDto(
             user_id=user_id,
             role=role,
-            token_revision=user.token_revision,
+            token_revision=token_revision,
             exp=datetime.now() + timedelta(days=7),
         )
-
-        await user.save()
-        return jwt.encode(
-            payload.model_dump(),
-            Settings.JWT_SECRET,
-        )
+        return self.keyring.encode(payload.model_dump())
 
     async def validate_refresh_token(self, token: str) -> RefreshJWTPayloadDto:
+        payload, _ = await self._validate_refresh_token(token)
+        return payload
+
+    async def _validate_refresh_token(
+        self, token: str
+    ) -> tuple[RefreshJWTPayloadDto, UserRoles]:
         try:
-            raw_payload = jwt.decode(token, Settings.JWT_SECRET)
+            raw_payload = self.keyring.decode(token)
             if "token_revision" not in raw_payload:
                 raise NotARefreshTokenException()
             payload = RefreshJWTPayloadDto(**raw_payload)
-            user = await self._get_user_by_id(payload.user_id)
-
-            if not user.verify_revision(payload.token_revision):
-                raise InvalidTokenRevision()
-
-            return payload
         except ExpiredSignatureError:
             raise TokenExpiredException()
         except JWTError:
             raise JWTParseErrorException()
 
-    async def _get_user_by_id(self, user_id: int):
-        user = await UserTokensModel.get_or_none(user_id=user_id)
+        token_revision, role = await self._get_token_state(
+            payload.user_id, payload.token_revision
+        )
+        if token_revision != payload.token_revision:
+            raise InvalidTokenRevision()
+
+        return payload, role
 
-        if user is None:
+    async def _get_token_state(
+        self, user_id: int, token_revision: int
+    ) -> tuple[int, UserRoles]:
+        """
+        Ревизия и роль пользователя. Кешу верим, только если ревизия в нем
+        совпадает с ревизией токена: после входа на другом воркере кеш этого
+        воркера отстает, и новый токен иначе отклонялся бы до истечения TTL.
+
+        Обратное не проверяется: замененный повторным входом токен может
+        приниматься воркером со старой ревизией в кеше не дольше
+        TOKEN_REVISION_CACHE_TTL. Бан, удаление и смена роли сбрасывают кеш
+        всех воркеров событиями сразу.
+
+        При промахе ревизия читается только с основной базы: реплика сразу
+        после бана еще отдает прежнюю ревизию, и отозванный токен снова
+        попал бы в кеш на весь TTL.
+        """
+        state = self.revision_cache.get(user_id)
+        if state is not None and state[0] == token_revision:
+            return state
+
+        state = await self._load_token_state(user_id, get_primary_connection())
+        if state is None:
             raise NoSuchTokenUserException()
-        return user
+
+        self.revision_cache.set(user_id, state)
+        return state
+
+    async def _load_token_state(
+        self, user_id: int, db: BaseDBAsyncClient
+    ) -> tuple[int, UserRoles] | None:
+        row = (
+            await UserTokensModel.filter(user_id=user_id)
+            .using_db(db)
+            .first()
+            .values("token_revision", "user__role")
+        )
+        if row is None:
+            return None
+
+        return row["token_revision"], UserRoles(row["user__role"])
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.revision_cache.invalidate(user_id)
+
+    async def on_user_event(self, payload: dict) -> None:
+        self.invalidate_user(payload["data"]["id"])
 
 
 def get_token_from_header(
@@ -135,17 +208,39 @@ def get_token_from_header(
     return credentials.credentials
 
 
+@lru_cache
+def get_access_token_cache() -> TTLCache[str, AccessJWTPayloadDto]:
+    return TTLCache(
+        Settings.ACCESS_TOKEN_CACHE_SIZE,
+        ACCESS_TOKEN_LIFETIME.total_seconds(),
+    )
+
+
 async def get_user_dto(
     access_token: str = Depends(OAUTH2_SCHEME),
+    keyring: JWTKeyring = Depends(get_jwt_keyring),
+    cache: TTLCache[str, AccessJWTPayloadDto] = Depends(get_access_token_cache),
 ) -> AccessJWTPayloadDto:
+    # один и тот же токен используется все время своей жизни,
+    # поэтому уже проверенный payload хранится до его истечения
+    payload = cache.get(access_token)
+    if payload is not None:
+        return payload
+
     try:
-        raw_payload = jwt.decode(access_token, Settings.JWT_SECRET)
-        return AccessJWTPayloadDto(**raw_payload)
+        raw_payload = keyring.decode(access_token)
+        payload = AccessJWTPayloadDto(**raw_payload)
     except ExpiredSignatureError:
         raise TokenExpiredException()
     except JWTError:
         raise JWTParseErrorException()
 
+    ttl = raw_payload["exp"] - time.time()
+    if ttl > 0:
+        cache.set(access_token, payload, ttl)
+
+    return payload
+
 
 class PermittedAction:
     acl: PermissionAcl
@@ -46,6 +46,14 @@ class InvalidTokenRevision(HTTPException):
         )
 
 
+class UnknownSigningKeyException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=403,
+            detail="Токен подписан неизвестным ключом!",
+        )
+
+
 class NotARefreshTokenException(HTTPException):
     def __init__(self):
         super().__init__(
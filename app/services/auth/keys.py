@@ -0,0 +1,85 @@
+from jose.backends.base import Key
+from app.config import Settings
+from functools import lru_cache
+from jose import jwk, jwt
+from typing import Literal
+from pathlib import Path
+
+from .exceptions import UnknownSigningKeyException
+
+JWTAlgorithm = Literal["HS256", "RS256", "ES256"]
+
+
+class JWTKeyring:
+    """
+    Набор ключей для подписи и проверки JWT. Подписывает активным ключом
+    и проставляет его `kid` в заголовок; проверяет любым ключом из набора,
+    что позволяет ротировать ключи без инвалидации выданных токенов.
+
+    Объекты ключей создаются один раз, поэтому проверка токена не
+    разбирает PEM на каждый запрос.
+    """
+
+    def __init__(
+        self,
+        algorithm: JWTAlgorithm,
+        keys: dict[str, str],
+        active_kid: str,
+    ):
+        if active_kid not in keys:
+            raise RuntimeError(f"Ключ {active_kid} не найден!")
+
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._signing_keys: dict[str, Key] = {
+            kid: jwk.construct(key, algorithm) for kid, key in keys.items()
+        }
+        self._verifying_keys: dict[str, Key] = {
+            kid: key if self.is_symmetric else key.public_key()
+            for kid, key in self._signing_keys.items()
+        }
+
+    @property
+    def is_symmetric(self) -> bool:
+        return self.algorithm.startswith("HS")
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(
+            claims,
+            self._signing_keys[self.active_kid],
+            algorithm=self.algorithm,
+            headers={"kid": self.active_kid},
+        )
+
+    def decode(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid", self.active_kid)
+        key = self._verifying_keys.get(kid)
+        if key is None:
+            raise UnknownSigningKeyException()
+
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        if self.is_symmetric:
+            return {"keys": []}
+
+        return {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self._verifying_keys.items()
+            ]
+        }
+
+
+@lru_cache
+def get_jwt_keyring() -> JWTKeyring:
+    if Settings.JWT_ALGORITHM.startswith("HS"):
+        return JWTKeyring(
+            Settings.JWT_ALGORITHM,
+            {Settings.JWT_ACTIVE_KID: Settings.JWT_SECRET},
+            Settings.JWT_ACTIVE_KID,
+        )
+
+    keys_dir = Path(Settings.JWT_KEYS_DIR)
+    keys = {path.stem: path.read_text() for path in keys_dir.glob("*.pem")}
+    return JWTKeyring(Settings.JWT_ALGORITHM, keys, Settings.JWT_ACTIVE_KID)
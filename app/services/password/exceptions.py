@@ -0,0 +1,9 @@
+from fastapi import HTTPException
+
+
+class PasswordServiceOverloadedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Сервис перегружен, повторите попытку позже!",
+        )
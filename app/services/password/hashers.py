@@ -0,0 +1,110 @@
+from typing import Protocol
+import hashlib
+import base64
+import bcrypt
+import hmac
+import os
+
+
+class IPasswordHasher(Protocol):
+    def identify(self, password_hash: str) -> bool: ...
+    def hash(self, password: str) -> str: ...
+    def verify(self, password: str, password_hash: str) -> bool: ...
+    def needs_rehash(self, password_hash: str) -> bool: ...
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class BcryptHasher(IPasswordHasher):
+    """
+    Формат хеша: `$2b$<rounds>$<salt+hash>` (стандартный для bcrypt).
+    """
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+    def identify(self, password_hash: str) -> bool:
+        return password_hash.startswith(("$2a$", "$2b$", "$2y$"))
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(
+            password.encode(), bcrypt.gensalt(self.rounds)
+        ).decode()
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        try:
+            rounds = int(password_hash.split("$")[2])
+        except (IndexError, ValueError):
+            return True
+        return rounds != self.rounds
+
+
+class ScryptHasher(IPasswordHasher):
+    """
+    Формат хеша: `$scrypt$n=<n>,r=<r>,p=<p>$<salt>$<hash>`.
+    """
+
+    PREFIX = "$scrypt$"
+    SALT_SIZE = 16
+    KEY_SIZE = 32
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int):
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=128 * n * r * 2,
+            dklen=self.KEY_SIZE,
+        )
+
+    def _parse(self, password_hash: str) -> tuple[dict[str, int], bytes, bytes]:
+        _, _, params, salt, key = password_hash.split("$")
+        parsed = {
+            name: int(value)
+            for name, value in (item.split("=") for item in params.split(","))
+        }
+        return parsed, _b64decode(salt), _b64decode(key)
+
+    def identify(self, password_hash: str) -> bool:
+        return password_hash.startswith(self.PREFIX)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.SALT_SIZE)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return (
+            f"{self.PREFIX}n={self.n},r={self.r},p={self.p}"
+            f"${_b64encode(salt)}${_b64encode(key)}"
+        )
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        try:
+            params, salt, key = self._parse(password_hash)
+            derived = self._derive(
+                password, salt, params["n"], params["r"], params["p"]
+            )
+        except (KeyError, ValueError):
+            return False
+        return hmac.compare_digest(derived, key)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        try:
+            params, _, _ = self._parse(password_hash)
+        except (KeyError, ValueError):
+            return True
+        return params != {"n": self.n, "r": self.r, "p": self.p}
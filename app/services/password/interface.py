@@ -0,0 +1,10 @@
+from typing import Protocol
+
+
+class IPasswordService(Protocol):
+    async def hash_password(self, password: str) -> str: ...
+    async def verify_password(
+        self, password: str, password_hash: str
+    ) -> bool: ...
+    def needs_rehash(self, password_hash: str) -> bool: ...
+    def shutdown(self) -> None: ...
@@ -0,0 +1,67 @@
+from app.executor import BoundedExecutor, ExecutorKind, ExecutorOverloadedError
+from .hashers import BcryptHasher, IPasswordHasher, ScryptHasher
+from app.services.password.interface import IPasswordService
+from .exceptions import PasswordServiceOverloadedException
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class PasswordService(IPasswordService):
+    """
+    Выполняет хеширование и проверку паролей в пуле воркеров, чтобы
+    хеширование не блокировало event loop; при переполнении очереди
+    отвечает 503.
+
+    Новые пароли хешируются `hasher`, а проверяются тем хешером, который
+    узнает формат хеша, поэтому старые хеши продолжают работать после смены
+    схемы или ее параметров.
+    """
+
+    def __init__(
+        self,
+        hasher: IPasswordHasher | None = None,
+        *,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        executor: ExecutorKind = "thread",
+    ):
+        self.hasher = hasher or BcryptHasher()
+        self.executor = BoundedExecutor(
+            max_workers, max_queue, executor, name="password"
+        )
+
+        self._known_hashers: list[IPasswordHasher] = [
+            self.hasher,
+            BcryptHasher(),
+            ScryptHasher(),
+        ]
+
+    def _get_hasher(self, password_hash: str) -> IPasswordHasher | None:
+        for hasher in self._known_hashers:
+            if hasher.identify(password_hash):
+                return hasher
+        return None
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        try:
+            return await self.executor.run(func, *args)
+        except ExecutorOverloadedError:
+            raise PasswordServiceOverloadedException()
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run(self.hasher.hash, password)
+
+    async def verify_password(self, password: str, password_hash: str) -> bool:
+        hasher = self._get_hasher(password_hash)
+        if hasher is None:
+            return False
+        return await self._run(hasher.verify, password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return not self.hasher.identify(
+            password_hash
+        ) or self.hasher.needs_rehash(password_hash)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
@@ -0,0 +1,156 @@
+from app.services.uploads.dto import UserUploadDto
+from dataclasses import dataclass
+from collections import OrderedDict
+import tempfile
+import asyncio
+import shutil
+import uuid
+import time
+import os
+
+# файл вытесненной записи удаляется с задержкой: ответы, которые уже
+# начали его отдавать, должны успеть открыть файл
+UNLINK_DELAY = 30.0
+
+
+@dataclass(frozen=True)
+class DiskCacheEntry:
+    path: str
+    content_type: str
+    upload: UserUploadDto
+    stat: os.stat_result
+    expires_at: float
+
+
+class UploadDiskCache:
+    """
+    LRU-кеш содержимого загрузок на локальном диске с ограничением по
+    суммарному размеру. Индекс хранится в памяти процесса, поэтому каждый
+    воркер пишет в собственный подкаталог и очищает его при остановке.
+
+    Записи хранятся по ключам объектов в S3 и сгруппированы по загрузке,
+    которой они принадлежат: основной файл и его уменьшенные копии
+    инвалидируются вместе.
+
+    Инвалидация локальная, поэтому записи живут не дольше `ttl`: удаление
+    загрузки в другом воркере станет видно не позже, чем через `ttl`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="worker-", dir=directory)
+        self._entries: OrderedDict[str, DiskCacheEntry] = OrderedDict()
+        self._groups: dict[str, set[str]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> DiskCacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def get_upload(self, s3_key: str) -> UserUploadDto | None:
+        for key in self._groups.get(s3_key, ()):
+            entry = self._entries[key]
+            if entry.expires_at > time.monotonic():
+                return entry.upload
+
+        return None
+
+    async def put(
+        self, key: str, data: bytes, content_type: str, upload: UserUploadDto
+    ) -> DiskCacheEntry | None:
+        if len(data) > self.max_bytes:
+            return None
+
+        path = os.path.join(self.directory, uuid.uuid4().hex)
+        stat = await asyncio.to_thread(self._write, path, data)
+
+        self._remove(key)
+        entry = DiskCacheEntry(
+            path=path,
+            content_type=content_type,
+            upload=upload,
+            stat=stat,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._entries[key] = entry
+        self._groups.setdefault(upload.s3_key, set()).add(key)
+        self._size += stat.st_size
+
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+        return entry
+
+    def invalidate(self, s3_key: str) -> None:
+        for key in self._groups.pop(s3_key, set()):
+            self._remove(key)
+
+    def close(self) -> None:
+        self._entries.clear()
+        self._groups.clear()
+        self._size = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _write(self, path: str, data: bytes) -> os.stat_result:
+        with open(path, "wb") as file:
+            file.write(data)
+            file.flush()
+            return os.fstat(file.fileno())
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self._size -= entry.stat.st_size
+        group = self._groups.get(entry.upload.s3_key)
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self._groups[entry.upload.s3_key]
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._unlink(entry.path)
+        else:
+            loop.call_later(UNLINK_DELAY, self._unlink, entry.path)
+
+    def _unlink(self, path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
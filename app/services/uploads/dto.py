@@ -4,6 +4,15 @@ from pydantic import BaseModel
 from app.models.user import UserUploadsModel, UserUploadsType
 
 
+class UserUploadRenditionDto(BaseModel):
+    width: int
+    height: int
+    format: str
+    content_type: str
+    s3_key: str
+    url: str | None
+
+
 class UserUploadDto(BaseModel):
     user_id: int
     type: UserUploadsType
@@ -11,9 +20,16 @@ class UserUploadDto(BaseModel):
     content_type: str
     uploaded_at: datetime
     url: str | None
+    width: int | None = None
+    height: int | None = None
+    renditions: list[UserUploadRenditionDto] = []
 
     @staticmethod
-    def from_tortoise(upload: UserUploadsModel, url: str | None = None):
+    def from_tortoise(
+        upload: UserUploadsModel,
+        url: str | None = None,
+        renditions: list[UserUploadRenditionDto] | None = None,
+    ):
         return UserUploadDto(
             user_id=upload.user_id,  # type: ignore[attr-defined]
             type=upload.type,
@@ -21,4 +37,7 @@ class UserUploadDto(BaseModel):
             content_type=upload.content_type,
             uploaded_at=upload.uploaded_at,
             url=url,
+            width=upload.width,
+            height=upload.height,
+            renditions=renditions or [],
         )
@@ -27,6 +27,14 @@ class ImageSaveException(HTTPException):
         )
 
 
+class ImageProcessingOverloadedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Сервис перегружен обработкой изображений, повторите попытку позже!",
+        )
+
+
 class FileRemoveException(HTTPException):
     def __init__(self):
         super().__init__(
@@ -48,6 +56,22 @@ class TooSmallImageException(HTTPException):
         )
 
 
+class TooManyPixelsImageException(HTTPException):
+    def __init__(self, w: int, h: int, max_pixels: int):
+        super().__init__(
+            status_code=400,
+            detail=f"Изображение содержит слишком много пикселей! Максимум: {max_pixels}. У Вас: {w}x{h}!",
+        )
+
+
+class TooLargeFileException(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Файл слишком большой! Максимум: {max_bytes} байт!",
+        )
+
+
 class TooBigImageException(HTTPException):
     def __init__(self, w: int, h: int, max_w: int, max_h: int):
         super().__init__(
@@ -0,0 +1,121 @@
+from app.models.user import UploadGarbageModel, UserUploadsModel
+from app.services.uploads.service import rendition_key
+from app.ports.storage import IStoragePort
+from datetime import timedelta
+from tortoise import timezone
+import asyncio
+
+
+class UploadGarbageCollector:
+    """
+    Удаляет из S3 объекты, поставленные в очередь UploadGarbageModel,
+    пачками через DeleteObjects. Ключ удаляется не раньше, чем через
+    `grace_period` секунд после постановки в очередь, чтобы уже начатые
+    скачивания и загрузки успели завершиться.
+
+    Удаление идемпотентно, поэтому сборщики в нескольких воркерах могут
+    работать одновременно: в худшем случае ключ будет удален дважды.
+
+    Пока S3 не удаляет ключи, паузы между проходами удваиваются (не более
+    чем в 2 ** MAX_BACKOFF_EXPONENT раз), чтобы не повторять один и тот же
+    DeleteObjects без остановки.
+    """
+
+    MAX_BACKOFF_EXPONENT = 4
+
+    def __init__(
+        self,
+        storage: IStoragePort,
+        bucket_name: str = "avatars",
+        *,
+        batch_size: int = 1000,
+        grace_period: float = 60.0,
+        interval: float = 30.0,
+    ):
+        self.storage = storage
+        self.bucket_name = bucket_name
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+        self.interval = interval
+
+        self.collected = 0
+        self.failed = 0
+        self.batches = 0
+
+    async def collect(self) -> int:
+        """Обрабатывает одну пачку, возвращает число удаленных ключей"""
+        threshold = timezone.now() - timedelta(seconds=self.grace_period)
+        rows = (
+            await UploadGarbageModel.filter(queued_at__lte=threshold)
+            .order_by("id")
+            .limit(self.batch_size)
+            .values("id", "s3_key")
+        )
+        if not rows:
+            return 0
+
+        failed = set(
+            await self.storage.delete_objects(
+                self.bucket_name, [row["s3_key"] for row in rows]
+            )
+        )
+        done = [row["id"] for row in rows if row["s3_key"] not in failed]
+        if done:
+            await UploadGarbageModel.filter(id__in=done).delete()
+
+        self.batches += 1
+        self.collected += len(done)
+        self.failed += len(rows) - len(done)
+        return len(done)
+
+    async def run(self) -> None:
+        failures = 0
+        while True:
+            failed = self.failed
+            try:
+                # следующая пачка сразу, только если вся текущая удалена
+                while await self.collect() == self.batch_size:
+                    pass
+                ok = self.failed == failed
+            except Exception as e:
+                print("Error during upload garbage collection: ", e)
+                ok = False
+
+            failures = 0 if ok else failures + 1
+            exponent = min(failures, self.MAX_BACKOFF_EXPONENT)
+            await asyncio.sleep(self.interval * 2**exponent)
+
+    async def find_orphans(self, min_age: float) -> list[str]:
+        """
+        Ищет в бакете объекты, на которые не ссылается ни одна загрузка и
+        которых нет в очереди на удаление. Объекты моложе `min_age` секунд
+        пропускаются: их загрузка может быть еще не зафиксирована в БД.
+        """
+        known: set[str] = set(
+            await UploadGarbageModel.all().values_list("s3_key", flat=True)
+        )
+        for upload in await UserUploadsModel.all().only(
+            "id", "s3_key", "renditions"
+        ):
+            known.add(upload.s3_key)
+            known.update(
+                rendition_key(
+                    upload.s3_key, rendition["width"], rendition["format"]
+                )
+                for rendition in upload.renditions
+            )
+
+        threshold = timezone.now() - timedelta(seconds=min_age)
+        orphans = []
+        async for obj in self.storage.list_objects(self.bucket_name):
+            if obj["Key"] not in known and obj["LastModified"] <= threshold:
+                orphans.append(obj["Key"])
+
+        return orphans
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "collected": self.collected,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
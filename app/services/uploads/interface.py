@@ -1,13 +1,29 @@
 from app.services.uploads.dto import UserUploadDto
 from app.models.user import UserUploadsType
+from app.services.uploads.disk_cache import UploadDiskCache
+from app.services.uploads.pipeline import ImagePipeline
 from app.ports.storage import IStoragePort
+from typing import Awaitable, Callable, Literal, Protocol
+from tortoise import BaseDBAsyncClient
 from fastapi import UploadFile
-from typing import Protocol
+
+DownloadMode = Literal["proxy", "redirect", "presigned"]
+
+# вызывается в транзакции, изменившей загрузки пользователя, и возвращает
+# действие, которое нужно выполнить после ее фиксации
+UploadsChangedHook = Callable[
+    [int, BaseDBAsyncClient], Awaitable[Callable[[], Awaitable[None]]]
+]
 
 
 class IUserUploadService(Protocol):
     storage: IStoragePort
+    image_pipeline: ImagePipeline
     bucket_name: str
+    download_mode: DownloadMode
+    presigned_url_ttl: int
+    disk_cache: UploadDiskCache | None
+    on_uploads_changed: UploadsChangedHook | None
 
     async def upload_avatar(
         self, file: UploadFile, user_id: int
@@ -20,4 +36,11 @@ class IUserUploadService(Protocol):
     ) -> UserUploadDto: ...
     async def get_upload_by_key(self, s3_key: str) -> UserUploadDto: ...
     async def get_uploads(self, user_id: int) -> list[UserUploadDto]: ...
+    async def get_uploads_many(
+        self, user_ids: list[int], using_db: BaseDBAsyncClient | None = None
+    ) -> dict[int, list[UserUploadDto]]: ...
     async def delete(self, user_id: int, type: UserUploadsType) -> None: ...
+    async def delete_all(
+        self, user_id: int, connection: BaseDBAsyncClient
+    ) -> None: ...
+    async def get_download_url(self, s3_key: str) -> str: ...
@@ -0,0 +1,136 @@
+from app.executor import BoundedExecutor, ExecutorKind, ExecutorOverloadedError
+from typing import Iterable, Literal
+from dataclasses import dataclass
+from PIL import Image, ImageFile
+import os
+
+from .exceptions import (
+    ImageProcessingOverloadedException,
+    ImageSaveException,
+)
+
+
+RenditionFormat = Literal["jpeg", "webp"]
+
+RENDITION_CONTENT_TYPES: dict[str, str] = {
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class RenderedImage:
+    width: int
+    height: int
+    format: RenditionFormat
+    path: str
+
+
+def prepare_image(
+    image: ImageFile.ImageFile, size: tuple[int, int]
+) -> Image.Image:
+    # reducing_gap сначала грубо уменьшает изображение целочисленным
+    # reduce(), и только потом применяет дорогой LANCZOS
+    return image.convert("RGB").resize(
+        size, Image.Resampling.LANCZOS, reducing_gap=3.0
+    )
+
+
+def render_renditions(
+    source: str,
+    size: tuple[int, int],
+    widths: Iterable[int],
+    formats: Iterable[RenditionFormat],
+    output_dir: str,
+) -> list[RenderedImage]:
+    """
+    Декодирует изображение из файла `source` один раз и сохраняет в
+    `output_dir` его основную JPEG-версию (первый элемент результата) и
+    уменьшенные копии в заданных форматах. Копии с сохранением пропорций
+    строятся из основной версии, а не из исходника, поэтому каждая из них
+    почти ничего не стоит.
+
+    Исходник и результаты передаются через файлы: процессу API не нужно
+    держать их в памяти и пересылать в пул процессов и обратно.
+    """
+    with Image.open(source) as image:
+        # для JPEG декодер сразу уменьшает изображение в 2/4/8 раз средствами
+        # DCT, не раскодируя его в полном размере; для PNG это no-op
+        image.draft("RGB", size)
+        main = prepare_image(image, size)
+
+    def save(
+        image: Image.Image, width: int, height: int, format: RenditionFormat
+    ) -> RenderedImage:
+        path = os.path.join(output_dir, f"{width}.{format}")
+        image.save(path, format.upper())
+        return RenderedImage(width, height, format, path)
+
+    width, height = size
+    result = [save(main, width, height, "jpeg")]
+    for rendition_width in sorted(set(widths) | {width}, reverse=True):
+        if rendition_width > width:
+            continue
+
+        scaled = main
+        rendition_height = max(1, round(height * rendition_width / width))
+        if rendition_width != width:
+            scaled = main.resize(
+                (rendition_width, rendition_height),
+                Image.Resampling.LANCZOS,
+                reducing_gap=3.0,
+            )
+
+        for format in formats:
+            if rendition_width == width and format == "jpeg":
+                continue
+
+            result.append(
+                save(scaled, rendition_width, rendition_height, format)
+            )
+
+    return result
+
+
+class ImagePipeline:
+    """
+    Декодирует, масштабирует и кодирует изображения в пуле процессов.
+    Готовые файлы пишутся в переданный каталог, а в async-код
+    возвращаются только их пути и размеры. Pillow держит GIL на большей
+    части работы, поэтому по умолчанию используется пул процессов.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 16,
+        executor: ExecutorKind = "process",
+    ):
+        self.executor = BoundedExecutor(
+            max_workers, max_queue, executor, name="images"
+        )
+
+    async def render_renditions(
+        self,
+        source: str,
+        size: tuple[int, int],
+        widths: Iterable[int],
+        formats: Iterable[RenditionFormat],
+        output_dir: str,
+    ) -> list[RenderedImage]:
+        try:
+            return await self.executor.run(
+                render_renditions,
+                source,
+                size,
+                tuple(widths),
+                tuple(formats),
+                output_dir,
+            )
+        except ExecutorOverloadedError:
+            raise ImageProcessingOverloadedException()
+        except Exception:
+            raise ImageSaveException()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
@@ -1,19 +1,44 @@
-from app.models.user import UserUploadsModel, UserUploadsType
-from app.services.uploads.interface import IUserUploadService
-from app.services.uploads.dto import UserUploadDto
+from app.services.uploads.dto import UserUploadDto, UserUploadRenditionDto
+from tortoise.transactions import in_transaction
 from app.ports.storage import IStoragePort
-from PIL import Image, ImageFile
+from app.db import get_read_connection
+from .disk_cache import UploadDiskCache
+from typing import Awaitable, BinaryIO, Callable, Sequence
+from tortoise import BaseDBAsyncClient
+from PIL import Image
 from app.config import Settings
+from app.cache import TTLCache
 from fastapi import UploadFile
 import urllib.parse
+import tempfile
+import asyncio
+import shutil
 import uuid
+import os
 import io
 
+from app.services.uploads.interface import (
+    UploadsChangedHook,
+    IUserUploadService,
+    DownloadMode,
+)
+from app.models.user import (
+    UploadGarbageModel,
+    UserUploadsModel,
+    UserUploadsType,
+)
+from .pipeline import (
+    RENDITION_CONTENT_TYPES,
+    RenditionFormat,
+    RenderedImage,
+    ImagePipeline,
+)
 from .exceptions import (
+    TooManyPixelsImageException,
     TooSmallImageException,
+    TooLargeFileException,
     TooBigImageException,
     WrongMagicsException,
-    FileRemoveException,
     WrongMimeException,
     ImageReadException,
     ImageSaveException,
@@ -21,6 +46,11 @@ from .exceptions import (
 )
 
 
+READ_CHUNK_SIZE = 64 * 1024
+# заголовок с размерами изображения должен уместиться в начало файла
+HEADER_MAX_BYTES = 1024 * 1024
+
+
 def validate_magics(file_bytes: bytes) -> bool:
     png_signature = b"\x89PNG\r\n\x1a\n"
     jpeg_signature = b"\xff\xd8"
@@ -29,56 +59,150 @@ def validate_magics(file_bytes: bytes) -> bool:
     )
 
 
-def prepare_image(
-    image: ImageFile.ImageFile, size: tuple[int, int]
-) -> Image.Image:
-    return image.convert("RGB").resize(size, Image.Resampling.LANCZOS)
+def rendition_key(s3_key: str, width: int, format: str) -> str:
+    return f"{s3_key}-{width}.{format}"
+
+
+async def _do_nothing() -> None:
+    pass
+
+
+def _copy_chunk(source: BinaryIO, destination: BinaryIO, size: int) -> bytes:
+    chunk = source.read(size)
+    destination.write(chunk)
+    return chunk
+
+
+def probe_image_size(file_bytes: bytes) -> tuple[int, int] | None:
+    """
+    Читает размеры изображения из заголовка, не декодируя пиксели.
+    Работает и на начале файла, если заголовок в него уже попал.
+    """
+    try:
+        with Image.open(io.BytesIO(file_bytes)) as image:
+            return image.size
+    except Exception:
+        return None
 
 
 class UserUploadService(IUserUploadService):
-    def __init__(self, storage: IStoragePort):
+    def __init__(
+        self,
+        storage: IStoragePort,
+        image_pipeline: ImagePipeline,
+        *,
+        download_mode: DownloadMode = "proxy",
+        presigned_url_ttl: int = 3600,
+        presigned_url_cache_size: int = 10000,
+        disk_cache: UploadDiskCache | None = None,
+        avatar_rendition_sizes: Sequence[int] = (32, 64, 128),
+        cover_rendition_sizes: Sequence[int] = (512, 1024),
+        rendition_formats: Sequence[RenditionFormat] = ("jpeg", "webp"),
+        spool_dir: str | None = None,
+        on_uploads_changed: UploadsChangedHook | None = None,
+    ):
         self.storage = storage
+        self.image_pipeline = image_pipeline
         self.bucket_name = "avatars"
+        self.download_mode = download_mode
+        self.presigned_url_ttl = presigned_url_ttl
+        self.disk_cache = disk_cache
+        self.rendition_sizes = {
+            UserUploadsType.Avatar: avatar_rendition_sizes,
+            UserUploadsType.Cover: cover_rendition_sizes,
+        }
+        self.rendition_formats = rendition_formats
+        self.spool_dir = spool_dir
+        self.on_uploads_changed = on_uploads_changed
 
-    async def _get_validated_image(
+        # подписанная ссылка переиспользуется, пока до ее истечения
+        # остается не меньше пятой части срока жизни: клиент успеет ей
+        # воспользоваться, а браузер сможет закешировать изображение
+        self.url_cache: TTLCache[str, str] = TTLCache(
+            presigned_url_cache_size,
+            presigned_url_ttl - presigned_url_ttl // 5,
+        )
+
+    async def _spool_validated_image(
         self,
         file: UploadFile,
+        destination: str,
         *,
         size_mins: tuple[int, int] | None = None,
         size_maxs: tuple[int, int] | None = None,
-    ) -> ImageFile.ImageFile:
+    ) -> None:
         if file.content_type not in ["image/jpeg", "image/png"]:
             raise WrongMimeException()
 
-        file_bytes = await file.read()
-        if not validate_magics(file_bytes):
+        # тело запроса целиком ограничивает UploadSizeLimitMiddleware еще
+        # до разбора формы; здесь проверяется размер самого файла
+        if file.size is not None and file.size > Settings.UPLOAD_MAX_BYTES:
+            raise TooLargeFileException(Settings.UPLOAD_MAX_BYTES)
+
+        # файл по частям переписывается на диск с ограничением на размер,
+        # в памяти копится только начало файла, пока по нему не удастся
+        # прочитать размеры, и не больше HEADER_MAX_BYTES. Размеры
+        # проверяются сразу, чтобы отклонить неподходящий файл до того,
+        # как он будет дочитан. Пиксели декодируются уже в пайплайне,
+        # вне event loop
+        head = bytearray()
+        written = 0
+        image_size: tuple[int, int] | None = None
+        with await asyncio.to_thread(open, destination, "wb") as spool:
+            while chunk := await asyncio.to_thread(
+                _copy_chunk, file.file, spool, READ_CHUNK_SIZE
+            ):
+                written += len(chunk)
+                if written > Settings.UPLOAD_MAX_BYTES:
+                    raise TooLargeFileException(Settings.UPLOAD_MAX_BYTES)
+
+                if image_size is not None:
+                    continue
+
+                head += chunk
+                if len(head) == len(chunk) and not validate_magics(head):
+                    raise WrongMagicsException()
+
+                image_size = probe_image_size(head)
+                if image_size:
+                    self._validate_size(image_size, size_mins, size_maxs)
+                elif len(head) >= HEADER_MAX_BYTES:
+                    raise ImageReadException()
+
+        if not validate_magics(head):
             raise WrongMagicsException()
 
-        try:
-            image = Image.open(io.BytesIO(file_bytes))
-        except Exception:
+        if image_size is None:
             raise ImageReadException()
 
+    def _validate_size(
+        self,
+        size: tuple[int, int],
+        size_mins: tuple[int, int] | None,
+        size_maxs: tuple[int, int] | None,
+    ) -> None:
+        width, height = size
+        if width * height > Settings.UPLOAD_MAX_PIXELS:
+            raise TooManyPixelsImageException(
+                width, height, Settings.UPLOAD_MAX_PIXELS
+            )
+
         if size_mins:
-            if image.width < size_mins[0] or image.height < size_mins[1]:
-                raise TooSmallImageException(
-                    image.width, image.height, *size_mins
-                )
+            if width < size_mins[0] or height < size_mins[1]:
+                raise TooSmallImageException(width, height, *size_mins)
 
         if size_maxs:
-            if image.width > size_maxs[0] or image.height > size_maxs[1]:
-                raise TooBigImageException(
-                    image.width, image.height, *size_maxs
-                )
+            if width > size_maxs[0] or height > size_maxs[1]:
+                raise TooBigImageException(width, height, *size_maxs)
 
-        return image
-
-    def _upload_file(self, file: Image.Image, key: str) -> None:
+    async def _upload_file(
+        self, path: str, key: str, content_type: str
+    ) -> None:
         try:
-            image_buf = io.BytesIO()
-            file.save(image_buf, "JPEG")
-            image_buf.seek(0)
-            self.storage.upload_jpeg(image_buf, self.bucket_name, key)
+            with await asyncio.to_thread(open, path, "rb") as file:
+                await self.storage.upload_file(
+                    file, self.bucket_name, key, content_type
+                )
         except Exception as e:
             raise ImageSaveException()
 
@@ -86,44 +210,146 @@ class UserUploadService(IUserUploadService):
         return f"{uuid.uuid4()}-{user_id}"
 
     async def _save_upload(
-        self, user_id: int, file: Image.Image, type: UserUploadsType
+        self, user_id: int, images: list[RenderedImage], type: UserUploadsType
     ):
-
-        upload = await UserUploadsModel.get_or_none(user_id=user_id, type=type)
-        if upload:
-            await self.delete(user_id, type)
+        original, *renditions = images
         key = self._generate_key(user_id)
+        keys = [key] + [
+            rendition_key(key, rendition.width, rendition.format)
+            for rendition in renditions
+        ]
 
-        upload = await UserUploadsModel.create(
-            user_id=user_id,
-            type=type,
-            s3_key=key,
-            content_type="image/jpeg",
+        # сначала файлы загружаются под новым ключом, и только потом в
+        # одной транзакции старая запись заменяется новой, а ключи старой
+        # уходят сборщику мусора. Если что-то упадет, запись о загрузке
+        # останется прежней, а уже загруженные файлы удалит сборщик
+        results = await asyncio.gather(
+            self._upload_file(original.path, key, "image/jpeg"),
+            *[
+                self._upload_file(
+                    rendition.path,
+                    rendition_key(key, rendition.width, rendition.format),
+                    RENDITION_CONTENT_TYPES[rendition.format],
+                )
+                for rendition in renditions
+            ],
+            return_exceptions=True,
         )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            await UploadGarbageModel.enqueue(keys)
+            raise errors[0]
 
-        self._upload_file(file, key)
+        try:
+            async with in_transaction() as connection:
+                previous = await UserUploadsModel.get_or_none(
+                    user_id=user_id, type=type, using_db=connection
+                )
+                if previous:
+                    await previous.delete(using_db=connection)
+                    await UploadGarbageModel.enqueue(
+                        self._object_keys(previous), connection
+                    )
 
-        return UserUploadDto.from_tortoise(
-            upload, self._generate_upload_url(upload.s3_key)
-        )
+                upload = await UserUploadsModel.create(
+                    user_id=user_id,
+                    type=type,
+                    s3_key=key,
+                    content_type="image/jpeg",
+                    width=original.width,
+                    height=original.height,
+                    renditions=[
+                        {
+                            "width": rendition.width,
+                            "height": rendition.height,
+                            "format": rendition.format,
+                        }
+                        for rendition in renditions
+                    ],
+                    using_db=connection,
+                )
+                after_commit = await self._uploads_changed(user_id, connection)
+        except Exception:
+            await UploadGarbageModel.enqueue(keys)
+            raise
+
+        if previous:
+            self._invalidate_caches(previous)
+        await after_commit()
+
+        return await self._to_dto(upload)
+
+    def _object_keys(self, upload: UserUploadsModel) -> list[str]:
+        return [upload.s3_key] + [
+            rendition_key(
+                upload.s3_key, rendition["width"], rendition["format"]
+            )
+            for rendition in upload.renditions
+        ]
+
+    def _invalidate_caches(self, upload: UserUploadsModel) -> None:
+        for key in self._object_keys(upload):
+            self.url_cache.invalidate(key)
+        if self.disk_cache is not None:
+            self.disk_cache.invalidate(upload.s3_key)
+
+    async def _uploads_changed(
+        self, user_id: int, connection: BaseDBAsyncClient
+    ) -> Callable[[], Awaitable[None]]:
+        # загрузки входят в профиль пользователя: о том, как сообщить об
+        # их изменении, знает пользовательская часть
+        if self.on_uploads_changed is None:
+            return _do_nothing
+        return await self.on_uploads_changed(user_id, connection)
+
+    async def _upload_image(
+        self,
+        file: UploadFile,
+        user_id: int,
+        size: tuple[int, int],
+        type: UserUploadsType,
+        **limits: tuple[int, int],
+    ) -> UserUploadDto:
+        # исходник и готовые изображения живут во временном каталоге:
+        # процесс API держит в памяти только ограниченные по размеру
+        # части файлов, а не файлы целиком
+        workdir = await asyncio.to_thread(tempfile.mkdtemp, dir=self.spool_dir)
+        try:
+            source = os.path.join(workdir, "source")
+            await self._spool_validated_image(file, source, **limits)
+            images = await self.image_pipeline.render_renditions(
+                source,
+                size,
+                self.rendition_sizes[type],
+                self.rendition_formats,
+                workdir,
+            )
+            return await self._save_upload(user_id, images, type)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
 
     async def upload_avatar(
         self, file: UploadFile, user_id: int
     ) -> UserUploadDto:
-        image = await self._get_validated_image(file, size_mins=(128, 128))
-        prepared = prepare_image(image, (256, 256))
-        return await self._save_upload(
-            user_id, prepared, UserUploadsType.Avatar
+        return await self._upload_image(
+            file,
+            user_id,
+            (256, 256),
+            UserUploadsType.Avatar,
+            size_mins=(128, 128),
         )
 
     async def upload_cover(
         self, file: UploadFile, user_id: int
     ) -> UserUploadDto:
-        image = await self._get_validated_image(
-            file, size_mins=(1024, 512), size_maxs=(4096, 2048)
+        return await self._upload_image(
+            file,
+            user_id,
+            (2048, 1080),
+            UserUploadsType.Cover,
+            size_mins=(1024, 512),
+            size_maxs=(4096, 2048),
         )
-        prepared = prepare_image(image, (2048, 1080))
-        return await self._save_upload(user_id, prepared, UserUploadsType.Cover)
 
     async def _get_upload(
         self, user_id: int, type: UserUploadsType
@@ -134,46 +360,133 @@ class UserUploadService(IUserUploadService):
 
         return upload
 
-    def _generate_upload_url(self, s3_key: str) -> str:
+    async def _generate_upload_url(
+        self, s3_key: str, width: int | None = None, format: str | None = None
+    ) -> str:
+        if width is not None and format is not None:
+            if self.download_mode == "presigned":
+                return await self.get_download_url(
+                    rendition_key(s3_key, width, format)
+                )
+
+            query = urllib.parse.urlencode({"size": width, "format": format})
+            return urllib.parse.urljoin(
+                Settings.PUBLIC_API_URL, f"download/uploads/{s3_key}?{query}"
+            )
+
+        if self.download_mode == "presigned":
+            return await self.get_download_url(s3_key)
+
         return urllib.parse.urljoin(
             Settings.PUBLIC_API_URL, f"download/uploads/{s3_key}"
         )
 
+    async def _to_dto(self, upload: UserUploadsModel) -> UserUploadDto:
+        renditions = [
+            UserUploadRenditionDto(
+                width=rendition["width"],
+                height=rendition["height"],
+                format=rendition["format"],
+                content_type=RENDITION_CONTENT_TYPES[rendition["format"]],
+                s3_key=rendition_key(
+                    upload.s3_key, rendition["width"], rendition["format"]
+                ),
+                url=await self._generate_upload_url(
+                    upload.s3_key, rendition["width"], rendition["format"]
+                ),
+            )
+            for rendition in upload.renditions
+        ]
+        return UserUploadDto.from_tortoise(
+            upload, await self._generate_upload_url(upload.s3_key), renditions
+        )
+
+    async def get_download_url(self, s3_key: str) -> str:
+        url = self.url_cache.get(s3_key)
+        if url is None:
+            url = await self.storage.generate_presigned_url(
+                self.bucket_name, s3_key, self.presigned_url_ttl
+            )
+            self.url_cache.set(s3_key, url)
+
+        return url
+
     async def get_upload(
         self, user_id: int, type: UserUploadsType
     ) -> UserUploadDto:
         upload = await self._get_upload(user_id, type)
-        return UserUploadDto.from_tortoise(
-            upload, self._generate_upload_url(upload.s3_key)
-        )
+        return await self._to_dto(upload)
 
     async def get_upload_by_key(self, s3_key: str) -> UserUploadDto:
-        upload = await UserUploadsModel.get_or_none(s3_key=s3_key)
+        upload = await UserUploadsModel.get_or_none(
+            s3_key=s3_key, using_db=get_read_connection()
+        )
         if upload is None:
             raise NoFileException()
 
-        return UserUploadDto.from_tortoise(
-            upload, self._generate_upload_url(upload.s3_key)
-        )
+        return await self._to_dto(upload)
 
     async def get_uploads(self, user_id: int) -> list[UserUploadDto]:
         uploads = await UserUploadsModel.filter(user_id=user_id)
-        return [
-            UserUploadDto.from_tortoise(
-                upload, self._generate_upload_url(upload.s3_key)
+        return [await self._to_dto(upload) for upload in uploads]
+
+    async def get_uploads_many(
+        self, user_ids: list[int], using_db: BaseDBAsyncClient | None = None
+    ) -> dict[int, list[UserUploadDto]]:
+        result: dict[int, list[UserUploadDto]] = {
+            user_id: [] for user_id in user_ids
+        }
+        if not user_ids:
+            return result
+
+        uploads = await UserUploadsModel.filter(user_id__in=user_ids).using_db(
+            using_db or get_read_connection()
+        )
+        for upload in uploads:
+            result[upload.user_id].append(  # type: ignore[attr-defined]
+                await self._to_dto(upload)
             )
-            for upload in uploads
-        ]
+
+        return result
+
+    async def delete_all(
+        self, user_id: int, connection: BaseDBAsyncClient
+    ) -> None:
+        """
+        Удаляет все загрузки пользователя в транзакции вызывающего и ставит
+        их ключи в очередь сборщику мусора. Нужен при удалении пользователя:
+        каскадное удаление записей оставило бы файлы в S3 без ссылок.
+        """
+        uploads = await UserUploadsModel.filter(user_id=user_id).using_db(
+            connection
+        )
+        if not uploads:
+            return
+
+        await UserUploadsModel.filter(user_id=user_id).using_db(
+            connection
+        ).delete()
+        await UploadGarbageModel.enqueue(
+            [key for upload in uploads for key in self._object_keys(upload)],
+            connection,
+        )
+        for upload in uploads:
+            self._invalidate_caches(upload)
 
     async def delete(self, user_id: int, type: UserUploadsType) -> None:
-        upload = await self._get_upload(user_id, type)
-        await upload.delete()
-
-        exists = self.storage.object_exists(self.bucket_name, upload.s3_key)
-        if exists:
-            try:
-                self.storage.delete_object(self.bucket_name, upload.s3_key)
-            except Exception:
-                raise FileRemoveException()
-        else:
-            raise NoFileException()
+        # файлы в S3 удаляются не здесь, а сборщиком мусора пачками
+        async with in_transaction() as connection:
+            upload = await UserUploadsModel.get_or_none(
+                user_id=user_id, type=type, using_db=connection
+            )
+            if upload is None:
+                raise NoFileException()
+
+            await upload.delete(using_db=connection)
+            await UploadGarbageModel.enqueue(
+                self._object_keys(upload), connection
+            )
+            after_commit = await self._uploads_changed(user_id, connection)
+
+        self._invalidate_caches(upload)
+        await after_commit()
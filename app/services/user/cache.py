@@ -0,0 +1,115 @@
+from app.ports.user_cache import IUserCachePort
+from app.services.user.dto import FullUserDto
+from app.cache import TTLCache
+
+
+class UserProfileCache:
+    """
+    Read-through кеш профилей пользователей (FullUserDto вместе с
+    загрузками) по id. Первый уровень - LRU в памяти воркера, второй -
+    необязательный общий кеш за IUserCachePort.
+
+    Изменяющий пользователя код сбрасывает оба уровня сразу, а остальные
+    воркеры сбрасывают свой первый уровень по событиям user.* из брокера.
+
+    Чтобы чтение, начатое до изменения, не положило в кеш устаревший
+    профиль уже после сброса, загруженные значения сохраняются только если
+    с момента начала чтения в этом воркере не было ни одной инвалидации.
+    Такие гонки между воркерами в общем кеше ограничены временем жизни.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        backend: IUserCachePort | None = None,
+    ):
+        self.ttl = ttl
+        self.backend = backend
+        self.local: TTLCache[int, FullUserDto] = TTLCache(maxsize, ttl)
+
+        self.backend_hits = 0
+        self.backend_misses = 0
+        self._invalidations = 0
+
+    @property
+    def version(self) -> int:
+        """Снимок счетчика инвалидаций, передается в set_many"""
+        return self._invalidations
+
+    def get_local(self, user_id: int) -> FullUserDto | None:
+        return self.local.get(user_id)
+
+    async def get_many(
+        self, user_ids: list[int], *, check_local: bool = True
+    ) -> dict[int, FullUserDto]:
+        """
+        check_local=False - только общий кеш, если первый уровень уже
+        проверен через get_local
+        """
+        result: dict[int, FullUserDto] = {}
+        missing = []
+        for user_id in user_ids:
+            profile = self.local.get(user_id) if check_local else None
+            if profile is None:
+                missing.append(user_id)
+            else:
+                result[user_id] = profile
+
+        if missing and self.backend is not None:
+            version = self._invalidations
+            found = await self.backend.get_many(
+                [self._key(user_id) for user_id in missing]
+            )
+            self.backend_hits += len(found)
+            self.backend_misses += len(missing) - len(found)
+
+            for user_id in missing:
+                data = found.get(self._key(user_id))
+                if data is None:
+                    continue
+                profile = FullUserDto.model_validate_json(data)
+                result[user_id] = profile
+                if version == self._invalidations:
+                    self.local.set(user_id, profile)
+
+        return result
+
+    async def set_many(self, profiles: list[FullUserDto], version: int) -> None:
+        if version != self._invalidations:
+            return
+
+        for profile in profiles:
+            self.local.set(profile.id, profile)
+
+        if self.backend is not None:
+            await self.backend.set_many(
+                {
+                    self._key(profile.id): profile.model_dump_json().encode()
+                    for profile in profiles
+                },
+                self.ttl,
+            )
+
+    async def invalidate(self, user_id: int) -> None:
+        self.invalidate_local(user_id)
+        if self.backend is not None:
+            await self.backend.delete_many([self._key(user_id)])
+
+    def invalidate_local(self, user_id: int) -> None:
+        self._invalidations += 1
+        self.local.invalidate(user_id)
+
+    async def on_user_event(self, payload: dict) -> None:
+        # общий кеш уже сброшен воркером, который изменил пользователя
+        self.invalidate_local(payload["data"]["id"])
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **self.local.stats(),
+            "backend_hits": self.backend_hits,
+            "backend_misses": self.backend_misses,
+        }
+
+    def _key(self, user_id: int) -> str:
+        return f"user-profile:{user_id}"
@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field, StringConstraints
 from typing import Annotated, Protocol, Type, TypeVar
 from app.services.uploads.dto import UserUploadDto
 from app.models.user import UserModel
+from app.acl.roles import UserRoles
 from datetime import datetime
 
 
@@ -21,10 +22,19 @@ class CreateUserDto(BaseModel):
     )
 
 
+class UserFilterDto(BaseModel):
+    role: UserRoles | None = None
+    is_banned: bool | None = None
+    registered_after: datetime | None = None
+    registered_before: datetime | None = None
+
+
 UserDtoT = TypeVar("UserDtoT", bound="IUserDto")
 
 
 class IUserDto(Protocol):
+    id: int
+
     @classmethod
     def from_tortoise(
         cls: Type[UserDtoT],
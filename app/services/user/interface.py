@@ -1,24 +1,35 @@
+from app.services.password.interface import IPasswordService
 from app.services.uploads.interface import IUserUploadService
-from app.ports.event_publisher import IEventPublisherPort
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.cache import UserProfileCache
+from typing import AsyncIterator, Protocol, Type
 from app.services.auth import IAuthService
+from app.executor import MicroBatcher, SingleFlight
 from app.acl.roles import UserRoles
-from typing import Protocol, Type
 from app.models import UserModel
 
 from .dto import (
     OptionalFullUserDataDto,
     RegisteredUserDto,
     MinimalUserDto,
+    UserFilterDto,
     CreateUserDto,
     FullUserDto,
     UserDtoT,
 )
 
+# ("id", user_id) или ("email", email)
+UserLookupKey = tuple[str, int | str]
+
 
 class IUserService(Protocol):
     auth_service: IAuthService
     upload_service: IUserUploadService
-    event_publisher: IEventPublisherPort
+    event_dispatcher: UserEventDispatcher
+    password_service: IPasswordService
+    profile_cache: UserProfileCache | None
+    lookups: SingleFlight[UserLookupKey, FullUserDto | None]
+    loader: MicroBatcher[int, FullUserDto] | None
 
     async def get_user_from_id(self, user_id: int) -> UserModel: ...
     async def create(
@@ -35,12 +46,23 @@ class IUserService(Protocol):
         *,
         include_uploads: bool = False,
     ) -> list[UserDtoT]: ...
-    async def get_info_all(
+    async def get_info_page(
         self,
         dto_class: Type[UserDtoT],
+        filters: UserFilterDto,
         *,
+        after_id: int | None = None,
+        limit: int = 100,
         include_uploads: bool = False,
     ) -> list[UserDtoT]: ...
+    def iter_info(
+        self,
+        dto_class: Type[UserDtoT],
+        filters: UserFilterDto,
+        *,
+        chunk_size: int = 1000,
+        include_uploads: bool = False,
+    ) -> AsyncIterator[list[UserDtoT]]: ...
     async def update_info(
         self, user_id: int, dto: OptionalFullUserDataDto
     ) -> FullUserDto: ...
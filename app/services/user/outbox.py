@@ -0,0 +1,131 @@
+from app.ports.event_publisher import IEventPublisherPort
+from app.ports.event_publisher.dto import EventPayload
+from tortoise.transactions import in_transaction
+from app.models.user import UserEventOutboxModel
+from tortoise import timezone
+import asyncio
+import time
+
+
+class UserEventDispatcher:
+    """
+    Публикует события из UserEventOutboxModel пачками, дожидаясь
+    подтверждения брокера, и удаляет из outbox только подтвержденные.
+    Неподтвержденные события остаются в таблице и будут отправлены
+    повторно, поэтому доставка "хотя бы один раз": получатели должны
+    быть идемпотентны по event_id.
+
+    Строки пачки блокируются через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому диспетчеры в нескольких воркерах не отправляют одни и те же
+    события одновременно.
+
+    Пока брокер не подтверждает события, паузы между проходами удваиваются
+    (не более чем в 2 ** MAX_BACKOFF_EXPONENT раз), а notify их не
+    прерывает.
+    """
+
+    MAX_BACKOFF_EXPONENT = 4
+
+    def __init__(
+        self,
+        publisher: IEventPublisherPort,
+        *,
+        batch_size: int = 100,
+        interval: float = 5.0,
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.interval = interval
+        self._wakeup = asyncio.Event()
+
+        self.published = 0
+        self.failed = 0
+        self.batches = 0
+        self.publish_seconds = 0.0
+        self.last_delivery_delay = 0.0
+
+    def notify(self) -> None:
+        """Будит диспетчер после фиксации транзакции с новым событием"""
+        self._wakeup.set()
+
+    async def dispatch(self) -> int:
+        """Обрабатывает одну пачку, возвращает число опубликованных событий"""
+        async with in_transaction() as connection:
+            rows = (
+                await UserEventOutboxModel.all()
+                .using_db(connection)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .limit(self.batch_size)
+            )
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            failed = set(
+                await self.publisher.publish_batch(
+                    [
+                        EventPayload(
+                            event_id=row.event_id,
+                            event_name=row.event_name,
+                            data=row.data,
+                        )
+                        for row in rows
+                    ]
+                )
+            )
+            self.publish_seconds += time.perf_counter() - started
+
+            done = [row for row in rows if row.event_id not in failed]
+            if done:
+                await (
+                    UserEventOutboxModel.filter(id__in=[row.id for row in done])
+                    .using_db(connection)
+                    .delete()
+                )
+                self.last_delivery_delay = (
+                    timezone.now() - done[0].created_at
+                ).total_seconds()
+
+        self.batches += 1
+        self.published += len(done)
+        self.failed += len(rows) - len(done)
+        return len(done)
+
+    async def run(self) -> None:
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            failed = self.failed
+            try:
+                # следующая пачка сразу, только если вся текущая отправлена
+                while await self.dispatch() == self.batch_size:
+                    pass
+                ok = self.failed == failed
+            except Exception as e:
+                print("Error during user events dispatch: ", e)
+                ok = False
+
+            if not ok:
+                failures += 1
+                exponent = min(failures, self.MAX_BACKOFF_EXPONENT)
+                await asyncio.sleep(self.interval * 2**exponent)
+                continue
+
+            failures = 0
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except TimeoutError:
+                pass
+
+    async def stats(self) -> dict[str, int | float]:
+        return {
+            "backlog": await UserEventOutboxModel.all().count(),
+            "published": self.published,
+            "failed": self.failed,
+            "batches": self.batches,
+            "publish_latency_avg": (
+                self.publish_seconds / self.batches if self.batches else 0.0
+            ),
+            "last_delivery_delay": self.last_delivery_delay,
+        }
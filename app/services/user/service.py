@@ -1,11 +1,16 @@
+from app.models import UserEventOutboxModel, UserModel, UserTokensModel
+from app.services.user.interface import IUserService, UserLookupKey
+from app.services.password.interface import IPasswordService
 from app.services.uploads.interface import IUserUploadService
-from app.ports.event_publisher import IEventPublisherPort
-from app.services.user.interface import IUserService
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.cache import UserProfileCache
+from tortoise.transactions import in_transaction
 from app.services.auth import IAuthService
 from app.acl.roles import UserRoles
-from app.models import UserModel
-from typing import Type
-import bcrypt
+from app.executor import MicroBatcher, SingleFlight
+from app.db import get_primary_connection, get_read_connection
+from typing import AsyncIterator, Type
+from tortoise import BaseDBAsyncClient
 
 
 from .dto import (
@@ -13,6 +18,7 @@ from .dto import (
     OptionalFullUserDataDto,
     RegisteredUserDto,
     MinimalUserDto,
+    UserFilterDto,
     CreateUserDto,
     FullUserDto,
     UserDtoT,
@@ -26,19 +32,35 @@ from .exceptions import (
 )
 
 
-SALT = bcrypt.gensalt()
-
-
 class UserService(IUserService):
     def __init__(
         self,
         auth_service: IAuthService,
         upload_service: IUserUploadService,
-        event_publisher: IEventPublisherPort,
+        event_dispatcher: UserEventDispatcher,
+        password_service: IPasswordService,
+        profile_cache: UserProfileCache | None = None,
+        batch_window: float = 0.0,
+        batch_size: int = 200,
     ):
         self.auth_service = auth_service
         self.upload_service = upload_service
-        self.event_publisher = event_publisher
+        self.event_dispatcher = event_dispatcher
+        self.password_service = password_service
+        self.profile_cache = profile_cache
+        # одновременные чтения одного пользователя делят один запрос к БД
+        self.lookups: SingleFlight[UserLookupKey, FullUserDto | None] = (
+            SingleFlight()
+        )
+        # одиночные чтения по id, пришедшие в пределах batch_window,
+        # загружаются одним запросом; 0 - без накопления
+        self.loader: MicroBatcher[int, FullUserDto] | None = None
+        if batch_window > 0:
+            self.loader = MicroBatcher(
+                self._load_profiles,
+                window=batch_window,
+                max_batch=batch_size,
+            )
 
     async def get_user_from_id(self, user_id: int) -> UserModel:
         user = await UserModel.get_or_none(id=user_id)
@@ -51,11 +73,11 @@ class UserService(IUserService):
     async def create(
         self, password: str, dto: CreateUserDto
     ) -> RegisteredUserDto:
-        if await UserModel.exists(email=dto.email):
+        if await UserModel.filter_by_email(dto.email).exists():
             raise UserWithThatEmailExistsException()
 
         model = await UserModel.create(
-            password_hash=bcrypt.hashpw(password.encode(), SALT).decode(),
+            password_hash=await self.password_service.hash_password(password),
             **dto.model_dump(),
         )
 
@@ -68,14 +90,22 @@ class UserService(IUserService):
         )
 
     async def login(self, email: str, password: str) -> RegisteredUserDto:
-        user = await UserModel.get_or_none(email=email)
+        user = await UserModel.find_by_email(email)
 
-        if user is None or not user.verify_password(password):
+        if user is None or not await self.password_service.verify_password(
+            password, user.password_hash
+        ):
             raise InvalidLoginCredentialsException()
 
         if user.is_banned:
             raise UserIsBannedException()
 
+        if self.password_service.needs_rehash(user.password_hash):
+            user.password_hash = await self.password_service.hash_password(
+                password
+            )
+            await user.save(update_fields=("password_hash",))
+
         access_token, refresh_token = await self.auth_service.generate_key_pair(
             user.id, user.role
         )
@@ -86,13 +116,112 @@ class UserService(IUserService):
             refresh_token=refresh_token,
         )
 
+    async def _build_dtos(
+        self,
+        users: list[UserModel],
+        dto_class: Type[UserDtoT],
+        include_uploads: bool,
+        connection: BaseDBAsyncClient | None = None,
+    ) -> list[UserDtoT]:
+        if not include_uploads:
+            return [dto_class.from_tortoise(user) for user in users]
+
+        uploads = await self.upload_service.get_uploads_many(
+            [user.id for user in users], using_db=connection
+        )
+        return [
+            dto_class.from_tortoise(user, uploads[user.id]) for user in users
+        ]
+
+    async def _get_profiles(
+        self, user_ids: list[int], *, check_local: bool = True
+    ) -> dict[int, FullUserDto]:
+        """
+        Профили пользователей через кеш: недостающие загружаются из БД одним
+        запросом и кладутся в кеш. Несуществующих пользователей в ответе нет.
+        """
+        profiles: dict[int, FullUserDto] = {}
+        version = 0
+        if self.profile_cache is not None:
+            version = self.profile_cache.version
+            profiles = await self.profile_cache.get_many(
+                user_ids, check_local=check_local
+            )
+
+        missing = [user_id for user_id in user_ids if user_id not in profiles]
+        if missing:
+            # профиль пролежит в кеше до следующего события user.*, а
+            # реплика сразу после бана еще отдает is_banned=False, поэтому
+            # кеш заполняется только с основной базы
+            connection = (
+                get_read_connection()
+                if self.profile_cache is None
+                else get_primary_connection()
+            )
+            users = await UserModel.filter(id__in=missing).using_db(connection)
+            loaded = await self._build_dtos(
+                users, FullUserDto, True, connection
+            )
+            if self.profile_cache is not None:
+                await self.profile_cache.set_many(loaded, version)
+            profiles.update((profile.id, profile) for profile in loaded)
+
+        return profiles
+
+    async def _load_profiles(
+        self, user_ids: list[int]
+    ) -> dict[int, FullUserDto]:
+        # первый уровень кеша для этих id уже проверен в _load_profile
+        return await self._get_profiles(user_ids, check_local=False)
+
+    def _from_profile(
+        self,
+        profile: FullUserDto,
+        dto_class: Type[UserDtoT],
+        include_uploads: bool = True,
+    ) -> UserDtoT:
+        # новая модель из словаря: лишние поля профиля (например, email)
+        # не должны попасть в ответ вместе с закешированным объектом
+        data = profile.model_dump()
+        if not include_uploads:
+            data["uploads"] = None
+        return dto_class.model_validate(data)
+
+    async def _invalidate_profile(self, user_id: int) -> None:
+        if self.profile_cache is not None:
+            await self.profile_cache.invalidate(user_id)
+
+    async def _load_profile(self, user_id: int) -> FullUserDto | None:
+        if self.profile_cache is not None:
+            # попадание в память воркера не ждет накопления пачки
+            profile = self.profile_cache.get_local(user_id)
+            if profile is not None:
+                return profile
+
+        if self.loader is not None:
+            return await self.loader.load(user_id)
+
+        return (await self._load_profiles([user_id])).get(user_id)
+
+    async def _load_profile_by_email(self, email: str) -> FullUserDto | None:
+        user = await UserModel.find_by_email(email, get_read_connection())
+        if user is None:
+            return None
+        return FullUserDto.from_tortoise(
+            user, await self.upload_service.get_uploads(user.id)
+        )
+
     async def get_info(
         self, user_id: int, dto_class: Type[UserDtoT]
     ) -> UserDtoT:
-        user = await self.get_user_from_id(user_id)
-        return dto_class.from_tortoise(
-            user, await self.upload_service.get_uploads(user.id)
+        profile = await self.lookups.do(
+            ("id", user_id), lambda: self._load_profile(user_id)
         )
+        if profile is None:
+            raise NoSuchUserException()
+
+        # общий профиль не отдаем наружу, у каждого вызова своя копия
+        return self._from_profile(profile, dto_class)
 
     async def get_info_many(
         self,
@@ -101,57 +230,111 @@ class UserService(IUserService):
         *,
         include_uploads: bool = False,
     ) -> list[UserDtoT]:
-        users = await UserModel.filter(id__in=user_ids)
-        if include_uploads:
+        if self.profile_cache is not None:
+            user_ids = list(dict.fromkeys(user_ids))
+            profiles = await self._get_profiles(user_ids)
             return [
-                dto_class.from_tortoise(
-                    user, await self.upload_service.get_uploads(user.id)
+                self._from_profile(
+                    profiles[user_id], dto_class, include_uploads
                 )
-                for user in users
+                for user_id in user_ids
+                if user_id in profiles
             ]
-        else:
-            return [dto_class.from_tortoise(user) for user in users]
 
-    async def get_info_all(
+        users = await UserModel.filter(id__in=user_ids).using_db(
+            get_read_connection()
+        )
+        return await self._build_dtos(users, dto_class, include_uploads)
+
+    async def get_info_page(
         self,
         dto_class: Type[UserDtoT],
+        filters: UserFilterDto,
         *,
+        after_id: int | None = None,
+        limit: int = 100,
         include_uploads: bool = False,
     ) -> list[UserDtoT]:
-        users = await UserModel.all()
-        if include_uploads:
-            return [
-                dto_class.from_tortoise(
-                    user, await self.upload_service.get_uploads(user.id)
-                )
-                for user in users
-            ]
-        else:
-            return [dto_class.from_tortoise(user) for user in users]
+        """
+        Страница пользователей по возрастанию id, начиная после `after_id`.
+        Пагинация по ключу не зависит от глубины страницы: каждый запрос -
+        это поиск по первичному ключу и чтение не более `limit` строк.
+        """
+        query = UserModel.all().using_db(get_read_connection())
+        if after_id is not None:
+            query = query.filter(id__gt=after_id)
+        if filters.role is not None:
+            query = query.filter(role=filters.role)
+        if filters.is_banned is not None:
+            query = query.filter(is_banned=filters.is_banned)
+        if filters.registered_after is not None:
+            query = query.filter(register_date__gte=filters.registered_after)
+        if filters.registered_before is not None:
+            query = query.filter(register_date__lt=filters.registered_before)
+
+        users = await query.order_by("id").limit(limit)
+        return await self._build_dtos(users, dto_class, include_uploads)
+
+    async def iter_info(
+        self,
+        dto_class: Type[UserDtoT],
+        filters: UserFilterDto,
+        *,
+        chunk_size: int = 1000,
+        include_uploads: bool = False,
+    ) -> AsyncIterator[list[UserDtoT]]:
+        """Обходит всех подходящих пользователей страницами по chunk_size"""
+        after_id = None
+        while True:
+            page = await self.get_info_page(
+                dto_class,
+                filters,
+                after_id=after_id,
+                limit=chunk_size,
+                include_uploads=include_uploads,
+            )
+            if page:
+                yield page
+            if len(page) < chunk_size:
+                return
+
+            after_id = page[-1].id
 
     async def update_info(
         self, user_id: int, dto: OptionalFullUserDataDto
     ) -> FullUserDto:
         user = await self.get_user_from_id(user_id)
         user.update_from_dict(dto.model_dump(exclude_none=True))
+        async with in_transaction() as connection:
+            await user.save(using_db=connection)
+            await UserEventOutboxModel.enqueue(
+                "user.updated", ExternalUserDto.from_tortoise(user), connection
+            )
 
-        await user.save()
+        await self._invalidate_profile(user_id)
+        self.event_dispatcher.notify()
         return FullUserDto.from_tortoise(
             user, await self.upload_service.get_uploads(user.id)
         )
 
     async def delete(self, user_id: int) -> None:
         user = await self.get_user_from_id(user_id)
-        await user.delete()
+        async with in_transaction() as connection:
+            # записи загрузок удалились бы каскадно, но их файлы в S3
+            # остались бы без ссылок, поэтому ключи уходят сборщику мусора
+            await self.upload_service.delete_all(user_id, connection)
+            await user.delete(using_db=connection)
+            await UserEventOutboxModel.enqueue(
+                "user.deleted", ExternalUserDto.from_tortoise(user), connection
+            )
 
-        await self.event_publisher.publish(
-            "user.deleted",
-            ExternalUserDto.from_tortoise(user),
-        )
+        self.auth_service.invalidate_user(user_id)
+        await self._invalidate_profile(user_id)
+        self.event_dispatcher.notify()
 
     async def set_password(self, user_id: int, password: str) -> FullUserDto:
         user = await self.get_user_from_id(user_id)
-        user.password_hash = bcrypt.hashpw(password.encode(), SALT).decode()
+        user.password_hash = await self.password_service.hash_password(password)
         await user.save()
         return FullUserDto.from_tortoise(
             user, await self.upload_service.get_uploads(user.id)
@@ -160,34 +343,45 @@ class UserService(IUserService):
     async def set_role(self, user_id: int, role: UserRoles) -> FullUserDto:
         user = await self.get_user_from_id(user_id)
         user.role = role
-        await user.save()
+        async with in_transaction() as connection:
+            await user.save(using_db=connection)
+            await UserEventOutboxModel.enqueue(
+                "user.updated", ExternalUserDto.from_tortoise(user), connection
+            )
+
+        self.auth_service.invalidate_user(user_id)
+        await self._invalidate_profile(user_id)
+        self.event_dispatcher.notify()
         return FullUserDto.from_tortoise(
             user, await self.upload_service.get_uploads(user.id)
         )
 
     async def get_by_email(self, email: str) -> MinimalUserDto:
-        user = await UserModel.get_or_none(email=email)
-        if user:
-            return MinimalUserDto.from_tortoise(
-                user, await self.upload_service.get_uploads(user.id)
-            )
+        profile = await self.lookups.do(
+            ("email", email), lambda: self._load_profile_by_email(email)
+        )
+        if profile is None:
+            raise NoUserWithSuchEmailException()
 
-        raise NoUserWithSuchEmailException()
+        return self._from_profile(profile, MinimalUserDto)
 
     async def set_is_banned(self, user_id: int, is_banned: bool) -> FullUserDto:
         user = await self.get_user_from_id(user_id)
         user.is_banned = is_banned
-        await user.save()
-
-        # генерация рефреш токена нужна, чтобы поднять ревизию
-        # все старые токены станут невалидными,
-        # и забаненный пользователь не сможет даже зайти в аккаунт
-        await self.auth_service.generate_refresh_token(user.id, user.role)
+        async with in_transaction() as connection:
+            await user.save(using_db=connection)
+            # ревизия поднимается в той же транзакции, что и событие:
+            # все старые токены станут невалидными, и забаненный
+            # пользователь не сможет даже зайти в аккаунт. Иначе событие
+            # могло бы уйти раньше, и воркеры закешировали бы старую ревизию
+            await UserTokensModel.bump_revision(user_id, connection)
+            await UserEventOutboxModel.enqueue(
+                "user.banned", ExternalUserDto.from_tortoise(user), connection
+            )
 
-        await self.event_publisher.publish(
-            "user.banned",
-            ExternalUserDto.from_tortoise(user),
-        )
+        self.auth_service.invalidate_user(user_id)
+        await self._invalidate_profile(user_id)
+        self.event_dispatcher.notify()
 
         return FullUserDto.from_tortoise(
             user, await self.upload_service.get_uploads(user.id)
@@ -0,0 +1,38 @@
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.cache import UserProfileCache
+from app.models import UserEventOutboxModel, UserModel
+from typing import Awaitable, Callable
+from tortoise import BaseDBAsyncClient
+from .dto import ExternalUserDto
+
+
+class UserUploadsHook:
+    """
+    Реакция пользовательской части на изменение загрузок. Загрузки входят в
+    профиль, поэтому в транзакции сервиса загрузок пишется событие
+    user.updated, а после ее фиксации сбрасывается кеш профиля и будится
+    диспетчер outbox.
+    """
+
+    def __init__(
+        self,
+        event_dispatcher: UserEventDispatcher,
+        profile_cache: UserProfileCache | None = None,
+    ):
+        self.event_dispatcher = event_dispatcher
+        self.profile_cache = profile_cache
+
+    async def on_uploads_changed(
+        self, user_id: int, connection: BaseDBAsyncClient
+    ) -> Callable[[], Awaitable[None]]:
+        user = await UserModel.get(id=user_id, using_db=connection)
+        await UserEventOutboxModel.enqueue(
+            "user.updated", ExternalUserDto.from_tortoise(user), connection
+        )
+
+        async def after_commit() -> None:
+            if self.profile_cache is not None:
+                await self.profile_cache.invalidate(user_id)
+            self.event_dispatcher.notify()
+
+        return after_commit
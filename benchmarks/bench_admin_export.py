@@ -0,0 +1,138 @@
+"""
+Пиковая память при выгрузке всех пользователей: прежний /admin/, который
+загружает таблицу целиком и строит список DTO, против потоковой выгрузки
+/admin/export в NDJSON, читающей таблицу частями. Память считается через
+tracemalloc.
+"""
+
+from benchmarks.common import init_db
+from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from app.services.uploads.service import UserUploadService
+from app.services.password.service import PasswordService
+from app.services.user.outbox import UserEventDispatcher
+from app.services.uploads.pipeline import ImagePipeline
+from app.services.user.dto import CreateUserDto, FullUserDto
+from tests.mocks.adapters.storage import MockS3Storage
+from app.services.auth.keys import get_jwt_keyring
+from app.services.user.service import UserService
+from app.dependencies import get_user_service
+from app.services.auth import AuthService
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.acl.roles import UserRoles
+from app.models import UserModel
+from tortoise import Tortoise
+from app.main import app
+import tracemalloc
+import asyncio
+import time
+
+USERS = 50000
+
+
+async def measure(name: str, func) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<28} body={size / 2**20:6.1f}MB "
+        f"peak={peak / 2**20:7.1f}MB time={elapsed:6.2f}s"
+    )
+
+
+async def main():
+    await init_db()
+    password_service = PasswordService()
+    service = UserService(
+        AuthService(get_jwt_keyring()),
+        UserUploadService(MockS3Storage(), ImagePipeline(executor="thread")),
+        UserEventDispatcher(MockEventPublisherAdapter()),
+        password_service,
+    )
+    app.dependency_overrides[get_user_service] = lambda: service
+
+    admin = await service.create(
+        "benchmark-password",
+        CreateUserDto(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="Admin",
+            patronymic="Admin",
+            password="benchmark-password",
+        ),
+    )
+    await service.set_role(admin.user.id, UserRoles.Admin)
+    token = service.auth_service._encode_access_token(
+        admin.user.id, UserRoles.Admin
+    )
+    await UserModel.bulk_create(
+        [
+            UserModel(
+                email=f"user{i}@example.com",
+                password_hash="-",
+                first_name="Иван",
+                last_name="Иванов",
+                patronymic="Иванович",
+                about="Пользователь для бенчмарка",
+            )
+            for i in range(USERS)
+        ],
+        batch_size=1000,
+    )
+
+    async def load_all() -> int:
+        # то, что делал /admin/ до пагинации
+        users = await UserModel.all()
+        dtos = await service._build_dtos(users, FullUserDto, True)
+        content = TypeAdapter(list[FullUserDto]).dump_python(dtos, mode="json")
+        return len(JSONResponse(content).body)
+
+    async def export() -> int:
+        # ASGI-приложение вызывается напрямую: тестовый транспорт httpx
+        # накапливает тело ответа целиком и исказил бы замер
+        size = 0
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if requested:
+                # клиент не отключается, пока ответ не отдан целиком
+                await asyncio.Future()
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/admin/export",
+            "raw_path": b"/admin/export",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "server": ("localhost", 8000),
+            "client": ("127.0.0.1", 1234),
+        }
+        await app(scope, receive, send)
+        return size
+
+    await measure("load all (old /admin/)", load_all)
+    await measure("stream /admin/export", export)
+
+    password_service.shutdown()
+    await Tortoise._drop_databases()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Задержка /info/{id} во время конкурентных загрузок обложек /cover.
+
+Сравнивает обработку изображений прямо в event loop с ImagePipeline,
+который выносит Pillow в пул процессов.
+"""
+
+from benchmarks.common import init_db, make_client, report, timed
+from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from app.services.password.service import PasswordService
+from app.services.uploads.service import UserUploadService
+from tests.mocks.adapters.storage import MockS3Storage
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.service import UserService
+from app.services.user.dto import CreateUserDto
+from app.services.auth.keys import get_jwt_keyring
+from app.services.auth import AuthService
+from tortoise import Tortoise
+from app.main import app
+from PIL import Image
+import asyncio
+import io
+
+from app.dependencies import get_upload_service, get_user_service
+from app.services.uploads.pipeline import (
+    RenderedImage,
+    ImagePipeline,
+    render_renditions,
+)
+
+UPLOADS = 16
+INFO_REQUESTS = 200
+
+
+class InlineImagePipeline(ImagePipeline):
+    """Обрабатывает изображения прямо в event loop, минуя пул процессов"""
+
+    async def render_renditions(
+        self, source, size, widths, formats, output_dir
+    ) -> list[RenderedImage]:
+        return render_renditions(source, size, widths, formats, output_dir)
+
+
+def make_cover() -> bytes:
+    buf = io.BytesIO()
+    Image.effect_noise((4096, 2048), 64).convert("RGB").save(buf, "PNG")
+    return buf.getvalue()
+
+
+async def run(name: str, pipeline: ImagePipeline, cover: bytes) -> None:
+    await init_db()
+    upload_service = UserUploadService(MockS3Storage(), pipeline)
+    password_service = PasswordService()
+    service = UserService(
+        AuthService(get_jwt_keyring()),
+        upload_service,
+        UserEventDispatcher(MockEventPublisherAdapter()),
+        password_service,
+    )
+    app.dependency_overrides[get_user_service] = lambda: service
+    app.dependency_overrides[get_upload_service] = lambda: upload_service
+
+    user = await service.create(
+        "benchmark-password",
+        CreateUserDto(
+            email="bench@example.com",
+            first_name="Bench",
+            last_name="Bench",
+            patronymic="Bench",
+            password="benchmark-password",
+        ),
+    )
+    headers = {"Authorization": f"Bearer {user.access_token}"}
+
+    info_samples: list[float] = []
+    upload_samples: list[float] = []
+
+    async with make_client() as client:
+
+        async def upload():
+            await timed(
+                lambda: client.put(
+                    "/cover",
+                    files={"file": ("cover.png", cover, "image/png")},
+                    headers=headers,
+                ),
+                upload_samples,
+            )
+
+        async def info():
+            for _ in range(INFO_REQUESTS):
+                await timed(
+                    lambda: client.get(
+                        f"/info/{user.user.id}", headers=headers
+                    ),
+                    info_samples,
+                )
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(info(), *(upload() for _ in range(UPLOADS)))
+
+    report(f"{name}: /info/{{id}}", info_samples)
+    report(f"{name}: /cover", upload_samples)
+
+    pipeline.shutdown()
+    password_service.shutdown()
+    await Tortoise._drop_databases()
+
+
+async def main():
+    cover = make_cover()
+    await run("inline", InlineImagePipeline(), cover)
+    await run("process pool", ImagePipeline(max_workers=2, max_queue=64), cover)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Пропускная способность потребителя событий на брокере в памяти из
+tests/mocks: прежняя обработка по одному сообщению (prefetch 1, один
+обработчик) против параллельной с упорядочиванием по пользователю.
+Обработчик имитирует один round-trip к внешнему ресурсу.
+"""
+
+import benchmarks.common  # noqa: F401
+
+from tests.mocks.adapters.event_consumer import MockEventConsumerAdapter
+import asyncio
+import random
+import time
+
+MESSAGES = 2000
+USERS = 200
+HANDLER_LATENCY = 0.002
+
+
+async def measure(name: str, prefetch_count: int, max_concurrency: int):
+    consumer = MockEventConsumerAdapter(
+        prefetch_count=prefetch_count, max_concurrency=max_concurrency
+    )
+    seen: dict[int, list[int]] = {}
+
+    async def handler(payload: dict) -> None:
+        await asyncio.sleep(HANDLER_LATENCY)
+        seen.setdefault(payload["data"]["id"], []).append(payload["seq"])
+
+    task = await consumer.create_consuming_loop(
+        ["user.banned"],
+        handler,
+        ordering_key=lambda payload: payload["data"]["id"],
+    )
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for seq in range(MESSAGES):
+        consumer.deliver(
+            "user.banned", {"seq": seq, "data": {"id": rng.randrange(USERS)}}
+        )
+    await consumer.drain()
+    elapsed = time.perf_counter() - started
+    task.cancel()
+
+    in_order = all(seqs == sorted(seqs) for seqs in seen.values())
+    print(
+        f"{name:<28} {MESSAGES / elapsed:10.0f} msg/s "
+        f"time={elapsed:6.2f}s per-user order kept={in_order}"
+    )
+
+
+async def main():
+    await measure("sequential (prefetch=1)", 1, 1)
+    for concurrency in (4, 16, 64):
+        await measure(f"prefetch=64 concurrency={concurrency}", 64, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""
+Стоимость сериализации JSON: обход /admin/ страницами по 1000 на
+10 000 пользователей с JSONResponse (json из stdlib) против ORJSONResponse,
+отдельно время рендеринга тела ответа, и пропускная способность
+кодирования и разбора событий для брокера через оба кодека.
+"""
+
+from benchmarks.common import init_db, report, timed
+from app.services.user.dto import CreateUserDto, FullUserDto, UserFilterDto
+from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from app.services.uploads.service import UserUploadService
+from app.services.password.service import PasswordService
+from app.services.user.outbox import UserEventDispatcher
+from app.services.uploads.pipeline import ImagePipeline
+from app.ports.event_publisher.dto import EventPayload
+from tests.mocks.adapters.storage import MockS3Storage
+from app.codec import JsonCodecName, get_json_codec
+from app.services.auth.keys import get_jwt_keyring
+from app.services.user.service import UserService
+from app.dependencies import get_user_service
+from httpx import ASGITransport, AsyncClient
+from app.services.auth import AuthService
+from app.routers import main_router
+from app.acl.roles import UserRoles
+from app.models import UserModel
+from pydantic import TypeAdapter
+from tortoise import Tortoise
+from fastapi import FastAPI
+import asyncio
+import uuid
+import time
+
+USERS = 10000
+REQUESTS = 10
+PAGE_SIZE = 1000
+EVENTS = 100000
+
+
+async def measure_admin(
+    name: JsonCodecName, service: UserService, token: str
+) -> None:
+    app = FastAPI(default_response_class=get_json_codec(name).response_class)
+    app.include_router(main_router)
+    app.dependency_overrides[get_user_service] = lambda: service
+
+    samples: list[float] = []
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://x") as client:
+
+        async def list_all() -> int:
+            total = 0
+            params = {"limit": PAGE_SIZE}
+            while True:
+                response = await client.get(
+                    "/admin/",
+                    params=params,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                total += len(response.json())
+                if "X-Next-After-Id" not in response.headers:
+                    return total
+                params["after_id"] = response.headers["X-Next-After-Id"]
+
+        for _ in range(REQUESTS):
+            assert await timed(list_all, samples) == USERS + 1
+
+    report(f"{name}: GET /admin/ ({USERS} users)", samples)
+
+    dtos = await service.get_info_page(
+        FullUserDto, UserFilterDto(), limit=USERS + 1, include_uploads=True
+    )
+    content = TypeAdapter(list[FullUserDto]).dump_python(dtos, mode="json")
+    response_class = get_json_codec(name).response_class
+    render_samples: list[float] = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        response_class(content)
+        render_samples.append((time.perf_counter() - started) * 1000)
+    report(f"{name}: render body only", render_samples)
+
+
+def measure_events(name: JsonCodecName, data: dict) -> None:
+    codec = get_json_codec(name)
+    events = [
+        EventPayload(event_id=uuid.uuid4(), event_name="user.banned", data=data)
+        for _ in range(EVENTS)
+    ]
+
+    started = time.perf_counter()
+    bodies = [codec.encode_event(event) for event in events]
+    encode = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for body in bodies:
+        codec.decode(body)
+    decode = time.perf_counter() - started
+
+    print(
+        f"{name:<8} events: encode {EVENTS / encode:10.0f}/s "
+        f"decode {EVENTS / decode:10.0f}/s"
+    )
+
+
+async def main():
+    await init_db()
+    password_service = PasswordService()
+    service = UserService(
+        AuthService(get_jwt_keyring()),
+        UserUploadService(MockS3Storage(), ImagePipeline(executor="thread")),
+        UserEventDispatcher(MockEventPublisherAdapter()),
+        password_service,
+    )
+    admin = await service.create(
+        "benchmark-password",
+        CreateUserDto(
+            email="admin@example.com",
+            first_name="Админ",
+            last_name="Админов",
+            patronymic="Админович",
+            password="benchmark-password",
+        ),
+    )
+    await service.set_role(admin.user.id, UserRoles.Admin)
+    token = service.auth_service._encode_access_token(
+        admin.user.id, UserRoles.Admin
+    )
+    await UserModel.bulk_create(
+        [
+            UserModel(
+                email=f"user{i}@example.com",
+                password_hash="-",
+                first_name="Иван",
+                last_name="Иванов",
+                patronymic="Иванович",
+                about="Пользователь для бенчмарка",
+            )
+            for i in range(USERS)
+        ],
+        batch_size=1000,
+    )
+
+    for name in ("json", "orjson"):
+        await measure_admin(name, service, token)
+
+    data = FullUserDto.from_tortoise(await UserModel.first()).model_dump(
+        mode="json"
+    )
+    for name in ("json", "orjson"):
+        measure_events(name, data)
+
+    password_service.shutdown()
+    await Tortoise._drop_databases()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
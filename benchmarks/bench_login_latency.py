@@ -0,0 +1,99 @@
+"""
+Задержка /info/{id} во время конкурентной нагрузки на /login.
+
+Сравнивает хеширование паролей прямо в event loop с PasswordService,
+который выносит bcrypt в пул воркеров.
+"""
+
+from benchmarks.common import init_db, make_client, report, timed
+from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from app.services.password.service import PasswordService
+from app.services.uploads.service import UserUploadService
+from tests.mocks.adapters.storage import MockS3Storage
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.service import UserService
+from app.services.uploads.pipeline import ImagePipeline
+from app.services.user.dto import CreateUserDto
+from app.services.auth.keys import get_jwt_keyring
+from app.services.auth import AuthService
+from tortoise import Tortoise
+from app.main import app
+import asyncio
+
+from app.dependencies import get_user_service
+
+LOGINS = 64
+INFO_REQUESTS = 200
+PASSWORD = "benchmark-password"
+
+
+class InlinePasswordService(PasswordService):
+    async def hash_password(self, password: str) -> str:
+        return self.hasher.hash(password)
+
+    async def verify_password(self, password: str, password_hash: str) -> bool:
+        return self.hasher.verify(password, password_hash)
+
+
+async def run(name: str, password_service: PasswordService) -> None:
+    await init_db()
+    service = UserService(
+        AuthService(get_jwt_keyring()),
+        UserUploadService(MockS3Storage(), ImagePipeline(executor="thread")),
+        UserEventDispatcher(MockEventPublisherAdapter()),
+        password_service,
+    )
+    app.dependency_overrides[get_user_service] = lambda: service
+
+    user = await service.create(
+        PASSWORD,
+        CreateUserDto(
+            email="bench@example.com",
+            first_name="Bench",
+            last_name="Bench",
+            patronymic="Bench",
+            password=PASSWORD,
+        ),
+    )
+    headers = {"Authorization": f"Bearer {user.access_token}"}
+
+    info_samples: list[float] = []
+    login_samples: list[float] = []
+
+    async with make_client() as client:
+
+        async def login():
+            await timed(
+                lambda: client.post(
+                    "/login",
+                    data={"username": user.user.email, "password": PASSWORD},
+                ),
+                login_samples,
+            )
+
+        async def info():
+            for _ in range(INFO_REQUESTS):
+                await timed(
+                    lambda: client.get(
+                        f"/info/{user.user.id}", headers=headers
+                    ),
+                    info_samples,
+                )
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(info(), *(login() for _ in range(LOGINS)))
+
+    report(f"{name}: /info/{{id}}", info_samples)
+    report(f"{name}: /login", login_samples)
+
+    password_service.shutdown()
+    await Tortoise._drop_databases()
+
+
+async def main():
+    await run("inline", InlinePasswordService())
+    await run("thread pool", PasswordService(max_workers=4, max_queue=1024))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Стоимость проверки Access-токена в get_user_dto: jwt.decode (python-jose)
+плюс сборка AccessJWTPayloadDto против попадания в кеш токенов.
+"""
+
+import benchmarks.common  # noqa: F401
+
+from app.services.auth import ACCESS_TOKEN_LIFETIME, get_user_dto
+from app.services.auth.dto import AccessJWTPayloadDto
+from app.services.auth.keys import JWTKeyring
+from tests.core.test_keyring import generate_rsa_pem
+from datetime import datetime, timezone
+from app.acl.roles import UserRoles
+from app.cache import TTLCache
+import asyncio
+import time
+
+ITERATIONS = 20000
+
+
+async def measure(name: str, keyring: JWTKeyring, cache_size: int) -> None:
+    cache: TTLCache[str, AccessJWTPayloadDto] = TTLCache(
+        cache_size, ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+    token = keyring.encode(
+        AccessJWTPayloadDto(
+            user_id=1,
+            role=UserRoles.User,
+            exp=datetime.now(timezone.utc) + ACCESS_TOKEN_LIFETIME,
+        ).model_dump()
+    )
+
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await get_user_dto(token, keyring, cache)
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<24} {elapsed / ITERATIONS * 1e6:10.2f} us/request")
+
+
+async def main():
+    keyrings = {
+        "HS256": JWTKeyring("HS256", {"default": "secret"}, "default"),
+        "RS256": JWTKeyring("RS256", {"k1": generate_rsa_pem()}, "k1"),
+    }
+    for alg, keyring in keyrings.items():
+        await measure(f"{alg} decode", keyring, cache_size=0)
+        await measure(f"{alg} cached", keyring, cache_size=1000)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,217 @@
+"""
+Пиковая память процесса API во время конкурентных загрузок обложек.
+
+Сравнивает прежний путь загрузки, где исходник и готовые изображения
+целиком лежат в памяти процесса API, пересылаются в пул процессов и
+обратно через pickle и копируются upload_fileobj, с текущим: файлы
+проходят через временный каталог, а в S3 уходят ограниченными частями.
+S3 заменен обработчиком before-send: запросы собираются и подписываются
+как обычно, тело вычитывается, но в сеть не уходит.
+
+Каждый вариант запускается в отдельном процессе, чтобы аллокации одного
+не влияли на RSS другого.
+"""
+
+from benchmarks.common import init_db
+from app.services.uploads.service import READ_CHUNK_SIZE, UserUploadService
+from app.services.uploads.pipeline import (
+    RenditionFormat,
+    ImagePipeline,
+    prepare_image,
+)
+from starlette.datastructures import Headers, UploadFile
+from app.adapters.storage import S3StorageAdapter
+from botocore.awsrequest import AWSResponse
+from urllib.parse import parse_qs, urlparse
+from tortoise import Tortoise
+from app.models import UserModel
+from PIL import Image
+import multiprocessing
+import threading
+import asyncio
+import time
+import io
+import os
+
+UPLOADS = 8
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class LegacyS3StorageAdapter(S3StorageAdapter):
+    async def upload_file(
+        self, buf: io.BytesIO, bucket: str, key: str, content_type: str
+    ) -> None:
+        client = self._S3StorageAdapter__client  # type: ignore[attr-defined]
+        await self._run(
+            client.upload_fileobj,
+            buf,
+            bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+        )
+
+
+def render_in_memory(
+    data: bytes,
+    size: tuple[int, int],
+    widths: tuple[int, ...],
+    formats: tuple[RenditionFormat, ...],
+) -> list[bytes]:
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", size)
+    main = prepare_image(image, size)
+    result = []
+    for width in (size[0], *widths):
+        height = max(1, round(size[1] * width / size[0]))
+        scaled = main.resize((width, height)) if width != size[0] else main
+        for format in formats:
+            buf = io.BytesIO()
+            scaled.save(buf, format.upper())
+            result.append(buf.getvalue())
+    return result
+
+
+class LegacyUserUploadService(UserUploadService):
+    async def _upload_image(  # type: ignore[override]
+        self, file, user_id, size, type, **limits
+    ):
+        data = bytearray()
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            data += chunk
+        images = await self.image_pipeline.executor.run(
+            render_in_memory,
+            data,
+            size,
+            tuple(self.rendition_sizes[type]),
+            tuple(self.rendition_formats),
+        )
+        key = self._generate_key(user_id)
+        await asyncio.gather(
+            *(
+                self.storage.upload_file(
+                    io.BytesIO(image),
+                    self.bucket_name,
+                    f"{key}-{i}",
+                    "image/jpeg",
+                )
+                for i, image in enumerate(images)
+            )
+        )
+
+
+class _Raw:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def stream(self, **kwargs):
+        yield self.content
+
+
+def fake_send(request, **kwargs) -> AWSResponse:
+    body = request.body
+    if hasattr(body, "read"):
+        while body.read(64 * 1024):
+            pass
+
+    query = parse_qs(urlparse(request.url).query, keep_blank_values=True)
+    content = b""
+    if request.method == "POST" and "uploads" in query:
+        content = (
+            b"<InitiateMultipartUploadResult><UploadId>bench</UploadId>"
+            b"</InitiateMultipartUploadResult>"
+        )
+    elif request.method == "POST":
+        content = b"<CompleteMultipartUploadResult/>"
+
+    return AWSResponse(request.url, 200, {"ETag": '"bench"'}, _Raw(content))
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def make_cover() -> bytes:
+    buf = io.BytesIO()
+    Image.effect_noise((4096, 2048), 64).convert("RGB").save(
+        buf, "JPEG", quality=95
+    )
+    return buf.getvalue()
+
+
+def make_file(cover: bytes) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(cover),
+        size=len(cover),
+        filename="cover.jpg",
+        headers=Headers(raw=[(b"content-type", b"image/jpeg")]),
+    )
+
+
+async def run(name: str) -> None:
+    await init_db()
+    legacy = name == "legacy"
+    storage = (LegacyS3StorageAdapter if legacy else S3StorageAdapter)()
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+    client.meta.events.register("before-send.s3", fake_send)
+
+    pipeline = ImagePipeline(max_workers=2, max_queue=64)
+    service = (LegacyUserUploadService if legacy else UserUploadService)(
+        storage, pipeline
+    )
+    users = [
+        await UserModel.create(
+            email=f"bench{i}@example.com",
+            first_name="Bench",
+            last_name="Bench",
+            patronymic="Bench",
+            password_hash="-",
+        )
+        for i in range(UPLOADS)
+    ]
+
+    cover = make_cover()
+    # прогрев: пул процессов, клиент S3, модули Pillow
+    await service.upload_cover(make_file(cover), users[0].id)
+
+    baseline = current_rss()
+    peak = baseline
+    stop = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not stop.is_set():
+            peak = max(peak, current_rss())
+            time.sleep(0.002)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(service.upload_cover(make_file(cover), user.id) for user in users)
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    print(
+        f"{name:<10} cover={len(cover) / 2**20:5.1f}MB uploads={UPLOADS} "
+        f"peak RSS +{(peak - baseline) / 2**20:7.1f}MB "
+        f"per upload {(peak - baseline) / UPLOADS / 2**20:6.1f}MB "
+        f"time={elapsed:5.2f}s"
+    )
+
+    pipeline.shutdown()
+    await Tortoise._drop_databases()
+
+
+def main(name: str) -> None:
+    asyncio.run(run(name))
+
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("spawn")
+    for name in ("legacy", "streamed"):
+        process = context.Process(target=main, args=(name,))
+        process.start()
+        process.join()
@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_uploads_s3_key_c06d5f" ON "uploads" ("s3_key");
+        CREATE INDEX IF NOT EXISTS "idx_users_email_lower" ON "users" (LOWER("email"));"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_users_email_lower";
+        DROP INDEX IF EXISTS "idx_uploads_s3_key_c06d5f";"""
@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "uploads" ADD "width" INT;
+        ALTER TABLE "uploads" ADD "height" INT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "uploads" DROP COLUMN "width";
+        ALTER TABLE "uploads" DROP COLUMN "height";"""
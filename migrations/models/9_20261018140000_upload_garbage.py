@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "upload_garbage" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "s3_key" VARCHAR(256) NOT NULL,
+    "queued_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "upload_garbage";"""
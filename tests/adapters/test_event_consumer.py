@@ -0,0 +1,124 @@
+from app.adapters.event_consumer.aiopika import AioPikaEventConsumerAdapter
+from tests.mocks.adapters.event_consumer import MockEventConsumerAdapter
+from app.executor import KeyedTaskPool
+import asyncio
+import pytest
+import json
+
+
+class FakeMessage:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.acked = False
+        self.rejected = False
+
+    async def ack(self):
+        self.acked = True
+
+    async def reject(self, requeue: bool = False):
+        assert requeue is False
+        self.rejected = True
+
+
+class FakeQueue:
+    def __init__(self, messages: list[FakeMessage]):
+        self.messages = messages
+
+    async def bind(self, exchange, routing_key: str):
+        return
+
+    def iterator(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+
+@pytest.mark.asyncio
+async def test_keyed_pool_limits_concurrency_and_keeps_key_order():
+    pool = KeyedTaskPool(max_concurrency=4)
+    running = 0
+    max_running = 0
+    order: dict[int, list[int]] = {}
+
+    async def job(key: int, seq: int):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.001 * (seq % 3))
+        order.setdefault(key, []).append(seq)
+        running -= 1
+
+    for seq in range(40):
+        await pool.submit(seq % 5, lambda k=seq % 5, s=seq: job(k, s))
+    await pool.join()
+
+    assert max_running == 4
+    for key, seqs in order.items():
+        assert seqs == sorted(seqs)
+        assert len(seqs) == 8
+
+
+@pytest.mark.asyncio
+async def test_aiopika_consumer_acks_and_dead_letters():
+    messages = [
+        FakeMessage(json.dumps({"data": {"id": 1}}).encode()),
+        FakeMessage(b"not json"),
+        FakeMessage(json.dumps({"data": {"id": 2}}).encode()),
+    ]
+    consumer = AioPikaEventConsumerAdapter("", max_concurrency=2)
+    consumer._queue = FakeQueue(messages)
+
+    async def handler(payload: dict):
+        if payload["data"]["id"] == 2:
+            raise RuntimeError("handler failed")
+
+    task = await consumer.create_consuming_loop(
+        ["user.banned"],
+        handler,
+        ordering_key=lambda payload: payload["data"]["id"],
+    )
+    await task
+    await consumer._pool.join()
+
+    assert [m.acked for m in messages] == [True, False, False]
+    assert [m.rejected for m in messages] == [False, True, True]
+    assert consumer.stats() == {
+        "processed": 1,
+        "dead_lettered": 2,
+        "in_flight": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_mock_consumer_processes_concurrently():
+    consumer = MockEventConsumerAdapter(prefetch_count=8, max_concurrency=8)
+    handled: list[int] = []
+
+    async def handler(payload: dict):
+        await asyncio.sleep(0.01)
+        if payload["data"]["id"] < 0:
+            raise RuntimeError("handler failed")
+        handled.append(payload["data"]["id"])
+
+    task = await consumer.create_consuming_loop(["user.banned"], handler)
+    for user_id in range(-1, 16):
+        consumer.deliver("user.banned", {"data": {"id": user_id}})
+    consumer.deliver("user.created", {"data": {"id": 100}})
+
+    started = asyncio.get_running_loop().time()
+    await consumer.drain()
+    elapsed = asyncio.get_running_loop().time() - started
+    task.cancel()
+
+    assert sorted(handled) == list(range(16))
+    assert consumer.dead_letters == [{"data": {"id": -1}}]
+    # 17 обработчиков по 10мс, по 8 одновременно
+    assert elapsed < 0.1
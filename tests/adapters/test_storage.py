@@ -0,0 +1,192 @@
+from app.adapters.storage import S3StorageAdapter
+from botocore.exceptions import ClientError
+from botocore.stub import ANY, Stubber
+import threading
+import pytest
+import io
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_runs_off_event_loop():
+    storage = S3StorageAdapter(max_concurrency=2)
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+    loop_thread = threading.get_ident()
+    call_threads = []
+
+    client.meta.events.register(
+        "before-parameter-build.s3",
+        lambda **_: call_threads.append(threading.get_ident()),
+    )
+
+    with Stubber(client) as stubber:
+        stubber.add_response("head_object", {}, {"Bucket": "b", "Key": "k"})
+        stubber.add_client_error(
+            "head_object",
+            http_status_code=404,
+            expected_params={"Bucket": "b", "Key": "missing"},
+        )
+        stubber.add_response("delete_object", {}, {"Bucket": "b", "Key": "k"})
+
+        assert await storage.object_exists("b", "k")
+        assert not await storage.object_exists("b", "missing")
+        await storage.delete_object("b", "k")
+
+    assert len(call_threads) == 3
+    assert loop_thread not in call_threads
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_small_upload_single_put():
+    storage = S3StorageAdapter(max_concurrency=2, multipart_threshold=16)
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "put_object",
+            {},
+            {
+                "Bucket": "b",
+                "Key": "k",
+                "Body": ANY,
+                "ContentType": "image/jpeg",
+            },
+        )
+        await storage.upload_file(io.BytesIO(b"x" * 16), "b", "k", "image/jpeg")
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_large_upload_multipart():
+    storage = S3StorageAdapter(
+        max_concurrency=2,
+        multipart_threshold=16,
+        multipart_part_size=10,
+        multipart_concurrency=1,
+    )
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+    bodies = []
+    client.meta.events.register(
+        "before-parameter-build.s3.UploadPart",
+        lambda params, **_: bodies.append(params["Body"]),
+    )
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "create_multipart_upload",
+            {"UploadId": "u"},
+            {"Bucket": "b", "Key": "k", "ContentType": "image/jpeg"},
+        )
+        for number in (1, 2, 3):
+            stubber.add_response(
+                "upload_part",
+                {"ETag": f'"{number}"'},
+                {
+                    "Bucket": "b",
+                    "Key": "k",
+                    "UploadId": "u",
+                    "PartNumber": number,
+                    "Body": ANY,
+                },
+            )
+        stubber.add_response(
+            "complete_multipart_upload",
+            {},
+            {
+                "Bucket": "b",
+                "Key": "k",
+                "UploadId": "u",
+                "MultipartUpload": {
+                    "Parts": [
+                        {"PartNumber": number, "ETag": f'"{number}"'}
+                        for number in (1, 2, 3)
+                    ]
+                },
+            },
+        )
+        await storage.upload_file(
+            io.BytesIO(bytes(range(25))), "b", "k", "image/jpeg"
+        )
+        stubber.assert_no_pending_responses()
+
+    assert b"".join(bodies) == bytes(range(25))
+    assert max(len(body) for body in bodies) == 10
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_multipart_aborted_on_error():
+    storage = S3StorageAdapter(
+        max_concurrency=2, multipart_threshold=4, multipart_part_size=8
+    )
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+
+    with Stubber(client) as stubber:
+        stubber.add_response("create_multipart_upload", {"UploadId": "u"})
+        stubber.add_client_error("upload_part", http_status_code=500)
+        stubber.add_response(
+            "abort_multipart_upload",
+            {},
+            {"Bucket": "b", "Key": "k", "UploadId": "u"},
+        )
+
+        with pytest.raises(ClientError):
+            await storage.upload_file(
+                io.BytesIO(b"x" * 8), "b", "k", "image/jpeg"
+            )
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_delete_objects_batches(monkeypatch):
+    monkeypatch.setattr("app.adapters.storage.DELETE_OBJECTS_BATCH", 2)
+    storage = S3StorageAdapter(max_concurrency=2)
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "delete_objects",
+            {"Errors": [{"Key": "b", "Code": "AccessDenied"}]},
+            {
+                "Bucket": "bucket",
+                "Delete": {
+                    "Objects": [{"Key": "a"}, {"Key": "b"}],
+                    "Quiet": True,
+                },
+            },
+        )
+        stubber.add_response(
+            "delete_objects",
+            {},
+            {
+                "Bucket": "bucket",
+                "Delete": {"Objects": [{"Key": "c"}], "Quiet": True},
+            },
+        )
+
+        assert await storage.delete_objects("bucket", ["a", "b", "c"]) == ["b"]
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.asyncio
+async def test_s3_adapter_list_objects_paginates():
+    storage = S3StorageAdapter(max_concurrency=2)
+    client = storage._S3StorageAdapter__client  # type: ignore[attr-defined]
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "list_objects_v2",
+            {
+                "Contents": [{"Key": "a"}],
+                "IsTruncated": True,
+                "NextContinuationToken": "next",
+            },
+            {"Bucket": "bucket"},
+        )
+        stubber.add_response(
+            "list_objects_v2",
+            {"Contents": [{"Key": "b"}], "IsTruncated": False},
+            {"Bucket": "bucket", "ContinuationToken": "next"},
+        )
+
+        keys = [obj["Key"] async for obj in storage.list_objects("bucket")]
+
+    assert keys == ["a", "b"]
@@ -0,0 +1,49 @@
+from app.cache import TTLCache
+import time
+
+
+def test_cache_hit_miss():
+    cache: TTLCache[int, str] = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get(1) is None
+    cache.set(1, "one")
+    assert cache.get(1) == "one"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_lru_eviction():
+    cache: TTLCache[int, str] = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.get(1)
+    cache.set(3, "three")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "one"
+    assert cache.get(3) == "three"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry():
+    cache: TTLCache[int, str] = TTLCache(maxsize=10, ttl=60)
+    cache.set(1, "one", ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_cache_invalidate():
+    cache: TTLCache[int, str] = TTLCache(maxsize=10, ttl=60)
+    cache.set(1, "one")
+    cache.invalidate(1)
+
+    assert cache.get(1) is None
+
+
+def test_cache_disabled():
+    cache: TTLCache[int, str] = TTLCache(maxsize=0, ttl=60)
+    cache.set(1, "one")
+
+    assert cache.get(1) is None
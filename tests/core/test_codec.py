@@ -0,0 +1,36 @@
+from app.ports.event_publisher.dto import EventPayload
+from app.codec import get_json_codec
+from datetime import datetime, timezone
+import pytest
+import uuid
+import json
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_event_roundtrip(name):
+    codec = get_json_codec(name)
+    event = EventPayload(
+        event_id=uuid.uuid4(),
+        event_name="user.banned",
+        data={"id": 1, "formatted_name": "Иванов И. И.", "uploads": None},
+    )
+
+    body = codec.encode_event(event)
+
+    assert json.loads(body) == json.loads(event.model_dump_json())
+    assert codec.decode(body) == json.loads(body)
+    assert EventPayload.model_validate(codec.decode(body)) == event
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_response_class_renders_json(name):
+    content = {
+        "name": "Иван",
+        "register_date": datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat(),
+        "items": [1, 2.5, None, True],
+    }
+
+    response = get_json_codec(name).response_class(content)
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == content
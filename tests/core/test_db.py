@@ -0,0 +1,56 @@
+from app.db import (
+    AcquireTimeoutPool,
+    PooledAsyncpgClient,
+    get_read_connection,
+    _connection_config,
+)
+from tortoise import connections
+from app.config import Settings
+import asyncpg
+import pytest
+
+
+def test_postgres_connection_uses_pool_settings(monkeypatch):
+    monkeypatch.setattr(Settings, "DATABASE_POOL_MAX_SIZE", 32)
+    monkeypatch.setattr(Settings, "DATABASE_STATEMENT_CACHE_SIZE", 0)
+    monkeypatch.setattr(Settings, "DATABASE_ACQUIRE_TIMEOUT", 2.5)
+
+    config = _connection_config("postgres://root@db:5432/users?minsize=4")
+
+    assert config["engine"] == "app.db"
+    assert config["credentials"]["minsize"] == "4"
+    assert config["credentials"]["maxsize"] == 32
+    assert config["credentials"]["statement_cache_size"] == 0
+    assert config["credentials"]["acquire_timeout"] == 2.5
+
+
+def test_sqlite_connection_is_unchanged():
+    config = _connection_config("sqlite://:memory:")
+
+    assert config["engine"] == "tortoise.backends.sqlite"
+    assert "maxsize" not in config["credentials"]
+
+
+def test_acquire_uses_default_timeout():
+    client = PooledAsyncpgClient(connection_name="default", acquire_timeout=1.5)
+    pool = AcquireTimeoutPool(
+        None,
+        min_size=0,
+        max_size=1,
+        max_queries=1,
+        max_inactive_connection_lifetime=0,
+        loop=None,
+        connection_class=client.connection_class,
+        record_class=asyncpg.Record,
+    )
+    pool.acquire_timeout = client.acquire_timeout
+
+    assert pool.acquire().timeout == 1.5
+    assert pool.acquire(timeout=0.1).timeout == 0.1
+
+
+@pytest.mark.asyncio
+async def test_reads_use_primary_without_replica(monkeypatch):
+    monkeypatch.setattr(Settings, "DATABASE_READ_URL", None)
+
+    assert get_read_connection() is connections.get("default")
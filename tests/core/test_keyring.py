@@ -0,0 +1,68 @@
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives import serialization
+from app.services.auth.keys import JWTKeyring
+from jose import jwk, jwt
+import pytest
+
+from app.services.auth.exceptions import UnknownSigningKeyException
+
+
+def generate_rsa_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def generate_ec_pem() -> str:
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def test_keyring_rs256_roundtrip_with_kid():
+    keyring = JWTKeyring("RS256", {"k1": generate_rsa_pem()}, "k1")
+    token = keyring.encode({"user_id": 1})
+
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert keyring.decode(token)["user_id"] == 1
+
+
+def test_keyring_es256_jwks_verifies_token():
+    keyring = JWTKeyring("ES256", {"k1": generate_ec_pem()}, "k1")
+    token = keyring.encode({"user_id": 1})
+
+    (public_jwk,) = keyring.jwks()["keys"]
+    assert "d" not in public_jwk
+    assert public_jwk["kid"] == "k1"
+    assert jwt.decode(token, jwk.construct(public_jwk, "ES256"))["user_id"] == 1
+
+
+def test_keyring_rotation_accepts_old_tokens():
+    old_pem, new_pem = generate_rsa_pem(), generate_rsa_pem()
+    old_keyring = JWTKeyring("RS256", {"old": old_pem}, "old")
+    token = old_keyring.encode({"user_id": 1})
+
+    keyring = JWTKeyring("RS256", {"old": old_pem, "new": new_pem}, "new")
+    assert keyring.decode(token)["user_id"] == 1
+    assert jwt.get_unverified_header(keyring.encode({}))["kid"] == "new"
+
+
+def test_keyring_unknown_kid():
+    token = JWTKeyring("RS256", {"k1": generate_rsa_pem()}, "k1").encode({})
+    keyring = JWTKeyring("RS256", {"k2": generate_rsa_pem()}, "k2")
+
+    with pytest.raises(UnknownSigningKeyException):
+        keyring.decode(token)
+
+
+def test_keyring_hs256_does_not_publish_secret():
+    keyring = JWTKeyring("HS256", {"default": "secret"}, "default")
+
+    assert keyring.jwks() == {"keys": []}
+    assert keyring.decode(keyring.encode({"user_id": 1}))["user_id"] == 1
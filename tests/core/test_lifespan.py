@@ -0,0 +1,70 @@
+from app.adapters.event_publisher.aiopika import AioPikaEventPublisherAdapter
+from app.adapters.event_consumer.aiopika import AioPikaEventConsumerAdapter
+from httpx import AsyncClient, ASGITransport
+from app.services.user.outbox import UserEventDispatcher
+from app.dependencies import get_user_event_dispatcher, get_upload_gc
+from app.services.uploads.gc import UploadGarbageCollector
+from fastapi import Depends, FastAPI
+from app.main import app, lifespan
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def running_loops(monkeypatch) -> dict[str, object]:
+    """Экземпляры, фоновые циклы которых запустил lifespan"""
+    started: dict[str, object] = {}
+
+    async def noop(self, *args, **kwargs):
+        return
+
+    async def consuming_loop(self, *args, **kwargs):
+        return asyncio.create_task(asyncio.sleep(0))
+
+    def recording(name: str):
+        async def run(self):
+            started[name] = self
+
+        return run
+
+    monkeypatch.setattr(AioPikaEventPublisherAdapter, "connect", noop)
+    monkeypatch.setattr(AioPikaEventConsumerAdapter, "connect", noop)
+    monkeypatch.setattr(
+        AioPikaEventConsumerAdapter, "create_consuming_loop", consuming_loop
+    )
+    monkeypatch.setattr(UserEventDispatcher, "run", recording("dispatcher"))
+    monkeypatch.setattr(UploadGarbageCollector, "run", recording("gc"))
+    return started
+
+
+async def resolve(dependency) -> object:
+    # отдельное приложение без dependency_overrides из фикстур
+    resolved = []
+    probe = FastAPI()
+
+    @probe.get("/")
+    async def endpoint(value=Depends(dependency)):
+        resolved.append(value)
+
+    transport = ASGITransport(app=probe)
+    async with AsyncClient(transport=transport, base_url="http://t") as c:
+        await c.get("/")
+    return resolved[0]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_runs_injected_dispatcher(running_loops):
+    async with lifespan(app):
+        await asyncio.sleep(0)
+
+    assert running_loops["dispatcher"] is await resolve(
+        get_user_event_dispatcher
+    )
+
+
+@pytest.mark.asyncio
+async def test_lifespan_runs_injected_upload_gc(running_loops):
+    async with lifespan(app):
+        await asyncio.sleep(0)
+
+    assert running_loops["gc"] is await resolve(get_upload_gc)
@@ -0,0 +1,43 @@
+from app.models import UserModel, UserTokensModel, UserUploadsModel
+from tortoise.queryset import QuerySet
+from tortoise import connections
+from typing import Callable
+import pytest_asyncio
+import importlib
+import pytest
+
+MIGRATION = "migrations.models.11_20261018180000_hot_lookup_indexes"
+
+HOT_QUERIES: dict[str, Callable[[], QuerySet]] = {
+    "upload by s3 key": lambda: UserUploadsModel.filter(s3_key="a/1.png"),
+    "uploads of users": lambda: UserUploadsModel.filter(user_id__in=[1, 2]),
+    "upload by type": lambda: UserUploadsModel.filter(user_id=1, type="avatar"),
+    "user by email": lambda: UserModel.filter_by_email("Me@Example.com"),
+    "users by id": lambda: UserModel.filter(id__in=[1, 2, 3]),
+    "token revision": lambda: UserTokensModel.filter(user_id=1),
+}
+
+
+async def query_plan(sql: str) -> list[str]:
+    db = connections.get("default")
+    rows = await db.execute_query_dict(f"EXPLAIN QUERY PLAN {sql}")
+    return [row["detail"] for row in rows]
+
+
+@pytest_asyncio.fixture
+async def migrated_db():
+    # индексы по выражениям есть только в миграции, схема из моделей их
+    # не создает, поэтому применяем миграцию поверх тестовой базы
+    db = connections.get("default")
+    migration = importlib.import_module(MIGRATION)
+    await db.execute_script(await migration.upgrade(db))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_queries_use_index(name: str, migrated_db):
+    plan = await query_plan(HOT_QUERIES[name]().sql(params_inline=True))
+
+    # SCAN в плане SQLite - полный проход по таблице или индексу
+    assert plan
+    assert not [step for step in plan if step.startswith("SCAN")], plan
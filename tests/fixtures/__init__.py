@@ -1,2 +1,3 @@
 from tests.fixtures.user_fixtures import *
 from tests.fixtures.dependency_fixtures import *
+from tests.fixtures.db_fixtures import *
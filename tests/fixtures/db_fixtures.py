@@ -0,0 +1,37 @@
+from tortoise import connections
+from unittest import mock
+import pytest
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def reset(self) -> None:
+        self.queries.clear()
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    db = connections.get("default")
+
+    def wrap(method):
+        async def counted(query, *args, **kwargs):
+            counter.queries.append(str(query))
+            return await method(query, *args, **kwargs)
+
+        return counted
+
+    with (
+        mock.patch.object(db, "execute_query", wrap(db.execute_query)),
+        mock.patch.object(
+            db, "execute_query_dict", wrap(db.execute_query_dict)
+        ),
+        mock.patch.object(db, "execute_insert", wrap(db.execute_insert)),
+    ):
+        yield counter
@@ -1,16 +1,30 @@
 from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from tests.mocks.adapters.event_consumer import MockEventConsumerAdapter
 from app.services.uploads.service import UserUploadService
+from app.services.uploads.pipeline import ImagePipeline
+from app.services.uploads.gc import UploadGarbageCollector
+from app.services.password.service import PasswordService
 from tests.mocks.adapters.storage import MockS3Storage
+from app.adapters.user_cache import InMemoryUserCacheAdapter
+from app.services.user.outbox import UserEventDispatcher
+from app.services.user.uploads import UserUploadsHook
+from app.services.user.cache import UserProfileCache
 from app.services.user.service import UserService
+from app.services.auth.keys import get_jwt_keyring
 from app.services.auth import AuthService
 from app.main import app
 import pytest
 
 from app.dependencies import (
+    get_user_event_dispatcher,
+    get_user_profile_cache,
     get_auth_service,
     get_event_publisher,
+    get_event_consumer,
+    get_password_service,
     get_storage_adapter,
     get_upload_service,
+    get_upload_gc,
     get_user_service,
 )
 
@@ -32,29 +46,96 @@ def mock_event_publisher():
 
 
 @pytest.fixture(autouse=True)
-def mock_upload_service(mock_storage_adapter):
-    service = UserUploadService(mock_storage_adapter)
+def mock_event_consumer():
+    event_consumer = MockEventConsumerAdapter()
+    app.dependency_overrides[get_event_consumer] = lambda: event_consumer
+    yield event_consumer
+    app.dependency_overrides.pop(get_event_consumer, None)
+
+
+@pytest.fixture(autouse=True)
+def mock_event_dispatcher(mock_event_publisher):
+    dispatcher = UserEventDispatcher(mock_event_publisher)
+    app.dependency_overrides[get_user_event_dispatcher] = lambda: dispatcher
+    yield dispatcher
+    app.dependency_overrides.pop(get_user_event_dispatcher, None)
+
+
+@pytest.fixture(autouse=True)
+def mock_image_pipeline():
+    pipeline = ImagePipeline(executor="thread")
+    yield pipeline
+    pipeline.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def mock_user_profile_cache():
+    cache = UserProfileCache(100, 60, InMemoryUserCacheAdapter(100, 60))
+    app.dependency_overrides[get_user_profile_cache] = lambda: cache
+    yield cache
+    app.dependency_overrides.pop(get_user_profile_cache, None)
+
+
+@pytest.fixture(autouse=True)
+def mock_upload_service(
+    mock_storage_adapter,
+    mock_image_pipeline,
+    mock_user_profile_cache,
+    mock_event_dispatcher,
+):
+    hook = UserUploadsHook(mock_event_dispatcher, mock_user_profile_cache)
+    service = UserUploadService(
+        mock_storage_adapter,
+        mock_image_pipeline,
+        on_uploads_changed=hook.on_uploads_changed,
+    )
     app.dependency_overrides[get_upload_service] = lambda: service
     yield service
-    app.dependency_overrides.pop(get_event_publisher, None)
+    app.dependency_overrides.pop(get_upload_service, None)
+
+
+@pytest.fixture(autouse=True)
+def mock_upload_gc(mock_storage_adapter):
+    gc = UploadGarbageCollector(mock_storage_adapter, grace_period=0)
+    app.dependency_overrides[get_upload_gc] = lambda: gc
+    yield gc
+    app.dependency_overrides.pop(get_upload_gc, None)
 
 
 @pytest.fixture(autouse=True)
 def mock_auth_service():
-    service = AuthService()
+    service = AuthService(
+        get_jwt_keyring(), revision_cache_size=100, revision_cache_ttl=60
+    )
     app.dependency_overrides[get_auth_service] = lambda: service
     yield service
     app.dependency_overrides.pop(get_auth_service, None)
 
 
+@pytest.fixture(autouse=True)
+def mock_password_service():
+    service = PasswordService()
+    app.dependency_overrides[get_password_service] = lambda: service
+    yield service
+    service.shutdown()
+    app.dependency_overrides.pop(get_password_service, None)
+
+
 @pytest.fixture(autouse=True)
 def mock_user_service(
     mock_auth_service,
     mock_upload_service,
-    mock_event_publisher,
+    mock_event_dispatcher,
+    mock_password_service,
+    mock_user_profile_cache,
 ):
     service = UserService(
-        mock_auth_service, mock_upload_service, mock_event_publisher
+        mock_auth_service,
+        mock_upload_service,
+        mock_event_dispatcher,
+        mock_password_service,
+        profile_cache=mock_user_profile_cache,
+        batch_window=0.002,
     )
     app.dependency_overrides[get_user_service] = lambda: service
     yield service
@@ -1,26 +1,88 @@
 from app.ports.event_consumer import IEventConsumerPort
-from typing import Callable, Awaitable
+from typing import Awaitable, Callable, Hashable
+from app.executor import KeyedTaskPool
+from functools import partial
 import asyncio
 
 
 class MockEventConsumerAdapter(IEventConsumerPort):
+    """
+    Брокер в памяти: события, переданные в deliver, раздаются так же, как в
+    AioPikaEventConsumerAdapter - не более `prefetch_count` неподтвержденных
+    и не более `max_concurrency` обработчиков одновременно. Сообщения, на
+    которых обработчик упал, складываются в dead_letters.
+    """
+
     def __init__(
         self,
-        connection_url: str,
+        connection_url: str = "",
         exchange_name: str = "events",
         queue_name: str = "",
+        exclusive: bool = False,
+        *,
+        prefetch_count: int = 64,
+        max_concurrency: int = 16,
     ):
-        return
+        self.prefetch_count = prefetch_count
+
+        self.processed = 0
+        self.dead_letters: list[dict] = []
+
+        self._pool = KeyedTaskPool(max_concurrency)
+        self._queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        self._unacked = asyncio.Semaphore(prefetch_count)
+        self._routing_keys: set[str] = set()
 
     async def connect(self):
         return
 
+    def deliver(self, routing_key: str, payload: dict) -> None:
+        self._queue.put_nowait((routing_key, payload))
+
+    async def drain(self) -> None:
+        """Ждет, пока все доставленные сообщения будут обработаны"""
+        await self._queue.join()
+        await self._pool.join()
+
     async def create_consuming_loop(
         self,
         routing_keys: list[str],
         handler: Callable[[dict], Awaitable[None]],
+        ordering_key: Callable[[dict], Hashable] | None = None,
     ) -> asyncio.Task:
+        self._routing_keys.update(routing_keys)
+
         async def consume():
-            await asyncio.sleep(1)
+            while True:
+                routing_key, payload = await self._queue.get()
+                if routing_key not in self._routing_keys:
+                    self._queue.task_done()
+                    continue
+
+                await self._unacked.acquire()
+                await self._pool.submit(
+                    ordering_key(payload) if ordering_key else None,
+                    partial(self._handle, payload, handler),
+                )
 
         return asyncio.create_task(consume())
+
+    async def _handle(
+        self, payload: dict, handler: Callable[[dict], Awaitable[None]]
+    ) -> None:
+        try:
+            await handler(payload)
+        except Exception:
+            self.dead_letters.append(payload)
+        else:
+            self.processed += 1
+        finally:
+            self._unacked.release()
+            self._queue.task_done()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "processed": self.processed,
+            "dead_lettered": len(self.dead_letters),
+            "in_flight": self._pool.in_flight,
+        }
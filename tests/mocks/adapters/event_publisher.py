@@ -1,13 +1,28 @@
 from app.ports.event_publisher import IEventPublisherPort
+from app.ports.event_publisher.dto import EventPayload
+from typing import Sequence
 from pydantic import BaseModel
+from uuid import UUID, uuid4
 
 
 class MockEventPublisherAdapter(IEventPublisherPort):
     def __init__(self, connection_url: str = "", exchange_name: str = "events"):
-        return
+        self.published: list[EventPayload] = []
 
     async def connect(self):
         return
 
     async def publish(self, event_name: str, data: BaseModel) -> None:
-        return
+        await self.publish_batch(
+            [
+                EventPayload(
+                    event_id=uuid4(),
+                    event_name=event_name,
+                    data=data.model_dump(),
+                )
+            ]
+        )
+
+    async def publish_batch(self, events: Sequence[EventPayload]) -> list[UUID]:
+        self.published.extend(events)
+        return []
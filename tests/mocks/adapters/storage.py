@@ -1,4 +1,7 @@
+from app.ports.storage.exceptions import InvalidRangeException
 from app.ports.storage import IStoragePort
+from typing import AsyncIterator, BinaryIO
+from datetime import datetime, timezone
 import io
 
 
@@ -8,36 +11,95 @@ class MockS3Storage(IStoragePort):
         self.deleted_objects = set()
         self.existing_objects = set()
         self.objects_content = {}
+        self.get_object_calls = 0
+        self.presigned_urls = 0
+        self.delete_objects_calls = 0
+        self.last_modified: dict[tuple[str, str], datetime] = {}
 
-    def upload_jpeg(self, buf: io.BytesIO, bucket: str, key: str) -> None:
-        self.upload_file(buf, bucket, key, "image/jpeg")
+    async def upload_jpeg(self, buf: io.BytesIO, bucket: str, key: str) -> None:
+        await self.upload_file(buf, bucket, key, "image/jpeg")
 
-    def upload_file(
-        self, buf: io.BytesIO, bucket: str, key: str, content_type: str
+    async def upload_file(
+        self, buf: BinaryIO, bucket: str, key: str, content_type: str
     ) -> None:
+        content = buf.read()
         self.uploaded_files[(bucket, key)] = {
-            "content": buf.getvalue(),
+            "content": content,
             "content_type": content_type,
         }
         self.existing_objects.add((bucket, key))
         self.objects_content[(bucket, key)] = {
-            "Body": io.BytesIO(buf.getvalue()),
+            "Body": io.BytesIO(content),
             "ContentType": content_type,
         }
 
-    def delete_object(self, bucket: str, key: str) -> None:
+    async def delete_object(self, bucket: str, key: str) -> None:
         self.deleted_objects.add((bucket, key))
         self.existing_objects.discard((bucket, key))
         self.uploaded_files.pop((bucket, key), None)
         self.objects_content.pop((bucket, key), None)
 
-    def object_exists(self, bucket: str, key: str) -> bool:
+    async def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        self.delete_objects_calls += 1
+        for key in keys:
+            await self.delete_object(bucket, key)
+        return []
+
+    async def list_objects(self, bucket: str) -> AsyncIterator[dict]:
+        for obj_bucket, key in list(self.existing_objects):
+            if obj_bucket == bucket:
+                yield {
+                    "Key": key,
+                    "LastModified": self.last_modified.get(
+                        (bucket, key), datetime.now(timezone.utc)
+                    ),
+                }
+
+    async def object_exists(self, bucket: str, key: str) -> bool:
         return (bucket, key) in self.existing_objects
 
-    def get_object(self, bucket: str, key: str) -> dict:
+    async def get_object(
+        self, bucket: str, key: str, range: str | None = None
+    ) -> dict:
         if (bucket, key) not in self.existing_objects:
             raise FileNotFoundError(f"Object {bucket}/{key} not found")
-        return self.objects_content[(bucket, key)]
 
-    def ensure_bucket(self, bucket: str) -> None:
+        self.get_object_calls += 1
+        obj = self.objects_content[(bucket, key)]
+        content = obj["Body"].getvalue()
+        if range is None:
+            return {
+                "Body": io.BytesIO(content),
+                "ContentType": obj["ContentType"],
+                "ContentLength": len(content),
+            }
+
+        start_raw, end_raw = range.removeprefix("bytes=").split("-")
+        if start_raw:
+            start = int(start_raw)
+            end = min(int(end_raw), len(content) - 1) if end_raw else None
+        else:
+            start = max(len(content) - int(end_raw), 0)
+            end = None
+        end = len(content) - 1 if end is None else end
+        if start >= len(content) or start > end:
+            raise InvalidRangeException()
+
+        return {
+            "Body": io.BytesIO(content[start : end + 1]),
+            "ContentType": obj["ContentType"],
+            "ContentLength": end - start + 1,
+            "ContentRange": f"bytes {start}-{end}/{len(content)}",
+        }
+
+    async def ensure_bucket(self, bucket: str) -> None:
         return
+
+    async def generate_presigned_url(
+        self, bucket: str, key: str, expires_in: int
+    ) -> str:
+        self.presigned_urls += 1
+        return (
+            f"http://localhost:9000/{bucket}/{key}"
+            f"?X-Amz-Expires={expires_in}&X-Amz-Signature={self.presigned_urls}"
+        )
@@ -4,6 +4,8 @@ from faker import Faker
 import pytest
 
 from app.acl.roles import UserRoles
+from app.routers import admin as admin_router
+from app.services.user.interface import IUserService
 from app.routers.admin.dto import OptionalAdminFullUserDataDto
 from app.services.user.dto import (
     FullUserDto,
@@ -27,6 +29,106 @@ async def test_200_admin_get_all(
     assert len(data) == len(users) + 1
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("users", [{"count": 7}], indirect=True)
+async def test_200_admin_get_all_without_paging_returns_everyone(
+    client: AsyncClient,
+    admin_user: RegisteredUserDto,
+    users: list[RegisteredUserDto],
+    monkeypatch,
+):
+    monkeypatch.setattr(admin_router, "EXPORT_CHUNK_SIZE", 3)
+    monkeypatch.setattr(admin_router, "PAGE_SIZE", 3)
+
+    response = await client.get(
+        "/admin/",
+        headers={"Authorization": f"Bearer {admin_user.access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert "X-Next-After-Id" not in response.headers
+    assert [user["id"] for user in response.json()] == sorted(
+        [admin_user.user.id] + [u.user.id for u in users]
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("users", [{"count": 7}], indirect=True)
+async def test_200_admin_get_all_paginated(
+    client: AsyncClient,
+    admin_user: RegisteredUserDto,
+    users: list[RegisteredUserDto],
+):
+    headers = {"Authorization": f"Bearer {admin_user.access_token}"}
+    ids: list[int] = []
+    params: dict = {"limit": 3}
+    while True:
+        response = await client.get("/admin/", params=params, headers=headers)
+        assert response.status_code == 200
+        page = [user["id"] for user in response.json()]
+        assert len(page) <= 3
+        ids += page
+
+        if "X-Next-After-Id" not in response.headers:
+            break
+        assert response.headers["X-Next-After-Id"] == str(page[-1])
+        params["after_id"] = page[-1]
+
+    assert ids == sorted([admin_user.user.id] + [u.user.id for u in users])
+
+
+@pytest.mark.asyncio
+async def test_200_admin_get_all_filters(
+    client: AsyncClient,
+    admin_user: RegisteredUserDto,
+    users: list[RegisteredUserDto],
+    mock_user_service: IUserService,
+):
+    headers = {"Authorization": f"Bearer {admin_user.access_token}"}
+    await mock_user_service.set_is_banned(users[1].user.id, True)
+
+    response = await client.get(
+        "/admin/", params={"is_banned": True}, headers=headers
+    )
+    assert [user["id"] for user in response.json()] == [users[1].user.id]
+
+    response = await client.get(
+        "/admin/", params={"role": UserRoles.Admin.value}, headers=headers
+    )
+    assert [user["id"] for user in response.json()] == [admin_user.user.id]
+
+    response = await client.get(
+        "/admin/",
+        params={"registered_after": "2100-01-01T00:00:00Z"},
+        headers=headers,
+    )
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_200_admin_export_ndjson(
+    client: AsyncClient,
+    admin_user: RegisteredUserDto,
+    users: list[RegisteredUserDto],
+    monkeypatch,
+):
+    monkeypatch.setattr(admin_router, "EXPORT_CHUNK_SIZE", 2)
+
+    response = await client.get(
+        "/admin/export",
+        params={"is_banned": False},
+        headers={"Authorization": f"Bearer {admin_user.access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    exported = [FullUserDto.model_validate_json(line) for line in lines]
+    assert [user.id for user in exported] == sorted(
+        [admin_user.user.id] + [u.user.id for u in users]
+    )
+
+
 @pytest.mark.asyncio
 async def test_200_admin_get_user(
     client: AsyncClient,
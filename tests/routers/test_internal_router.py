@@ -0,0 +1,16 @@
+from httpx import AsyncClient
+from app.config import Settings
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_200_internal_metrics(client: AsyncClient):
+    response = await client.get(
+        "/internal/metrics",
+        headers={"Authorization": f"Bearer {Settings.INTERNAL_API_KEY}"},
+    )
+
+    assert response.status_code == 200
+    assert "hits" in response.json()["token_revision_cache"]
+    assert response.json()["user_event_outbox"]["backlog"] == 0
+    assert response.json()["event_consumer"]["dead_lettered"] == 0
@@ -0,0 +1,268 @@
+from app.services.uploads.interface import IUserUploadService
+from app.services.uploads.disk_cache import UploadDiskCache
+from app.services.uploads.service import UserUploadService
+from app.services.user.dto import RegisteredUserDto
+from tests.mocks.adapters.storage import MockS3Storage
+from tests.fixtures.db_fixtures import QueryCounter
+from app.services.uploads.dto import UserUploadDto
+from app.models.user import UserUploadsModel, UserUploadsType
+from httpx import AsyncClient
+from PIL import Image
+import pytest_asyncio
+import pytest
+import io
+
+
+@pytest_asyncio.fixture
+async def avatar(
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: IUserUploadService,
+) -> UserUploadDto:
+    return await mock_upload_service.get_upload(
+        user_with_avatar.user.id, UserUploadsType.Avatar
+    )
+
+
+@pytest.fixture
+def jpeg_only(mock_upload_service: UserUploadService):
+    mock_upload_service.rendition_formats = ("jpeg",)
+
+
+@pytest.fixture
+def disk_cache(tmp_path, mock_upload_service: UserUploadService):
+    cache = UploadDiskCache(str(tmp_path), 1024 * 1024, 60)
+    mock_upload_service.disk_cache = cache
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    mock_storage_adapter: MockS3Storage,
+):
+    response = await client.get(f"/download/uploads/{avatar.s3_key}")
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{avatar.s3_key}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert "last-modified" in response.headers
+    assert (
+        response.content
+        == mock_storage_adapter.uploaded_files[("avatars", avatar.s3_key)][
+            "content"
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_304_proxy_download_if_none_match(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    mock_storage_adapter: MockS3Storage,
+):
+    response = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"If-None-Match": f'W/"other", "{avatar.s3_key}"'},
+    )
+
+    assert response.status_code == 304
+    assert mock_storage_adapter.get_object_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_304_proxy_download_if_modified_since(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    mock_storage_adapter: MockS3Storage,
+):
+    first = await client.get(f"/download/uploads/{avatar.s3_key}")
+    response = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+
+    assert response.status_code == 304
+    assert mock_storage_adapter.get_object_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_206_proxy_download_range(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    mock_storage_adapter: MockS3Storage,
+):
+    content = mock_storage_adapter.uploaded_files[("avatars", avatar.s3_key)][
+        "content"
+    ]
+    response = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"Range": "bytes=10-19"},
+    )
+
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+
+@pytest.mark.asyncio
+async def test_416_proxy_download_range_not_satisfiable(
+    client: AsyncClient, avatar: UserUploadDto
+):
+    response = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"Range": "bytes=100000000-"},
+    )
+
+    assert response.status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_302_proxy_download_redirect_mode(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+):
+    mock_upload_service.download_mode = "redirect"
+    response = await client.get(f"/download/uploads/{avatar.s3_key}")
+
+    assert response.status_code == 302
+    assert avatar.s3_key in response.headers["location"]
+    assert mock_storage_adapter.get_object_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download_disk_cache_hit(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    disk_cache: UploadDiskCache,
+    mock_storage_adapter: MockS3Storage,
+    query_counter: QueryCounter,
+):
+    content = mock_storage_adapter.uploaded_files[("avatars", avatar.s3_key)][
+        "content"
+    ]
+    first = await client.get(f"/download/uploads/{avatar.s3_key}")
+    query_counter.reset()
+    second = await client.get(f"/download/uploads/{avatar.s3_key}")
+    ranged = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"Range": "bytes=10-19"},
+    )
+
+    assert first.content == second.content == content
+    assert second.headers["etag"] == f'"{avatar.s3_key}"'
+    assert ranged.status_code == 206
+    assert ranged.content == content[10:20]
+    assert query_counter.count == 0
+    assert mock_storage_adapter.get_object_calls == 1
+    assert disk_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_proxy_download_disk_cache_invalidated_on_delete(
+    client: AsyncClient,
+    avatar: UserUploadDto,
+    disk_cache: UploadDiskCache,
+    mock_upload_service: UserUploadService,
+):
+    await client.get(f"/download/uploads/{avatar.s3_key}")
+    assert len(disk_cache) == 1
+
+    await mock_upload_service.delete(avatar.user_id, UserUploadsType.Avatar)
+    response = await client.get(f"/download/uploads/{avatar.s3_key}")
+
+    assert len(disk_cache) == 0
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_evicts_least_recently_used(
+    tmp_path, avatar: UserUploadDto
+):
+    cache = UploadDiskCache(str(tmp_path), 25, 60)
+    await cache.put("a", b"a" * 10, "image/jpeg", avatar)
+    await cache.put("b", b"b" * 10, "image/jpeg", avatar)
+    cache.get("a")
+    await cache.put("c", b"c" * 10, "image/jpeg", avatar)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert await cache.put("d", b"d" * 30, "image/jpeg", avatar) is None
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download_rendition(
+    client: AsyncClient, avatar: UserUploadDto
+):
+    response = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        params={"size": 50, "format": "webp"},
+    )
+    image = Image.open(io.BytesIO(response.content))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["etag"] == f'"{avatar.s3_key}-64.webp"'
+    assert image.size == (64, 64)
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download_accept_negotiation(
+    client: AsyncClient, avatar: UserUploadDto
+):
+    webp = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        headers={"Accept": "image/avif,image/webp,*/*"},
+    )
+    jpeg = await client.get(
+        f"/download/uploads/{avatar.s3_key}", headers={"Accept": "*/*"}
+    )
+
+    assert webp.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(webp.content)).size == (256, 256)
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    assert jpeg.headers["etag"] == f'"{avatar.s3_key}"'
+    assert webp.headers["vary"] == jpeg.headers["vary"] == "Accept"
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download_jpeg_only_rendition(
+    client: AsyncClient, jpeg_only: None, avatar: UserUploadDto
+):
+    # исходник 256px не должен подменять версию 128px того же формата
+    rendition = await client.get(
+        f"/download/uploads/{avatar.s3_key}", params={"size": 100}
+    )
+    original = await client.get(
+        f"/download/uploads/{avatar.s3_key}", params={"size": 200}
+    )
+
+    assert avatar.width == 256
+    assert rendition.headers["etag"] == f'"{avatar.s3_key}-128.jpeg"'
+    assert Image.open(io.BytesIO(rendition.content)).size == (128, 128)
+    assert original.headers["etag"] == f'"{avatar.s3_key}"'
+    assert Image.open(io.BytesIO(original.content)).size == (256, 256)
+
+
+@pytest.mark.asyncio
+async def test_200_proxy_download_legacy_upload_without_dimensions(
+    client: AsyncClient, avatar: UserUploadDto
+):
+    await UserUploadsModel.filter(s3_key=avatar.s3_key).update(
+        width=None, height=None
+    )
+
+    rendition = await client.get(
+        f"/download/uploads/{avatar.s3_key}",
+        params={"size": 100, "format": "jpeg"},
+    )
+    original = await client.get(f"/download/uploads/{avatar.s3_key}")
+
+    assert rendition.headers["etag"] == f'"{avatar.s3_key}-128.jpeg"'
+    assert original.headers["etag"] == f'"{avatar.s3_key}"'
@@ -1,6 +1,8 @@
 from app.services.uploads.interface import IUserUploadService
 from app.routers.root.dto import AccessTokenDto
+from starlette.formparsers import MultiPartParser
 from app.models.user import UserUploadsType
+from app.config import Settings
 from httpx import AsyncClient
 from faker import Faker
 import pytest
@@ -476,3 +478,95 @@ async def test_200_root_delete_avatar_not_exists(
 #     headers = {"Authorization": "Bearer MOCK_ACCESS_TOKEN"}
 #     response = await client.delete("/cover", headers=headers)
 #     assert response.status_code in (200, 401, 403)
+
+
+@pytest.mark.asyncio
+async def test_413_root_upload_avatar_too_large(
+    faker: Faker,
+    client: AsyncClient,
+    user: RegisteredUserDto,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(Settings, "UPLOAD_MAX_BYTES", 1024)
+    response = await client.put(
+        "/avatar",
+        files={
+            "file": ("avatar.png", faker.image((256, 256), "png"), "image/png")
+        },
+        headers={"Authorization": f"Bearer {user.access_token}"},
+    )
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_413_root_upload_rejected_by_content_length(
+    client: AsyncClient,
+    user: RegisteredUserDto,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def parse(self):
+        raise AssertionError("form parsed before size check")
+
+    monkeypatch.setattr(MultiPartParser, "parse", parse)
+    monkeypatch.setattr(Settings, "UPLOAD_MAX_BYTES", 1024)
+    response = await client.put(
+        "/avatar",
+        files={"file": ("avatar.png", b"\x89PNG" * 65536, "image/png")},
+        headers={"Authorization": f"Bearer {user.access_token}"},
+    )
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_413_root_upload_rejected_while_streaming(
+    client: AsyncClient,
+    user: RegisteredUserDto,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(Settings, "UPLOAD_MAX_BYTES", 1024)
+    sent = 0
+
+    async def body():
+        nonlocal sent
+        yield (
+            b"--x\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="a.png"'
+            b"\r\nContent-Type: image/png\r\n\r\n\x89PNG"
+        )
+        for _ in range(64):
+            sent += 1
+            yield b"\0" * 65536
+
+    # без Content-Length тело приходит частями (chunked)
+    response = await client.put(
+        "/avatar",
+        content=body(),
+        headers={
+            "Authorization": f"Bearer {user.access_token}",
+            "Content-Type": "multipart/form-data; boundary=x",
+        },
+    )
+
+    assert response.status_code == 413
+    assert sent < 64
+
+
+@pytest.mark.asyncio
+async def test_400_root_upload_avatar_too_many_pixels(
+    faker: Faker,
+    client: AsyncClient,
+    user: RegisteredUserDto,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(Settings, "UPLOAD_MAX_PIXELS", 200 * 200)
+    response = await client.put(
+        "/avatar",
+        files={
+            "file": ("avatar.png", faker.image((256, 256), "png"), "image/png")
+        },
+        headers={"Authorization": f"Bearer {user.access_token}"},
+    )
+
+    assert response.status_code == 400
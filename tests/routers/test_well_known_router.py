@@ -0,0 +1,20 @@
+from app.services.auth.keys import JWTKeyring, get_jwt_keyring
+from tests.core.test_keyring import generate_rsa_pem
+from httpx import AsyncClient
+from app.main import app
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_200_well_known_jwks(client: AsyncClient):
+    keyring = JWTKeyring("RS256", {"k1": generate_rsa_pem()}, "k1")
+    app.dependency_overrides[get_jwt_keyring] = lambda: keyring
+
+    response = await client.get("/.well-known/jwks.json")
+    app.dependency_overrides.pop(get_jwt_keyring, None)
+
+    assert response.status_code == 200
+    (key,) = response.json()["keys"]
+    assert key["kid"] == "k1"
+    assert key["kty"] == "RSA"
+    assert "d" not in key
@@ -0,0 +1,203 @@
+from app.services.user.interface import IUserService
+from app.services.user.dto import RegisteredUserDto
+from app.services.auth import AuthService, get_user_dto
+from datetime import datetime, timedelta, timezone
+from app.services.auth.dto import AccessJWTPayloadDto
+from app.acl.roles import UserRoles
+from tests.fixtures.db_fixtures import QueryCounter
+from app.models.user import UserTokensModel
+from tortoise import connections
+from app.db import READ_CONNECTION
+from app.config import Settings
+from app.cache import TTLCache
+import asyncio
+import pytest
+
+from app.services.auth.exceptions import (
+    InvalidTokenRevision,
+    TokenExpiredException,
+)
+
+
+@pytest.mark.asyncio
+async def test_refresh_served_from_revision_cache(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    hits = mock_auth_service.revision_cache.hits
+    await mock_auth_service.generate_access_token(user.refresh_token)
+
+    assert mock_auth_service.revision_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_revision_cache_miss(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    mock_auth_service.revision_cache.clear()
+    misses = mock_auth_service.revision_cache.misses
+    await mock_auth_service.generate_access_token(user.refresh_token)
+
+    assert mock_auth_service.revision_cache.misses == misses + 1
+    assert user.user.id in mock_auth_service.revision_cache._data
+
+
+@pytest.mark.asyncio
+async def test_set_role_invalidates_revision_cache(
+    user: RegisteredUserDto,
+    mock_auth_service: AuthService,
+    mock_user_service: IUserService,
+):
+    await mock_user_service.set_role(user.user.id, UserRoles.Judge)
+    access_token = await mock_auth_service.generate_access_token(
+        user.refresh_token
+    )
+
+    payload = mock_auth_service.keyring.decode(access_token)
+    assert payload["role"] == UserRoles.Judge
+
+
+@pytest.mark.asyncio
+async def test_user_event_invalidates_revision_cache(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    await mock_auth_service.on_user_event({"data": {"id": user.user.id}})
+
+    assert user.user.id not in mock_auth_service.revision_cache._data
+
+
+@pytest.mark.asyncio
+async def test_access_token_cache(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    cache: TTLCache[str, AccessJWTPayloadDto] = TTLCache(10, 1200)
+    first = await get_user_dto(
+        user.access_token, mock_auth_service.keyring, cache
+    )
+    second = await get_user_dto(
+        user.access_token, mock_auth_service.keyring, cache
+    )
+
+    assert first is second
+    assert first.user_id == user.user.id
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_access_token_cache_honours_exp(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    cache: TTLCache[str, AccessJWTPayloadDto] = TTLCache(10, 1200)
+    token = mock_auth_service.keyring.encode(
+        AccessJWTPayloadDto(
+            user_id=user.user.id,
+            role=UserRoles.User,
+            exp=datetime.now(timezone.utc) - timedelta(seconds=1),
+        ).model_dump()
+    )
+
+    with pytest.raises(TokenExpiredException):
+        await get_user_dto(token, mock_auth_service.keyring, cache)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("user", [{"password": "123456789"}], indirect=True)
+async def test_login_round_trips(
+    user: RegisteredUserDto,
+    mock_user_service: IUserService,
+    mock_auth_service: AuthService,
+    query_counter: QueryCounter,
+):
+    mock_auth_service.revision_cache.clear()
+    result = await mock_user_service.login(user.user.email, "123456789")
+
+    assert query_counter.count == 2
+    assert await mock_auth_service.validate_refresh_token(result.refresh_token)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("user", [{"password": "123456789"}], indirect=True)
+async def test_login_email_is_case_insensitive(
+    user: RegisteredUserDto, mock_user_service: IUserService
+):
+    result = await mock_user_service.login(user.user.email.upper(), "123456789")
+
+    assert result.user.id == user.user.id
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refresh_tokens_get_distinct_revisions(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    tokens = await asyncio.gather(
+        *(
+            mock_auth_service.generate_refresh_token(
+                user.user.id, UserRoles.User
+            )
+            for _ in range(5)
+        )
+    )
+    revisions = {
+        mock_auth_service.keyring.decode(token)["token_revision"]
+        for token in tokens
+    }
+
+    assert len(revisions) == 5
+    assert await UserTokensModel.get(user_id=user.user.id).values_list(
+        "token_revision", flat=True
+    ) == max(revisions)
+
+
+@pytest.mark.asyncio
+async def test_new_refresh_token_accepted_by_worker_with_stale_cache(
+    user: RegisteredUserDto, mock_auth_service: AuthService
+):
+    # другой воркер: свой кеш ревизий, та же база
+    other_worker = AuthService(
+        mock_auth_service.keyring, revision_cache_size=10, revision_cache_ttl=60
+    )
+    await other_worker.validate_refresh_token(user.refresh_token)
+
+    refresh_token = await mock_auth_service.generate_refresh_token(
+        user.user.id, user.user.role
+    )
+    payload = await other_worker.validate_refresh_token(refresh_token)
+
+    assert payload.user_id == user.user.id
+    assert other_worker.revision_cache.get(user.user.id)[0] == (
+        payload.token_revision
+    )
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_checked_on_primary(
+    user: RegisteredUserDto,
+    mock_auth_service: AuthService,
+    mock_user_service: IUserService,
+    monkeypatch,
+):
+    replica = object()
+    primary = connections.get("default")
+    load_token_state = mock_auth_service._load_token_state
+
+    async def lagging_load(user_id: int, db):
+        if db is replica:
+            # реплика еще не видит ревизию, поднятую баном
+            return 1, user.user.role
+        return await load_token_state(user_id, db)
+
+    monkeypatch.setattr(Settings, "DATABASE_READ_URL", "postgres://replica")
+    monkeypatch.setattr(
+        connections,
+        "get",
+        lambda name: replica if name == READ_CONNECTION else primary,
+    )
+    monkeypatch.setattr(mock_auth_service, "_load_token_state", lagging_load)
+
+    await mock_user_service.set_is_banned(user.user.id, True)
+    # событие user.banned сбрасывает кеш ревизий всех воркеров
+    mock_auth_service.invalidate_user(user.user.id)
+
+    with pytest.raises(InvalidTokenRevision):
+        await mock_auth_service.validate_refresh_token(user.refresh_token)
+    assert mock_auth_service.revision_cache.get(user.user.id)[0] > 1
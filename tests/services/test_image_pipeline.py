@@ -0,0 +1,106 @@
+from app.services.uploads.pipeline import ImagePipeline, RenderedImage
+from app.services.uploads.pipeline import render_renditions
+from app.services.uploads.service import probe_image_size
+from faker import Faker
+from PIL import Image
+import asyncio
+import pytest
+
+from app.services.uploads.exceptions import (
+    ImageProcessingOverloadedException,
+    ImageSaveException,
+)
+
+
+async def render(
+    pipeline: ImagePipeline, data: bytes, size: tuple[int, int], workdir
+) -> RenderedImage:
+    workdir.mkdir(exist_ok=True)
+    source = workdir / "source"
+    source.write_bytes(data)
+    images = await pipeline.render_renditions(
+        str(source), size, (), ("jpeg",), str(workdir)
+    )
+    return images[0]
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_process_pool(faker: Faker, tmp_path):
+    pipeline = ImagePipeline(max_workers=1, executor="process")
+    image = await render(
+        pipeline, faker.image((512, 512), "png"), (64, 64), tmp_path
+    )
+    pipeline.shutdown()
+
+    decoded = Image.open(image.path)
+    assert decoded.format == "JPEG"
+    assert decoded.size == (64, 64)
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_broken_image(
+    mock_image_pipeline: ImagePipeline, tmp_path
+):
+    with pytest.raises(ImageSaveException):
+        await render(
+            mock_image_pipeline, b"\x89PNG\r\n\x1a\nbroken", (1, 1), tmp_path
+        )
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_overloaded(faker: Faker, tmp_path):
+    pipeline = ImagePipeline(max_workers=1, max_queue=0, executor="thread")
+    image = faker.image((256, 256), "png")
+
+    results = await asyncio.gather(
+        render(pipeline, image, (64, 64), tmp_path / "first"),
+        render(pipeline, image, (64, 64), tmp_path / "second"),
+        return_exceptions=True,
+    )
+    pipeline.shutdown()
+
+    assert isinstance(results[0], RenderedImage)
+    assert isinstance(results[1], ImageProcessingOverloadedException)
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_jpeg_draft(
+    faker: Faker, mock_image_pipeline: ImagePipeline, tmp_path
+):
+    source = faker.image((4096, 2048), "jpeg")
+    image = await render(mock_image_pipeline, source, (256, 256), tmp_path)
+
+    assert Image.open(image.path).size == (256, 256)
+
+
+def test_probe_image_size_from_header_only(faker: Faker):
+    png = faker.image((300, 200), "png")
+
+    assert probe_image_size(png[:64]) == (300, 200)
+    assert probe_image_size(b"\x89PNG\r\n\x1a\n") is None
+
+
+def test_render_renditions(faker: Faker, tmp_path):
+    source = tmp_path / "source"
+    source.write_bytes(faker.image((1024, 512), "png"))
+    images = render_renditions(
+        str(source),
+        (512, 270),
+        (64, 128, 1024),
+        ("jpeg", "webp"),
+        str(tmp_path),
+    )
+    variants = [(image.width, image.height, image.format) for image in images]
+
+    assert variants == [
+        (512, 270, "jpeg"),
+        (512, 270, "webp"),
+        (128, 68, "jpeg"),
+        (128, 68, "webp"),
+        (64, 34, "jpeg"),
+        (64, 34, "webp"),
+    ]
+    for image in images:
+        decoded = Image.open(image.path)
+        assert decoded.format == image.format.upper()
+        assert decoded.size == (image.width, image.height)
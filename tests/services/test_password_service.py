@@ -0,0 +1,76 @@
+from app.services.password.hashers import BcryptHasher, ScryptHasher
+from app.services.password.service import PasswordService
+from app.services.user.interface import IUserService
+from app.services.user.dto import RegisteredUserDto
+from app.models.user import UserModel
+import asyncio
+import pytest
+
+from app.services.password.exceptions import (
+    PasswordServiceOverloadedException,
+)
+
+
+@pytest.mark.asyncio
+async def test_password_hash_verify(mock_password_service: PasswordService):
+    password_hash = await mock_password_service.hash_password("123456789")
+
+    assert await mock_password_service.verify_password(
+        "123456789", password_hash
+    )
+    assert not await mock_password_service.verify_password(
+        "987654321", password_hash
+    )
+
+
+@pytest.mark.asyncio
+async def test_password_service_overloaded():
+    service = PasswordService(max_workers=1, max_queue=0)
+
+    results = await asyncio.gather(
+        service.hash_password("123456789"),
+        service.hash_password("123456789"),
+        return_exceptions=True,
+    )
+    service.shutdown()
+
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], PasswordServiceOverloadedException)
+
+
+@pytest.mark.asyncio
+async def test_password_scrypt_hash_verify():
+    service = PasswordService(ScryptHasher(n=2**10))
+    password_hash = await service.hash_password("123456789")
+
+    assert password_hash.startswith("$scrypt$n=1024,r=8,p=1$")
+    assert await service.verify_password("123456789", password_hash)
+    assert not await service.verify_password("987654321", password_hash)
+    assert not service.needs_rehash(password_hash)
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_needs_rehash_on_params_change():
+    old_hash = BcryptHasher(rounds=4).hash("123456789")
+
+    assert BcryptHasher(rounds=5).needs_rehash(old_hash)
+    assert not BcryptHasher(rounds=4).needs_rehash(old_hash)
+    assert PasswordService(ScryptHasher()).needs_rehash(old_hash)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("user", [{"password": "123456789"}], indirect=True)
+async def test_password_rehash_on_login(
+    user: RegisteredUserDto,
+    mock_user_service: IUserService,
+    mock_password_service: PasswordService,
+):
+    mock_password_service.hasher = ScryptHasher(n=2**10)
+    await mock_user_service.login(user.user.email, "123456789")
+
+    model = await UserModel.get(id=user.user.id)
+    assert model.password_hash.startswith("$scrypt$")
+    assert await mock_password_service.verify_password(
+        "123456789", model.password_hash
+    )
@@ -0,0 +1,159 @@
+from app.services.uploads.exceptions import ImageSaveException
+from app.models.user import UploadGarbageModel, UserUploadsType
+from app.services.uploads.service import UserUploadService
+from app.services.uploads.gc import UploadGarbageCollector
+from tests.mocks.adapters.storage import MockS3Storage
+from app.services.user.dto import RegisteredUserDto
+from app.services.user.service import UserService
+from datetime import datetime, timedelta, timezone
+from fastapi.datastructures import Headers
+from fastapi import UploadFile
+from faker import Faker
+import asyncio
+import pytest
+import io
+
+
+def make_avatar(faker: Faker) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(faker.image((256, 256), "png")),
+        filename="avatar.png",
+        headers=Headers(raw=[(b"content-type", b"image/png")]),
+    )
+
+
+@pytest.mark.asyncio
+async def test_replacement_queues_previous_keys(
+    faker: Faker,
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+    mock_upload_gc: UploadGarbageCollector,
+):
+    user_id = user_with_avatar.user.id
+    previous = await mock_upload_service.get_upload(
+        user_id, UserUploadsType.Avatar
+    )
+    current = await mock_upload_service.upload_avatar(
+        make_avatar(faker), user_id
+    )
+
+    queued = await UploadGarbageModel.all().values_list("s3_key", flat=True)
+    assert set(queued) == {previous.s3_key} | {
+        r.s3_key for r in previous.renditions
+    }
+
+    await mock_upload_gc.collect()
+
+    keys = {key for _, key in mock_storage_adapter.uploaded_files}
+    assert keys == {current.s3_key} | {r.s3_key for r in current.renditions}
+    assert await UploadGarbageModel.all().count() == 0
+    assert mock_upload_gc.stats()["collected"] == len(queued)
+
+
+@pytest.mark.asyncio
+async def test_user_delete_queues_upload_keys(
+    user_with_avatar: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_upload_service: UserUploadService,
+):
+    user_id = user_with_avatar.user.id
+    avatar = await mock_upload_service.get_upload(
+        user_id, UserUploadsType.Avatar
+    )
+
+    await mock_user_service.delete(user_id)
+
+    queued = await UploadGarbageModel.all().values_list("s3_key", flat=True)
+    assert set(queued) == {avatar.s3_key} | {
+        r.s3_key for r in avatar.renditions
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_upload_keeps_previous_upload(
+    faker: Faker,
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+    monkeypatch,
+):
+    user_id = user_with_avatar.user.id
+    previous = await mock_upload_service.get_upload(
+        user_id, UserUploadsType.Avatar
+    )
+    upload_file = mock_storage_adapter.upload_file
+
+    async def flaky_upload_file(buf, bucket, key, content_type):
+        if key.endswith(".webp"):
+            raise RuntimeError("S3 is unavailable")
+        await upload_file(buf, bucket, key, content_type)
+
+    monkeypatch.setattr(mock_storage_adapter, "upload_file", flaky_upload_file)
+    with pytest.raises(ImageSaveException):
+        await mock_upload_service.upload_avatar(make_avatar(faker), user_id)
+
+    current = await mock_upload_service.get_upload(
+        user_id, UserUploadsType.Avatar
+    )
+    queued = await UploadGarbageModel.all().values_list("s3_key", flat=True)
+    assert current.s3_key == previous.s3_key
+    assert previous.s3_key not in queued
+    assert len(queued) == 1 + len(previous.renditions)
+
+
+@pytest.mark.asyncio
+async def test_gc_respects_grace_period(
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+):
+    await mock_upload_service.delete(
+        user_with_avatar.user.id, UserUploadsType.Avatar
+    )
+    gc = UploadGarbageCollector(mock_storage_adapter, grace_period=3600)
+
+    assert await gc.collect() == 0
+    assert mock_storage_adapter.delete_objects_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_gc_backs_off_while_deletes_fail(
+    mock_storage_adapter: MockS3Storage, monkeypatch
+):
+    await UploadGarbageModel.enqueue([f"key-{i}" for i in range(4)])
+    gc = UploadGarbageCollector(
+        mock_storage_adapter, batch_size=4, grace_period=0, interval=0.01
+    )
+
+    async def failing_delete(bucket: str, keys: list[str]) -> list[str]:
+        mock_storage_adapter.delete_objects_calls += 1
+        return keys
+
+    monkeypatch.setattr(mock_storage_adapter, "delete_objects", failing_delete)
+    task = asyncio.create_task(gc.run())
+    # паузы 0.02, 0.04, 0.08, ... - за 0.1с не больше четырех проходов
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert 1 <= mock_storage_adapter.delete_objects_calls <= 4
+    assert await UploadGarbageModel.all().count() == 4
+    assert gc.stats()["collected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_gc_find_orphans(
+    user_with_avatar: RegisteredUserDto,
+    mock_storage_adapter: MockS3Storage,
+    mock_upload_gc: UploadGarbageCollector,
+):
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+    for key in ("orphan", "fresh"):
+        await mock_storage_adapter.upload_file(
+            io.BytesIO(b"data"), "avatars", key, "image/jpeg"
+        )
+    for bucket, key in mock_storage_adapter.existing_objects:
+        if key != "fresh":
+            mock_storage_adapter.last_modified[(bucket, key)] = old
+
+    assert await mock_upload_gc.find_orphans(min_age=3600) == ["orphan"]
@@ -0,0 +1,150 @@
+import app.services.uploads.service as upload_service_module
+from app.services.uploads.interface import IUserUploadService
+from app.services.uploads.service import UserUploadService
+from app.services.uploads.gc import UploadGarbageCollector
+from starlette.datastructures import Headers, UploadFile
+from tests.mocks.adapters.storage import MockS3Storage
+from app.services.user.dto import RegisteredUserDto
+from app.models.user import UserUploadsType
+from faker import Faker
+import pytest
+import io
+
+from app.services.uploads.exceptions import (
+    WrongMagicsException,
+    ImageReadException,
+)
+
+
+@pytest.mark.asyncio
+async def test_get_uploads_many(
+    user_with_avatar: RegisteredUserDto,
+    users: list[RegisteredUserDto],
+    mock_upload_service: IUserUploadService,
+):
+    user_ids = [user_with_avatar.user.id] + [user.user.id for user in users]
+    uploads = await mock_upload_service.get_uploads_many(user_ids)
+
+    assert set(uploads.keys()) == set(user_ids)
+    assert len(uploads[user_with_avatar.user.id]) == 1
+    assert uploads[user_with_avatar.user.id][0].type == UserUploadsType.Avatar
+    for user in users:
+        assert uploads[user.user.id] == []
+
+
+@pytest.mark.asyncio
+async def test_get_uploads_many_empty(mock_upload_service: IUserUploadService):
+    assert await mock_upload_service.get_uploads_many([]) == {}
+
+
+@pytest.mark.asyncio
+async def test_presigned_download_url_cached(
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+):
+    mock_upload_service.download_mode = "presigned"
+    first = await mock_upload_service.get_uploads(user_with_avatar.user.id)
+    second = await mock_upload_service.get_uploads(user_with_avatar.user.id)
+
+    assert first[0] == second[0]
+    assert "X-Amz-Signature" in (first[0].url or "")
+    assert mock_storage_adapter.presigned_urls == 1 + len(first[0].renditions)
+
+
+@pytest.mark.asyncio
+async def test_upload_renditions_stored_and_deleted(
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_storage_adapter: MockS3Storage,
+    mock_upload_gc: UploadGarbageCollector,
+):
+    upload = await mock_upload_service.get_upload(
+        user_with_avatar.user.id, UserUploadsType.Avatar
+    )
+    variants = {(r.width, r.format) for r in upload.renditions}
+
+    assert variants == {
+        (32, "jpeg"),
+        (32, "webp"),
+        (64, "jpeg"),
+        (64, "webp"),
+        (128, "jpeg"),
+        (128, "webp"),
+        (256, "webp"),
+    }
+    for rendition in upload.renditions:
+        stored = mock_storage_adapter.uploaded_files[
+            ("avatars", rendition.s3_key)
+        ]
+        assert stored["content_type"] == rendition.content_type
+        assert f"size={rendition.width}" in (rendition.url or "")
+
+    await mock_upload_service.delete(
+        user_with_avatar.user.id, UserUploadsType.Avatar
+    )
+    assert len(mock_storage_adapter.uploaded_files) == 8
+
+    assert await mock_upload_gc.collect() == 8
+    assert mock_storage_adapter.uploaded_files == {}
+    assert mock_storage_adapter.delete_objects_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_spool_dir_cleaned_up(
+    tmp_path,
+    faker: Faker,
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+):
+    mock_upload_service.spool_dir = str(tmp_path)
+
+    def make_file(content: bytes) -> UploadFile:
+        return UploadFile(
+            io.BytesIO(content),
+            size=len(content),
+            headers=Headers(raw=[(b"content-type", b"image/png")]),
+        )
+
+    await mock_upload_service.upload_avatar(
+        make_file(faker.image((256, 256), "png")), user_with_avatar.user.id
+    )
+    with pytest.raises(WrongMagicsException):
+        await mock_upload_service.upload_avatar(
+            make_file(b"not an image"), user_with_avatar.user.id
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_header_buffer_is_capped(
+    user: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    monkeypatch,
+):
+    probe_image_size = upload_service_module.probe_image_size
+    probes = []
+
+    def counting_probe(file_bytes: bytes):
+        probes.append(len(file_bytes))
+        return probe_image_size(file_bytes)
+
+    monkeypatch.setattr(
+        upload_service_module, "probe_image_size", counting_probe
+    )
+    # сигнатура JPEG, но без заголовка с размерами
+    content = b"\xff\xd8" + b"\0" * (4 * 1024 * 1024)
+    file = UploadFile(
+        io.BytesIO(content),
+        headers=Headers(raw=[(b"content-type", b"image/jpeg")]),
+    )
+
+    with pytest.raises(ImageReadException):
+        await mock_upload_service.upload_avatar(file, user.user.id)
+
+    assert max(probes) <= upload_service_module.HEADER_MAX_BYTES
+    assert len(probes) == (
+        upload_service_module.HEADER_MAX_BYTES
+        // upload_service_module.READ_CHUNK_SIZE
+    )
@@ -0,0 +1,163 @@
+from tests.mocks.adapters.event_publisher import MockEventPublisherAdapter
+from app.ports.event_publisher.dto import EventPayload
+from app.services.uploads.service import UserUploadService
+from app.services.user.outbox import UserEventDispatcher
+from app.models.user import UserEventOutboxModel, UserUploadsType
+from app.services.user.service import UserService
+from app.services.user.dto import RegisteredUserDto
+from typing import Sequence
+from app.models import UserModel, UserTokensModel
+from uuid import UUID
+import asyncio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_ban_writes_event_to_outbox(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_event_publisher: MockEventPublisherAdapter,
+    mock_event_dispatcher: UserEventDispatcher,
+):
+    await mock_user_service.set_is_banned(user.user.id, True)
+
+    assert mock_event_publisher.published == []
+    assert (await mock_event_dispatcher.stats())["backlog"] == 1
+
+    assert await mock_event_dispatcher.dispatch() == 1
+
+    [event] = mock_event_publisher.published
+    assert event.event_name == "user.banned"
+    assert event.data["id"] == user.user.id
+    assert event.data["is_banned"] is True
+    assert await UserEventOutboxModel.all().count() == 0
+    assert (await mock_event_dispatcher.stats())["published"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ban_event_commits_with_revision_bump(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    monkeypatch,
+):
+    enqueue = UserEventOutboxModel.enqueue
+    revisions = []
+
+    async def recording_enqueue(event_name, data, using_db=None):
+        tokens = await UserTokensModel.get(
+            user_id=user.user.id, using_db=using_db
+        )
+        revisions.append(tokens.token_revision)
+        await enqueue(event_name, data, using_db)
+
+    monkeypatch.setattr(UserEventOutboxModel, "enqueue", recording_enqueue)
+    before = await UserTokensModel.get(user_id=user.user.id)
+
+    await mock_user_service.set_is_banned(user.user.id, True)
+
+    # событие видно диспетчеру только вместе с новой ревизией
+    assert revisions == [before.token_revision + 1]
+
+
+@pytest.mark.asyncio
+async def test_event_is_not_written_without_user_change(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    monkeypatch,
+):
+    async def broken_enqueue(*args, **kwargs):
+        raise RuntimeError("outbox is unavailable")
+
+    monkeypatch.setattr(UserEventOutboxModel, "enqueue", broken_enqueue)
+    with pytest.raises(RuntimeError):
+        await mock_user_service.delete(user.user.id)
+
+    assert await UserModel.exists(id=user.user.id)
+    assert await UserEventOutboxModel.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_unconfirmed_events_are_retried(
+    users: list[RegisteredUserDto],
+    mock_user_service: UserService,
+    mock_event_publisher: MockEventPublisherAdapter,
+    mock_event_dispatcher: UserEventDispatcher,
+    monkeypatch,
+):
+    for registered in users[:3]:
+        await mock_user_service.set_is_banned(registered.user.id, True)
+
+    publish_batch = mock_event_publisher.publish_batch
+
+    async def nack_first(events: Sequence[EventPayload]) -> list[UUID]:
+        await publish_batch(events[1:])
+        return [events[0].event_id]
+
+    monkeypatch.setattr(mock_event_publisher, "publish_batch", nack_first)
+    assert await mock_event_dispatcher.dispatch() == 2
+    assert await UserEventOutboxModel.all().count() == 1
+
+    monkeypatch.setattr(mock_event_publisher, "publish_batch", publish_batch)
+    assert await mock_event_dispatcher.dispatch() == 1
+
+    published = {event.data["id"] for event in mock_event_publisher.published}
+    assert published == {registered.user.id for registered in users[:3]}
+    assert await UserEventOutboxModel.all().count() == 0
+
+    stats = await mock_event_dispatcher.stats()
+    assert stats["published"] == 3
+    assert stats["failed"] == 1
+    assert stats["batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_backs_off_while_broker_rejects(
+    users: list[RegisteredUserDto],
+    mock_user_service: UserService,
+    mock_event_publisher: MockEventPublisherAdapter,
+    monkeypatch,
+):
+    for registered in users[:2]:
+        await mock_user_service.set_is_banned(registered.user.id, True)
+
+    calls = 0
+
+    async def nack_all(events: Sequence[EventPayload]) -> list[UUID]:
+        nonlocal calls
+        calls += 1
+        return [event.event_id for event in events]
+
+    monkeypatch.setattr(mock_event_publisher, "publish_batch", nack_all)
+    dispatcher = UserEventDispatcher(
+        mock_event_publisher, batch_size=2, interval=0.01
+    )
+    task = asyncio.create_task(dispatcher.run())
+    # паузы 0.02, 0.04, 0.08, ... - за 0.1с не больше четырех проходов,
+    # и notify их не прерывает
+    for _ in range(10):
+        dispatcher.notify()
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert 1 <= calls <= 4
+    assert await UserEventOutboxModel.all().count() == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_changes_wake_dispatcher(
+    user_with_avatar: RegisteredUserDto,
+    mock_upload_service: UserUploadService,
+    mock_event_dispatcher: UserEventDispatcher,
+    monkeypatch,
+):
+    notified = []
+    monkeypatch.setattr(
+        mock_event_dispatcher, "notify", lambda: notified.append(True)
+    )
+
+    await mock_upload_service.delete(
+        user_with_avatar.user.id, UserUploadsType.Avatar
+    )
+
+    assert notified == [True]
+    assert (await mock_event_dispatcher.stats())["backlog"] == 2
@@ -0,0 +1,141 @@
+from app.services.user.exceptions import NoSuchUserException
+from app.services.user.cache import UserProfileCache
+from app.services.user.dto import ExternalUserDto, RegisteredUserDto
+from app.services.user.service import UserService
+from tests.fixtures.db_fixtures import QueryCounter
+from app.executor import MicroBatcher, SingleFlight
+import asyncio
+import pytest
+
+CONCURRENCY = 50
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_user_profile_cache: UserProfileCache,
+    query_counter: QueryCounter,
+):
+    user_id = user.user.id
+    await mock_user_service.get_info(user_id, ExternalUserDto)
+    single = query_counter.count
+    assert single > 0
+
+    await mock_user_profile_cache.invalidate(user_id)
+    query_counter.reset()
+
+    results = await asyncio.gather(
+        *(
+            mock_user_service.get_info(user_id, ExternalUserDto)
+            for _ in range(CONCURRENCY)
+        )
+    )
+
+    assert query_counter.count == single
+    assert {result.id for result in results} == {user_id}
+    # каждый вызов получает свою копию профиля
+    assert len({id(result) for result in results}) == CONCURRENCY
+
+    stats = mock_user_service.lookups.stats()
+    assert stats["shared"] == CONCURRENCY - 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_by_email(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    query_counter: QueryCounter,
+):
+    await mock_user_service.get_by_email(user.user.email)
+    single = query_counter.count
+    query_counter.reset()
+
+    results = await asyncio.gather(
+        *(
+            mock_user_service.get_by_email(user.user.email)
+            for _ in range(CONCURRENCY)
+        )
+    )
+
+    assert query_counter.count == single
+    assert {result.id for result in results} == {user.user.id}
+
+
+@pytest.mark.asyncio
+async def test_missing_user_error_is_shared(
+    mock_user_service: UserService,
+    query_counter: QueryCounter,
+):
+    results = await asyncio.gather(
+        *(
+            mock_user_service.get_info(10**9, ExternalUserDto)
+            for _ in range(10)
+        ),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, NoSuchUserException) for r in results)
+    assert query_counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight: SingleFlight[str, int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def load() -> int:
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("key", load))
+    second = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == 42
+    assert flight.stats() == {"calls": 1, "shared": 1, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("users", [{"count": 20}], indirect=True)
+async def test_distinct_lookups_are_batched(
+    users: list[RegisteredUserDto],
+    mock_user_service: UserService,
+    mock_user_profile_cache: UserProfileCache,
+    query_counter: QueryCounter,
+):
+    mock_user_profile_cache.local.clear()
+    mock_user_service.loader.max_batch = 8
+    query_counter.reset()
+
+    results = await asyncio.gather(
+        *(
+            mock_user_service.get_info(registered.user.id, ExternalUserDto)
+            for registered in users
+        )
+    )
+
+    assert [r.id for r in results] == [r.user.id for r in users]
+    # по запросу пользователей и загрузок на каждую пачку из 8, 8 и 4 id
+    assert query_counter.count == 6
+    assert mock_user_service.loader.stats()["batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_error_is_delivered_to_every_caller():
+    async def load(keys: list[int]) -> dict[int, int]:
+        raise RuntimeError("database is unavailable")
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(
+        load, window=0.001, max_batch=100
+    )
+    results = await asyncio.gather(
+        *(batcher.load(key) for key in range(5)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats()["batches"] == 1
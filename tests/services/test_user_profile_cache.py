@@ -0,0 +1,116 @@
+from app.services.user.dto import (
+    OptionalFullUserDataDto,
+    RegisteredUserDto,
+    MinimalUserDto,
+    FullUserDto,
+)
+from app.services.uploads.service import UserUploadService
+from app.services.user.cache import UserProfileCache
+from app.models.user import UserEventOutboxModel, UserUploadsType
+from app.services.user.service import UserService
+from tests.fixtures.db_fixtures import QueryCounter
+import app.services.uploads.service as upload_service_module
+import app.services.user.service as user_service_module
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_cached_profile_skips_database(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_user_profile_cache: UserProfileCache,
+    query_counter: QueryCounter,
+):
+    await mock_user_service.get_info(user.user.id, FullUserDto)
+    query_counter.reset()
+
+    info = await mock_user_service.get_info(user.user.id, MinimalUserDto)
+
+    assert query_counter.count == 0
+    assert info.id == user.user.id
+    assert "email" not in info.model_dump()
+    assert mock_user_profile_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_profile(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+):
+    await mock_user_service.get_info(user.user.id, FullUserDto)
+    await mock_user_service.update_info(
+        user.user.id, OptionalFullUserDataDto(first_name="renamed")
+    )
+
+    info = await mock_user_service.get_info(user.user.id, FullUserDto)
+
+    assert info.first_name == "renamed"
+    [event] = await UserEventOutboxModel.filter(event_name="user.updated")
+    assert event.data["id"] == user.user.id
+
+
+@pytest.mark.asyncio
+async def test_ban_invalidates_shared_cache(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_user_profile_cache: UserProfileCache,
+):
+    await mock_user_service.get_info(user.user.id, FullUserDto)
+    await mock_user_service.set_is_banned(user.user.id, True)
+
+    # другой воркер с пустым локальным кешем не должен увидеть старый профиль
+    mock_user_profile_cache.local.clear()
+    info = await mock_user_service.get_info(user.user.id, FullUserDto)
+
+    assert info.is_banned is True
+    assert mock_user_profile_cache.stats()["backend_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_avatar_delete_invalidates_profile(
+    user_with_avatar: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_upload_service: UserUploadService,
+):
+    user_id = user_with_avatar.user.id
+    info = await mock_user_service.get_info(user_id, FullUserDto)
+    assert len(info.uploads) == 1
+
+    await mock_upload_service.delete(user_id, UserUploadsType.Avatar)
+
+    info = await mock_user_service.get_info(user_id, FullUserDto)
+    assert info.uploads == []
+
+
+@pytest.mark.asyncio
+async def test_stale_read_is_not_cached(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    mock_user_profile_cache: UserProfileCache,
+):
+    version = mock_user_profile_cache.version
+    stale = await mock_user_service.get_info(user.user.id, FullUserDto)
+    await mock_user_profile_cache.invalidate(user.user.id)
+
+    await mock_user_profile_cache.set_many([stale], version)
+
+    assert await mock_user_profile_cache.get_many([user.user.id]) == {}
+
+
+@pytest.mark.asyncio
+async def test_profile_cache_is_filled_from_primary(
+    user: RegisteredUserDto,
+    mock_user_service: UserService,
+    monkeypatch,
+):
+    def replica():
+        # реплика сразу после бана еще отдает is_banned=False
+        raise AssertionError("profile cache filled from replica")
+
+    monkeypatch.setattr(user_service_module, "get_read_connection", replica)
+    monkeypatch.setattr(upload_service_module, "get_read_connection", replica)
+    await mock_user_service.set_is_banned(user.user.id, True)
+
+    info = await mock_user_service.get_info(user.user.id, FullUserDto)
+
+    assert info.is_banned is True